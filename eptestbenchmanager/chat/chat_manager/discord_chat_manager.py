@@ -1,4 +1,6 @@
 import logging
+import math
+from datetime import datetime
 from . import ChatManager
 
 logger = logging.getLogger(__name__)
@@ -57,6 +59,8 @@ class DiscordChatManager(ChatManager):
         match command:
             case "read":
                 response = self.query_instrument(data.split()[0])
+            case "range":
+                response = self.query_range(data.split())
             case _:
                 response = f"{command} is not a valid command"
 
@@ -86,3 +90,72 @@ class DiscordChatManager(ChatManager):
             response = f"{instrument.name} reports a reading of {instrument.value}"
 
         return response
+
+    def query_range(self, arguments: list[str]) -> str:
+        """Summarizes the recorded readings of a virtual instrument within a time range.
+
+        Args:
+            arguments (list[str]): The name of the virtual instrument, the start and end of the
+            range (`HH:MM[:SS]` today, or seconds since the epoch), and optionally the ID of the
+            recording to read, e.g. a run ID.
+
+        Returns:
+            str: The number of readings and their minimum, maximum and mean, or an error message.
+        """
+        if len(arguments) < 3:
+            return "Usage: range <instrument> <start HH:MM[:SS]> <end HH:MM[:SS]> [record ID]"
+        try:
+            instrument = self.testbench_manager.connection_manager.virtual_instruments[
+                arguments[0]
+            ]
+        except KeyError as e:
+            logger.error("Error querying instrument: %s", e)
+            return f"No such instrument ({arguments[0]}) exists."
+        try:
+            start_time, end_time = (self._parse_time(text) for text in arguments[1:3])
+        except ValueError:
+            return f"Invalid time range {arguments[1]} to {arguments[2]}."
+        record_id = arguments[3] if len(arguments) > 3 else None
+        try:
+            _, values = instrument.read_range(start_time, end_time, record_id=record_id)
+        except KeyError:
+            return f"{instrument.name} has no recording {record_id}."
+        numbers = [
+            value
+            for value in values
+            if isinstance(value, (int, float)) and not math.isnan(value)
+        ]
+        if not numbers:
+            return (
+                f"{instrument.name} has no recorded readings from {arguments[1]} to {arguments[2]}."
+            )
+        return (
+            f"{instrument.name} from {arguments[1]} to {arguments[2]}: {len(numbers)} readings, "
+            f"min {min(numbers)}, max {max(numbers)}, mean {sum(numbers) / len(numbers):.6g} "
+            f"{instrument.unit}"
+        )
+
+    @staticmethod
+    def _parse_time(text: str) -> float:
+        """Parses a time of today as `HH:MM[:SS]`, or seconds since the epoch.
+
+        Args:
+            text (str): The time.
+
+        Returns:
+            float: Seconds since the epoch.
+
+        Raises:
+            ValueError: If the time is in neither format.
+        """
+        try:
+            return float(text)
+        except ValueError:
+            pass
+        for time_format in ("%H:%M:%S", "%H:%M"):
+            try:
+                parsed = datetime.strptime(text, time_format).time()
+            except ValueError:
+                continue
+            return datetime.combine(datetime.now().date(), parsed).timestamp()
+        raise ValueError(f"Invalid time {text}")
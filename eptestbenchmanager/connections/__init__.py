@@ -1,12 +1,30 @@
+from .missedtickpolicy import MissedTickPolicy
+from .readbackmode import ReadbackMode
+from .pollstatistics import PollStatistics
+from .adaptivepollingcontroller import AdaptivePollingController
+from .overflowpolicy import OverflowPolicy
+from .samplequality import SampleQuality
+from .sample import Sample
+from .databus import DataBus
 from .virtualinstrument import VirtualInstrument
+from .compositeexpression import CompositeExpression
+from .instrumenthealth import InstrumentHealth
+from .instrumentunavailable import InstrumentUnavailable
+from .circuitbreaker import CircuitBreaker
+from .instrumentexecutor import InstrumentExecutor
 from .pollingvirtualinstrument import PollingVirtualInstrument
 from .noise_virtual_instrument import NoiseVirtualInstrument
 from .composite_virtual_instrument import CompositeVirtualInstrument
+from .compositepropagationengine import CompositePropagationEngine
 from .experimentstatusvirtualinstrument import ExperimentStatusVirtualInstrument
 from .manualvirtualinstrument import ManualVirtualInstrument
 from .commanddrivenvirtualinstrument import CommandDrivenVirtualInstrument
 from .nullvirtualinstrument import NullVirtualInstrument
 from .batchedpollingvirtualinstrument import BatchedPollingVirtualInstrument
+from .batchingscheme import BatchingScheme
 from .batcher import Batcher
+from .polljob import PollJob
+from .pollscheduler import PollScheduler
+from .asyncacquisitionengine import AsyncAcquisitionEngine
 from .virtualinstrumentfactory import VirtualInstrumentFactory
 from .connectionmanager import ConnectionManager
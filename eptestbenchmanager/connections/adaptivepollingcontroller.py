@@ -0,0 +1,143 @@
+from collections import deque
+from threading import Lock
+from typing import Union
+
+
+class AdaptivePollingController:
+    """Adjusts a polling interval to the dynamics of the polled signal.
+
+    The controller keeps a window of recent samples. When the rate of change (the least-squares
+    slope over the window) or the variance of the window crosses its threshold, the interval drops
+    straight to the minimum so transients are not missed. When both fall below half of their
+    thresholds the signal is considered quiet and the interval is relaxed gradually towards the
+    maximum. In between, the interval is left alone, so it does not oscillate around a threshold.
+
+    Attributes:
+        RELAX_FACTOR (float): Factor the interval grows by for each quiet sample.
+        min_interval (int): Shortest polling interval, in milliseconds.
+        max_interval (int): Longest polling interval, in milliseconds.
+        rate_threshold (Union[float, None]): Rate of change, in units per second, above which the
+        signal is considered active. None disables the rate criterion.
+        variance_threshold (Union[float, None]): Variance, in units squared, above which the signal
+        is considered active. None disables the variance criterion.
+        _samples (deque): The window of recent (time, value) samples.
+        _interval (float): The current polling interval, in milliseconds.
+        _lock (Lock): Guards the window and the interval.
+    """
+
+    RELAX_FACTOR = 1.5
+
+    def __init__(  # pylint: disable=too-many-arguments #(This is built by a factory)
+        self,
+        initial_interval: int,
+        min_interval: int,
+        max_interval: int,
+        rate_threshold: Union[float, None] = None,
+        variance_threshold: Union[float, None] = None,
+        window: int = 10,
+    ):
+        """Initializes the AdaptivePollingController.
+
+        Args:
+            initial_interval (int): Polling interval to start at, in milliseconds. Clamped to the
+            bounds.
+            min_interval (int): Shortest polling interval, in milliseconds.
+            max_interval (int): Longest polling interval, in milliseconds.
+            rate_threshold (Union[float, None], optional): Rate of change, in units per second,
+            above which the signal is considered active. Defaults to None.
+            variance_threshold (Union[float, None], optional): Variance, in units squared, above
+            which the signal is considered active. Defaults to None.
+            window (int, optional): Number of recent samples considered. Defaults to 10.
+
+        Raises:
+            ValueError: If the bounds are inconsistent, the window is too short, or no threshold is
+            given.
+        """
+        if not 0 < min_interval <= max_interval:
+            raise ValueError(
+                f"Invalid adaptive polling bounds: {min_interval} to {max_interval} ms"
+            )
+        if window < 2:
+            raise ValueError("The adaptive polling window needs at least 2 samples")
+        if rate_threshold is None and variance_threshold is None:
+            raise ValueError(
+                "Adaptive polling needs a rate_threshold or a variance_threshold"
+            )
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.rate_threshold = rate_threshold
+        self.variance_threshold = variance_threshold
+        self._samples: deque[tuple[float, float]] = deque(maxlen=window)
+        self._interval = float(min(max(initial_interval, min_interval), max_interval))
+        self._lock = Lock()
+
+    @classmethod
+    def from_config(cls, initial_interval: int, config: dict) -> "AdaptivePollingController":
+        """Creates a controller from the `adaptive_polling` section of an instrument config.
+
+        Args:
+            initial_interval (int): The instrument's `polling_interval`, in milliseconds.
+            config (dict): The `adaptive_polling` configuration.
+
+        Returns:
+            AdaptivePollingController: The controller.
+        """
+        return cls(
+            initial_interval,
+            config["min_interval"],
+            config["max_interval"],
+            rate_threshold=config.get("rate_threshold", None),
+            variance_threshold=config.get("variance_threshold", None),
+            window=config.get("window", 10),
+        )
+
+    @property
+    def interval(self) -> int:
+        """The current polling interval, in milliseconds."""
+        with self._lock:
+            return round(self._interval)
+
+    def record(self, time: float, value: Union[int, float]) -> None:
+        """Adds a sample and adjusts the polling interval.
+
+        Args:
+            time (float): When the sample was taken, in seconds.
+            value (Union[int, float]): The sampled value.
+        """
+        with self._lock:
+            self._samples.append((time, float(value)))
+            if len(self._samples) < 2:
+                return
+            rate, variance = self._window_statistics()
+
+            if self._exceeds(rate, self.rate_threshold) or self._exceeds(
+                variance, self.variance_threshold
+            ):
+                self._interval = float(self.min_interval)
+            elif self._quiet(rate, self.rate_threshold) and self._quiet(
+                variance, self.variance_threshold
+            ):
+                self._interval = min(
+                    self._interval * self.RELAX_FACTOR, float(self.max_interval)
+                )
+
+    def _window_statistics(self) -> tuple[float, float]:
+        """Returns the absolute least-squares slope and the variance of the window."""
+        count = len(self._samples)
+        mean_time = sum(time for time, _ in self._samples) / count
+        mean_value = sum(value for _, value in self._samples) / count
+        time_spread = sum((time - mean_time) ** 2 for time, _ in self._samples)
+        covariance = sum(
+            (time - mean_time) * (value - mean_value) for time, value in self._samples
+        )
+        rate = abs(covariance / time_spread) if time_spread > 0 else 0.0
+        variance = sum((value - mean_value) ** 2 for _, value in self._samples) / count
+        return rate, variance
+
+    @staticmethod
+    def _exceeds(statistic: float, threshold: Union[float, None]) -> bool:
+        return threshold is not None and statistic > threshold
+
+    @staticmethod
+    def _quiet(statistic: float, threshold: Union[float, None]) -> bool:
+        return threshold is None or statistic < threshold / 2
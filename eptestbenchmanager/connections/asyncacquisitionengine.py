@@ -0,0 +1,231 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from threading import Thread, Lock
+from time import monotonic
+from typing import Union, TYPE_CHECKING
+from . import InstrumentExecutor, PollJob
+
+if TYPE_CHECKING:
+    from eptestbenchmanager.connections import CompositePropagationEngine
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncAcquisitionEngine:
+    """Runs all polling, batching and composite updates on a single asyncio event loop.
+
+    This is a drop-in alternative to `PollScheduler`, selected with the apparatus config setting
+    `acquisition: {engine: async}`. Each polled object gets a task that sleeps until its next
+    absolute deadline and then polls. Polled objects that provide `poll_async()` await their reads
+    on the instrument executors without holding a thread; any other `poll()` runs on the loop's
+    default executor. Coroutine driver methods run natively on the loop (see `InstrumentExecutor`).
+    Polls that share a `poll_key` are serialized by a per-key lock.
+
+    Composites are recomputed on the loop: the composite propagation engine is driven by the loop,
+    which runs a propagation pass whenever composites are dirty.
+
+    Attributes:
+        _max_workers (Union[int, None]): Size of the pool for blocking polls, or None to size it
+        from the number of distinct poll keys.
+        _jobs (list[PollJob]): All jobs known to the engine.
+        _propagation (Union[CompositePropagationEngine, None]): Recomputes the composites.
+        _lock (Lock): Guards the job list and the propagation engine.
+        _event_loop (Union[asyncio.AbstractEventLoop, None]): The event loop, while running.
+        _loop_thread (Union[Thread, None]): The thread running the event loop.
+        _stop_event (Union[asyncio.Event, None]): Set to stop the event loop.
+        _tasks (set[asyncio.Task]): The polling tasks.
+        _key_locks (dict[object, asyncio.Lock]): Locks serializing polls, by poll key.
+        _running (bool): Whether the engine is running.
+    """
+
+    def __init__(self, max_workers: int = None):
+        """Initializes the AsyncAcquisitionEngine.
+
+        Args:
+            max_workers (int, optional): Size of the pool for blocking polls. Defaults to None,
+            which sizes the pool from the number of distinct poll keys when the engine starts.
+        """
+        self._max_workers = max_workers
+        self._jobs: list[PollJob] = []
+        self._propagation: Union["CompositePropagationEngine", None] = None
+        self._lock = Lock()
+        self._event_loop: asyncio.AbstractEventLoop = None
+        self._loop_thread: Thread = None
+        self._stop_event: asyncio.Event = None
+        self._tasks: set[asyncio.Task] = set()
+        self._key_locks: dict[object, asyncio.Lock] = {}
+        self._running = False
+
+    def add(self, pollable) -> None:
+        """Adds a polled object to the engine. Its first poll is due immediately.
+
+        Args:
+            pollable: An object exposing `poll()` (and optionally `poll_async()`),
+            `polling_interval`, `poll_key`, `missed_tick_policy` and `poll_statistics`.
+        """
+        job = PollJob(pollable)
+        with self._lock:
+            self._jobs.append(job)
+            if self._running:
+                self._event_loop.call_soon_threadsafe(self._start_job, job)
+
+    def set_composite_propagation(self, propagation: "CompositePropagationEngine") -> None:
+        """Sets the engine that recomputes the composites, which is driven by the event loop.
+
+        Args:
+            propagation (CompositePropagationEngine): The composite propagation engine.
+        """
+        with self._lock:
+            self._propagation = propagation
+            if self._running:
+                propagation.start_driven(self._request_propagation)
+
+    def start(self) -> None:
+        """Starts the event loop thread and all polling tasks."""
+        with self._lock:
+            if self._running:
+                logger.error("Acquisition engine already started.")
+                return
+            max_workers = self._max_workers
+            if max_workers is None:
+                max_workers = max(1, min(8, len({job.key for job in self._jobs})))
+            self._event_loop = asyncio.new_event_loop()
+            self._event_loop.set_default_executor(
+                ThreadPoolExecutor(
+                    max_workers=max_workers, thread_name_prefix="Acquisition Worker"
+                )
+            )
+            self._stop_event = asyncio.Event()
+            self._running = True
+
+            for job in self._jobs:
+                if isinstance(job.key, InstrumentExecutor):
+                    job.key.attach_event_loop(self._event_loop)
+            if self._propagation is not None:
+                self._propagation.start_driven(self._request_propagation)
+
+            self._loop_thread = Thread(
+                target=self._run_event_loop,
+                name="Acquisition Event Loop Thread",
+                daemon=True,
+            )
+            self._loop_thread.start()
+        logger.info(
+            "Async acquisition engine started with %d polled objects, %d composites and %d "
+            "workers",
+            len(self._jobs),
+            len(self._propagation.order) if self._propagation is not None else 0,
+            max_workers,
+        )
+
+    def halt(self) -> None:
+        """Signals the engine to stop. Polls already running are cancelled at their next await."""
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+            if self._propagation is not None:
+                self._propagation.halt()
+            self._event_loop.call_soon_threadsafe(self._stop_event.set)
+
+    def join(self) -> None:
+        """Waits for the event loop to stop, then forgets all jobs."""
+        if self._loop_thread is not None and self._loop_thread.is_alive():
+            self._loop_thread.join()
+        with self._lock:
+            for job in self._jobs:
+                if isinstance(job.key, InstrumentExecutor):
+                    job.key.attach_event_loop(None)
+            self._jobs = []
+            self._propagation = None
+            self._event_loop = None
+            self._loop_thread = None
+            self._stop_event = None
+            self._tasks = set()
+            self._key_locks = {}
+
+    def poll_statistics(self) -> dict[str, dict]:
+        """Returns a snapshot of the poll statistics of every polled object.
+
+        Returns:
+            dict[str, dict]: Statistics snapshots, by polled object name.
+        """
+        with self._lock:
+            jobs = list(self._jobs)
+        return {
+            getattr(job.pollable, "name", str(job.pollable)): job.statistics.snapshot()
+            for job in jobs
+        }
+
+    def _run_event_loop(self) -> None:
+        """Runs the event loop until the engine is halted. Runs on the event loop thread."""
+        asyncio.set_event_loop(self._event_loop)
+        try:
+            self._event_loop.run_until_complete(self._main())
+            self._event_loop.run_until_complete(self._event_loop.shutdown_default_executor())
+        finally:
+            self._event_loop.close()
+
+    async def _main(self) -> None:
+        """Starts the polling tasks and cancels them once the engine is halted."""
+        with self._lock:
+            jobs = list(self._jobs)
+        for job in jobs:
+            self._start_job(job)
+
+        await self._stop_event.wait()
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _start_job(self, job: PollJob) -> None:
+        """Creates the polling task of a job. Must be called on the event loop."""
+        task = self._event_loop.create_task(self._polling_task(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _polling_task(self, job: PollJob) -> None:
+        """Polls a job at each of its deadlines, serialized with the other jobs on its key."""
+        key_lock = self._key_locks.setdefault(job.key, asyncio.Lock())
+        job.deadline = job.start(monotonic())
+        while True:
+            # Always yield, so overdue burst ticks cannot starve the loop
+            await asyncio.sleep(max(0.0, job.deadline - monotonic()))
+            async with key_lock:
+                job.statistics.record_poll(job.deadline, monotonic(), job.interval_s)
+                try:
+                    await self._poll(job.pollable)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:  # pylint: disable=broad-except # keep the task polling
+                    logger.error("Unhandled exception polling %s: %s", job.pollable, e)
+            job.deadline = job.next_deadline(monotonic())
+
+    async def _poll(self, pollable) -> None:
+        """Polls an object once, natively if it supports it."""
+        poll_async = getattr(pollable, "poll_async", None)
+        if poll_async is not None:
+            await poll_async()
+        else:
+            await self._event_loop.run_in_executor(None, pollable.poll)
+
+    def _request_propagation(self) -> None:
+        """Schedules a composite propagation pass on the event loop. Safe to call from any thread."""
+        try:
+            self._event_loop.call_soon_threadsafe(self._schedule_propagation)
+        except (AttributeError, RuntimeError):
+            pass  # The engine is stopping; the pass is dropped
+
+    def _schedule_propagation(self) -> None:
+        """Runs a composite propagation pass after the tick interval. Runs on the event loop."""
+        propagation = self._propagation
+        if propagation is not None:
+            self._event_loop.call_later(propagation.tick_interval / 1000, self._propagate)
+
+    def _propagate(self) -> None:
+        """Runs a composite propagation pass, and another if needed. Runs on the event loop."""
+        propagation = self._propagation
+        if propagation is not None and self._running and propagation.propagate():
+            self._schedule_propagation()
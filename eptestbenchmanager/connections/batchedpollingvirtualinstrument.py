@@ -30,3 +30,6 @@ class BatchedPollingVirtualInstrument(VirtualInstrument):
 
     def set_value(self, value):
         self._set_value(value)
+
+    def mark_stale(self):
+        self._mark_stale()
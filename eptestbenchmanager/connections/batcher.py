@@ -1,127 +1,126 @@
+import asyncio
 import logging
-from threading import Thread, Event
-from time import monotonic, sleep
+from typing import TYPE_CHECKING, Union
+from . import MissedTickPolicy, PollStatistics, BatchingScheme, InstrumentUnavailable
+
+if TYPE_CHECKING:
+    from eptestbenchmanager.connections import InstrumentExecutor
 
 logger = logging.getLogger(__name__)
 
 
 class Batcher:
+    """Reads several batchable virtual instruments with a single call to a physical instrument.
+
+    Batchers are polled by the connection manager's acquisition engine, which calls `poll()` once
+    per polling interval. How the call is muxed and demuxed is defined by a registered
+    `BatchingScheme`; its demux is compiled on the first poll, once all instruments are added.
+
+    Attributes:
+        name (str): Name of the batcher, used in log messages.
+        _physical_instrument (InstrumentExecutor): I/O executor of the physical instrument read by
+        the batcher.
+        _getter_function (str): Name of the getter function on the physical instrument.
+        _getter_arguments (dict): Arguments passed to the getter function.
+        _batching_scheme (BatchingScheme): The scheme used to mux and demux the batched call.
+        _vints (dict): The batched virtual instruments, keyed by batching argument value. Several
+        instruments may read the same value; each gets the demuxed reading.
+        _polling_interval (int): Interval between polls in milliseconds.
+        _batched_arguments (Union[dict, None]): The muxed getter arguments, built on the first
+        poll.
+        _demux (Union[callable, None]): The compiled demux function, built on the first poll.
+        _instruments (list): The lists of instruments reading each value, in the order returned
+        by `_demux`.
+        missed_tick_policy (MissedTickPolicy): How the scheduler handles polls that overrun.
+        poll_statistics (PollStatistics): Lateness and jitter of the polls, recorded by the
+        scheduler.
+    """
+
     def __init__(
         self,
-        physical_instrument,
-        getter_function: callable,
+        physical_instrument: "InstrumentExecutor",
+        getter_function: str,
         getter_arguments: dict,
         batching_scheme: str,
         polling_interval: int,
+        name: str = "A batcher",
+        missed_tick_policy: MissedTickPolicy = MissedTickPolicy.CATCH_UP,
     ):
 
+        self.name = name
+        self.missed_tick_policy = missed_tick_policy
+        self.poll_statistics = PollStatistics()
         self._physical_instrument = physical_instrument
         self._getter_function = getter_function
         self._getter_arguments = getter_arguments
-        self._batching_scheme = batching_scheme
-        self._vints = {}  # key is batching argument value
+        self._batching_scheme = BatchingScheme.get(batching_scheme)
+        self._vints: dict[object, list] = {}  # key is batching argument value
 
         self._polling_interval = polling_interval
-
-        self._polling_thread = Thread(
-            target=self._polling_loop,
-            name="A Batching Thread",
-            daemon=True,
-        )
-        self._stop_event = Event()
+        self._batched_arguments: Union[dict, None] = None
+        self._demux: Union[callable, None] = None
+        self._instruments = []
 
     def add_polling_instrument(self, instrument, batching_argument_value):
-        self._vints[batching_argument_value] = instrument
-
-    def _polling_loop(self):
-        getter_arguments = self._getter_arguments | self._get_mux_arguments(
-            self._batching_scheme
-        )
-        getter_function = lambda: getattr(
-            self._physical_instrument, self._getter_function
-        )(**getter_arguments)
-
-        while True:
-            next_poll_time = monotonic() + self._polling_interval / 1000
-            if self._stop_event.is_set():
-                return  # Exit the thread
-            try:
-                values = getter_function()
-                values_by_argument = self._get_demux_function(self._batching_scheme)(
-                    values
-                )
-                for arg, value in values_by_argument.items():
-                    self._vints[arg].set_value(value)
-
-            except Exception as e:
-                print(f"A batcher encountered exception: {e}")
-            sleep_time = next_poll_time - monotonic()
-            if sleep_time > 0:
-                sleep(sleep_time)
-            else:
-                # We missed the polling interval
-                print(
-                    f"EPTestbenchManager: A batcher missed a polling interval by {-sleep_time} seconds"
-                )
-                pass
+        # Instruments reading the same value share its place in the batched call
+        self._vints.setdefault(batching_argument_value, []).append(instrument)
 
-    def start_poll(self) -> None:
-        """Starts the polling thread."""
-        self._stop_event.clear()
+    @property
+    def polling_interval(self) -> int:
+        """The interval between polls, in milliseconds."""
+        return self._polling_interval
+
+    @property
+    def poll_key(self) -> "InstrumentExecutor":
+        """The physical instrument polled, used to keep polls of one instrument sequential."""
+        return self._physical_instrument
+
+    def poll(self) -> None:
+        """Reads all batched instruments once and distributes the values."""
         try:
-            self._polling_thread.start()
-        except RuntimeError:
-            logger.error(f"Instrument {self.name} polling thread already started.")
-
-    def halt_poll(self) -> None:
-        """Stops the polling thread."""
-        self._stop_event.set()
-
-    def join_poll(self) -> None:
-        """Joins the polling thread."""
-        if self._polling_thread.is_alive():
-            self._polling_thread.join()
-
-    # we have to assume that no new instruments were added between calls to get_mux_args and get_demux_function
-
-    def _get_mux_arguments(self, batching_scheme: str) -> dict:
-        match batching_scheme:
-            case "SCPI_chanlist":
-                return {"channel": list(self._vints.keys())}  # expected to be a list
-            case "custom_USBTC08":
-                return {}
-
-
-    def _get_demux_function(self, batching_scheme: str) -> callable:
-        match batching_scheme:
-            case "SCPI_chanlist":
-
-                def demux_function(values):
-                    if isinstance(values, list):
-                        # we've presumably got more than one value back
-                        if len(values) != len(self._vints.keys()):
-                            raise ValueError(
-                                "Cannot demux; wrong number of values returned"
-                            )
-                        return {
-                            list(self._vints.keys())[i]: values[i]
-                            for i in range(len(values))
-                        }
-                    else:
-                        # we've only got a single reading back, not as a list
-                        if len(self._vints.keys()) != 1:
-                            raise ValueError(
-                                "Cannot demux; expected multiple values but only got one"
-                            )
-                        return {
-                            list(self._vints.keys())[0]: values
-                        }  # 'values' is actually just a single number
-
-                return demux_function
-            case "custom_USBTC08":
-                def demux_function(values):
-                    # values is a list of eight temperatures corrisponding to channels 1-8
-                    return {
-                        list(self._vints.keys())[i]: values[list(self._vints.keys())[i]] for i in range(len(self._vints))
-                    }
-                return demux_function
+            values = self._physical_instrument.query(
+                self._getter_function, **self._get_batched_arguments()
+            )
+            self._distribute(values)
+        except InstrumentUnavailable:
+            self._mark_stale()  # The circuit breaker reports the outage
+        except Exception as e:
+            logger.error("%s encountered exception: %s", self.name, e)
+
+    async def poll_async(self) -> None:
+        """Reads all batched instruments once from the async acquisition engine."""
+        try:
+            values = await asyncio.wrap_future(
+                self._physical_instrument.submit_query(
+                    self._getter_function, **self._get_batched_arguments()
+                )
+            )
+            self._distribute(values)
+        except InstrumentUnavailable:
+            self._mark_stale()  # The circuit breaker reports the outage
+        except Exception as e:
+            logger.error("%s encountered exception: %s", self.name, e)
+
+    def _get_batched_arguments(self) -> dict:
+        """Returns the muxed getter arguments, compiling the batch on the first call."""
+        if self._batched_arguments is None:
+            # No instruments can be added once polling has started
+            channels = list(self._vints.keys())
+            self._instruments = list(self._vints.values())
+            self._demux = self._batching_scheme.compile_demux(channels)
+            self._batched_arguments = self._getter_arguments | (
+                self._batching_scheme.mux_arguments(channels)
+            )
+        return self._batched_arguments
+
+    def _mark_stale(self) -> None:
+        """Marks the values of all batched instruments as stale."""
+        for instruments in self._vints.values():
+            for instrument in instruments:
+                instrument.mark_stale()
+
+    def _distribute(self, values) -> None:
+        """Demuxes a batched reading and sets the value of each batched instrument."""
+        for instruments, value in zip(self._instruments, self._demux(values)):
+            for instrument in instruments:
+                instrument.set_value(value)
@@ -0,0 +1,138 @@
+from typing import Any, Union
+import numpy as np
+
+
+class BatchingScheme:
+    """Describes how to read several channels of a physical instrument with one getter call.
+
+    A scheme names the getter argument that selects a single channel (the batching argument), the
+    argument that carries the list of channels in the batched call (the mux argument, if any), and
+    how to find each channel's value in what the batched call returns. The latter is an index map:
+    by default the values come back in the order of the channel list, otherwise a function maps
+    the channel list to indices into the returned values.
+
+    Schemes are registered by name, so support for a new multi-channel instrument is added by
+    registering a scheme (for example from the module of its driver) rather than by editing the
+    batcher. Schemes that need more than an index map can override `compile_demux`.
+
+    Attributes:
+        name (str): Name of the scheme, as used in `batching_scheme` in the apparatus config.
+        batching_argument (str): Getter argument that selects the value of a single instrument.
+        mux_argument (Union[str, None]): Getter argument that receives the list of batched
+        channels, or None if the batched call reads every channel anyway.
+        _index_map (Union[callable, None]): Maps the list of channels to indices into the
+        returned values, or None if they come back in channel list order.
+    """
+
+    _registry: dict[str, "BatchingScheme"] = {}
+
+    def __init__(
+        self,
+        name: str,
+        batching_argument: str,
+        mux_argument: Union[str, None] = None,
+        index_map: Union[callable, None] = None,
+    ):
+        """Initializes the BatchingScheme.
+
+        Args:
+            name (str): Name of the scheme.
+            batching_argument (str): Getter argument that selects a single channel.
+            mux_argument (Union[str, None], optional): Getter argument that receives the list of
+            channels. Defaults to None.
+            index_map (Union[callable, None], optional): Maps the list of channels to indices into
+            the returned values. Defaults to None, for values in channel list order.
+        """
+        self.name = name
+        self.batching_argument = batching_argument
+        self.mux_argument = mux_argument
+        self._index_map = index_map
+
+    @classmethod
+    def register(cls, scheme: "BatchingScheme") -> "BatchingScheme":
+        """Registers a batching scheme under its name, replacing any scheme of the same name.
+
+        Args:
+            scheme (BatchingScheme): The scheme.
+
+        Returns:
+            BatchingScheme: The scheme.
+        """
+        cls._registry[scheme.name] = scheme
+        return scheme
+
+    @classmethod
+    def get(cls, name: str) -> "BatchingScheme":
+        """Returns the batching scheme registered under a name.
+
+        Args:
+            name (str): Name of the scheme.
+
+        Returns:
+            BatchingScheme: The scheme.
+
+        Raises:
+            ValueError: If no scheme is registered under the name.
+        """
+        try:
+            return cls._registry[name]
+        except KeyError as e:
+            raise ValueError(f"Unknown batching scheme: {name}") from e
+
+    @classmethod
+    def is_registered(cls, name: str) -> bool:
+        """Returns whether a scheme is registered under a name."""
+        return name in cls._registry
+
+    def mux_arguments(self, channels: list) -> dict:
+        """Returns the getter arguments that make a single call read all the given channels.
+
+        Args:
+            channels (list): The batching argument values of the batched instruments.
+
+        Returns:
+            dict: Arguments to add to the getter arguments.
+        """
+        if self.mux_argument is None:
+            return {}
+        return {self.mux_argument: list(channels)}
+
+    def compile_demux(self, channels: list) -> callable:
+        """Builds the function that splits a batched reading into per-channel values.
+
+        The index map is computed once here; the returned function only does a vectorized lookup.
+
+        Args:
+            channels (list): The batching argument values of the batched instruments.
+
+        Returns:
+            callable: Takes what the batched getter returned and returns a list with the value of
+            each channel, in the order of `channels`.
+        """
+        count = len(channels)
+        positional = self._index_map is None
+        index_map = np.asarray(
+            range(count) if positional else self._index_map(channels), dtype=np.intp
+        )
+        required_length = count if positional else int(index_map.max()) + 1
+
+        def demux(values: Any) -> list:
+            if np.ndim(values) == 0:
+                # A single reading, not in a list
+                if count != 1 or not positional:
+                    raise ValueError("Cannot demux; expected multiple values but only got one")
+                return [values]
+            values = np.asarray(values)
+            if (positional and len(values) != count) or len(values) < required_length:
+                raise ValueError("Cannot demux; wrong number of values returned")
+            return values[index_map].tolist()
+
+        return demux
+
+
+# Channel lists are passed as `channel` and the readings come back in the same order
+BatchingScheme.register(BatchingScheme("SCPI_chanlist", "channel", mux_argument="channel"))
+# The USB-TC08 always reads every channel; the readings are indexed by channel number
+BatchingScheme.register(
+    BatchingScheme("custom_USBTC08", "channel", index_map=lambda channels: channels)
+)
@@ -0,0 +1,176 @@
+import logging
+import random
+from threading import Lock
+from time import monotonic
+from typing import Union
+from . import InstrumentHealth
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """Tracks the health of a physical instrument and stops requests to it while it is failing.
+
+    A failed request makes the instrument DEGRADED. After `failure_threshold` consecutive failures
+    the circuit opens: requests are refused until a backoff delay has elapsed, after which a single
+    request is let through as a probe. A failed probe reopens the circuit with the backoff doubled
+    (up to `max_backoff`); any success makes the instrument HEALTHY again. Backoff delays are
+    randomized by `jitter` so that instruments on a shared bus do not retry in lockstep.
+
+    Attributes:
+        name (str): Name of the instrument, used in log messages.
+        failure_threshold (int): Consecutive failures that open the circuit.
+        initial_backoff (float): Delay before the first probe, in seconds.
+        max_backoff (float): Longest delay between probes, in seconds.
+        jitter (float): Relative randomization of the backoff delays, between 0 and 1.
+        state (InstrumentHealth): The current health of the instrument.
+        _on_state_change (Union[callable, None]): Called with the old state, the new state and the
+        error (if any) on every state change.
+        _consecutive_failures (int): Failures since the last success.
+        _backoff (float): The current backoff delay, in seconds.
+        _retry_time (Union[float, None]): When the next probe is allowed, in `time.monotonic()`
+        seconds.
+        _lock (Lock): Guards the state.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        name: str,
+        failure_threshold: int = 3,
+        initial_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        jitter: float = 0.2,
+        on_state_change: Union[callable, None] = None,
+    ):
+        """Initializes the CircuitBreaker in the HEALTHY state.
+
+        Args:
+            name (str): Name of the instrument, used in log messages.
+            failure_threshold (int, optional): Consecutive failures that open the circuit.
+            Defaults to 3.
+            initial_backoff (float, optional): Delay before the first probe, in seconds. Defaults
+            to 1.0.
+            max_backoff (float, optional): Longest delay between probes, in seconds. Defaults to
+            60.0.
+            jitter (float, optional): Relative randomization of the backoff delays. Defaults to
+            0.2.
+            on_state_change (Union[callable, None], optional): Called with the old state, the new
+            state and the error (if any) on every state change. Defaults to None.
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.state = InstrumentHealth.HEALTHY
+        self._on_state_change = on_state_change
+        self._consecutive_failures = 0
+        self._backoff = initial_backoff
+        self._retry_time: Union[float, None] = None
+        self._lock = Lock()
+
+    @classmethod
+    def from_config(
+        cls, name: str, config: dict, on_state_change: Union[callable, None] = None
+    ) -> "CircuitBreaker":
+        """Creates a circuit breaker from the `circuit_breaker` section of an instrument config.
+
+        Args:
+            name (str): Name of the instrument.
+            config (dict): The `circuit_breaker` configuration.
+            on_state_change (Union[callable, None], optional): State change callback. Defaults to
+            None.
+
+        Returns:
+            CircuitBreaker: The circuit breaker.
+        """
+        return cls(
+            name,
+            failure_threshold=config.get("failure_threshold", 3),
+            initial_backoff=config.get("initial_backoff", 1.0),
+            max_backoff=config.get("max_backoff", 60.0),
+            jitter=config.get("jitter", 0.2),
+            on_state_change=on_state_change,
+        )
+
+    def allow_request(self) -> bool:
+        """Returns whether a request may be sent to the instrument now.
+
+        While the circuit is open this returns True once per backoff delay, for the probe.
+        """
+        with self._lock:
+            if self.state != InstrumentHealth.OPEN:
+                return True
+            now = monotonic()
+            if now < self._retry_time:
+                return False
+            # Let this request through as the probe; the next one waits for another backoff
+            self._retry_time = now + self._jittered(self._backoff)
+            return True
+
+    def record_success(self) -> None:
+        """Records a successful request, closing the circuit."""
+        with self._lock:
+            old_state = self.state
+            self.state = InstrumentHealth.HEALTHY
+            self._consecutive_failures = 0
+            self._backoff = self.initial_backoff
+            self._retry_time = None
+        if old_state != InstrumentHealth.HEALTHY:
+            self._state_changed(old_state, InstrumentHealth.HEALTHY, None)
+
+    def record_failure(self, error: Exception) -> None:
+        """Records a failed request, degrading the instrument or opening the circuit.
+
+        Args:
+            error (Exception): The error raised by the request.
+        """
+        with self._lock:
+            old_state = self.state
+            self._consecutive_failures += 1
+            if old_state == InstrumentHealth.OPEN:
+                # The probe failed; wait longer before the next one
+                self._backoff = min(self._backoff * 2, self.max_backoff)
+                self._retry_time = monotonic() + self._jittered(self._backoff)
+            elif self._consecutive_failures >= self.failure_threshold:
+                self.state = InstrumentHealth.OPEN
+                self._retry_time = monotonic() + self._jittered(self._backoff)
+            else:
+                self.state = InstrumentHealth.DEGRADED
+            new_state = self.state
+            backoff = self._backoff
+        if new_state != old_state:
+            self._state_changed(old_state, new_state, error)
+        else:
+            logger.debug(
+                "%s still %s (next probe in about %.1f s): %s",
+                self.name,
+                new_state.value,
+                backoff,
+                error,
+            )
+
+    def _jittered(self, delay: float) -> float:
+        """Randomizes a delay by the configured jitter."""
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _state_changed(
+        self,
+        old_state: InstrumentHealth,
+        new_state: InstrumentHealth,
+        error: Union[Exception, None],
+    ) -> None:
+        """Logs a state change and reports it to the callback."""
+        logger.log(
+            logging.INFO if new_state == InstrumentHealth.HEALTHY else logging.WARNING,
+            "Physical instrument %s is now %s (was %s)%s",
+            self.name,
+            new_state.value,
+            old_state.value,
+            f": {error}" if error is not None else "",
+        )
+        if self._on_state_change is not None:
+            try:
+                self._on_state_change(old_state, new_state, error)
+            except Exception as e:  # pylint: disable=broad-except # never break the I/O thread
+                logger.error("Error reporting the state of %s: %s", self.name, e)
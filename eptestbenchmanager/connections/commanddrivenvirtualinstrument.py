@@ -1,20 +1,36 @@
+import logging
+from concurrent.futures import Future
+from threading import Lock
 from typing import Union
-from epcomms.equipment.base.instrument import Instrument
-from . import VirtualInstrument
+from . import VirtualInstrument, InstrumentExecutor, ReadbackMode
+
+logger = logging.getLogger(__name__)
 
 
 class CommandDrivenVirtualInstrument(VirtualInstrument):
-    """Assumed not to change value spontaneously, but only when commanded."""
+    """Assumed not to change value spontaneously, but only when commanded.
+
+    Commands are queued as setpoints on the physical instrument's executor, so a command that is
+    superseded before it is sent is never written. After a write, the value is read back as set by
+    `readback`.
+
+    Attributes:
+        readback (ReadbackMode): How the value is read back after a command.
+        _pending_commands (dict[Future, list]): The latest commanded value and the future returned
+        to the callers, by setpoint write.
+        _command_lock (Lock): Guards the pending commands.
+    """
 
-    def __init__(
+    def __init__(  # pylint: disable=too-many-arguments #(This is built by a factory)
         self,
         testbench_manager,
         uid: str,
         name: str,
-        physical_instrument: Instrument,
-        setter_function: callable,  # We assume this is threadsafe
-        getter_function: callable,  # We assume this is threadsafe
+        physical_instrument: InstrumentExecutor,
+        setter_function: InstrumentExecutor.BoundSetpoint,
+        getter_function: InstrumentExecutor.BoundQuery,
         unit: str = None,
+        readback: ReadbackMode = ReadbackMode.SYNC,
     ):
         """Initializes the CommandDrivenVirtualInstrument.
 
@@ -22,21 +38,96 @@ class CommandDrivenVirtualInstrument(VirtualInstrument):
             testbench_manager: Global TestbenchManager object.
             uid (str): Unique identifier for the instrument.
             name (str): Name of the instrument.
-            physical_instrument (Instrument): The physical instrument being polled.
-            setter_function (callable): Function to set the instrument value.
-            getter_function (callable): Function to get the instrument value.
+            physical_instrument (InstrumentExecutor): I/O executor of the physical instrument.
+            setter_function (InstrumentExecutor.BoundSetpoint): Sets the instrument value.
+            getter_function (InstrumentExecutor.BoundQuery): Gets the instrument value.
             unit (str, optional): Unit of the instrument value. Defaults to None.
+            readback (ReadbackMode, optional): How the value is read back after a command.
+            Defaults to ReadbackMode.SYNC.
         """
         super().__init__(testbench_manager, uid, name, unit)
         self._physical_instrument = physical_instrument
         self._setter_function = setter_function
         self._getter_function = getter_function
+        self.readback = readback
+        self._pending_commands: dict[Future, list] = {}
+        self._command_lock = Lock()
 
-        # Initialize the value
+    def initialize(self) -> None:
+        """Reads the starting value of the instrument."""
+        if self._getter_function is None:
+            return
         value = self._getter_function()
         self._set_value(value)
 
     def command(self, command: Union[str, int, float, bool]) -> None:
-        self._setter_function(command)
-        value = self._getter_function()
-        self._set_value(value)
+        """Commands the instrument with a value and waits for it. See `command_async`.
+
+        Args:
+            command (Union[str, int, float, bool]): The value to command.
+        """
+        self.command_async(command).result()
+
+    def command_async(self, command: Union[str, int, float, bool]) -> Future:
+        """Commands the instrument with a value without waiting for it.
+
+        If a command is still queued, unsent, when a newer one arrives, only the newer value is
+        written and both callers get the same future.
+
+        Args:
+            command (Union[str, int, float, bool]): The value to command.
+
+        Returns:
+            Future: Resolved once the value is written, and with SYNC read-back once it has been
+            read back; failed if either fails.
+        """
+        with self._command_lock:
+            write = self._setter_function.submit(command)
+            pending = self._pending_commands.get(write)
+            first = pending is None
+            if first:
+                pending = self._pending_commands[write] = [command, Future()]
+            else:
+                pending[0] = command
+        if first:
+            write.add_done_callback(self._command_written)
+        return pending[1]
+
+    def _command_written(self, write: Future) -> None:
+        """Reads back a written command and completes it. Runs on the I/O thread."""
+        with self._command_lock:
+            command, done = self._pending_commands.pop(write)
+        error = write.exception()
+        if error is not None:
+            done.set_exception(error)
+            return
+
+        if self.readback == ReadbackMode.NONE or self._getter_function is None:
+            self._set_value(command)
+            done.set_result(None)
+            return
+
+        try:
+            read = self._getter_function.submit()
+        except RuntimeError as e:  # The physical instrument was closed
+            read = Future()
+            read.set_exception(e)
+        if self.readback == ReadbackMode.ASYNC:
+            done.set_result(None)
+            read.add_done_callback(self._read_back)
+        else:
+            read.add_done_callback(lambda read: self._read_back(read, done))
+
+    def _read_back(self, read: Future, done: Union[Future, None] = None) -> None:
+        """Updates the value from a read-back, completing the command if given."""
+        error = read.exception()
+        if error is None:
+            self._set_value(read.result())
+        else:
+            logger.error("Error reading back %s: %s", self.name, error)
+        if done is None:
+            return
+        if error is None:
+            done.set_result(None)
+        else:
+            done.set_exception(error)
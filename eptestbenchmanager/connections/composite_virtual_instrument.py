@@ -1,6 +1,7 @@
 import logging
-from threading import Semaphore, Thread, Event
-from . import VirtualInstrument
+import math
+from typing import Union
+from . import VirtualInstrument, CompositeExpression, SampleQuality
 
 logger = logging.getLogger(__name__)
 
@@ -10,7 +11,10 @@ class CompositeVirtualInstrument(VirtualInstrument):
 
     This class allows for the combination of multiple virtual instruments into a single
     composite instrument. The values of the individual instruments are combined using a
-    user-defined composition function.
+    composition function, either a named function or a compiled `expression`.
+
+    Composites do not update themselves: a `CompositePropagationEngine`, run by the acquisition
+    engine, recomputes them in dependency order through their update hooks.
 
     Attributes:
         testbench_manager: The testbench manager instance.
@@ -19,8 +23,9 @@ class CompositeVirtualInstrument(VirtualInstrument):
         composition_function: A callable that combines the values of the instruments.
         instruments: A list of VirtualInstrument instances to be combined.
         unit: The unit of measurement for the instrument.
-        update_semaphore: A semaphore to control the update loop.
-        _update_thread: A thread that runs the update loop.
+        expression: The compiled expression used as the composition function, if any. Composites
+        sharing an expression can be evaluated together.
+        _update_hook: Called with the composite when one of its instruments changed, if set.
     """
 
     def __init__(
@@ -31,6 +36,7 @@ class CompositeVirtualInstrument(VirtualInstrument):
         composition_function: callable,
         instruments: list[VirtualInstrument],
         unit: str = None,
+        expression: Union[CompositeExpression, None] = None,
     ) -> None:
         """Initializes the CompositeVirtualInstrument.
 
@@ -41,56 +47,79 @@ class CompositeVirtualInstrument(VirtualInstrument):
             composition_function: A callable that combines the values of the instruments.
             instruments: A list of VirtualInstrument instances to be combined.
             unit: The unit of measurement for the instrument. Defaults to None.
+            expression: A compiled expression to use as the composition function instead.
+            Defaults to None.
         """
         super().__init__(testbench_manager, uid, name, unit)
         self._instruments = instruments
-        self._composition_function = composition_function
-        self.update_semaphore = Semaphore(0)
-        self._update_thread = Thread(
-            target=self._updating_loop, name=f"{self.name} Updating Thread", daemon=True
-        )
-        self._stop_event = Event()
+        self.expression = expression
+        self._composition_function = expression if expression is not None else composition_function
+        self._update_hook: Union[callable, None] = None
 
         for instrument in self._instruments:
             instrument.register_dependant_composite(self)
 
-    def _updating_loop(self) -> None:
-        """The loop that updates the composite instrument's value.
+    @property
+    def instruments(self) -> list[VirtualInstrument]:
+        """The instruments the composite is built from."""
+        return self._instruments
 
-        This loop runs in a separate thread and updates the value of the composite
-        instrument by applying the composition function to the values of the individual
-        instruments.
-        """
-        while True:
-            self.update_semaphore.acquire()
-            if self._stop_event.is_set():
-                return  # Exit the thread
-            try:
-                new_value = self._composition_function(
-                    [instrument.value for instrument in self._instruments]
-                )
-            except TypeError as e:
-                logger.error("Error in composition function for %s: %s", self.name, e)
-                new_value = None
-            self._set_value(new_value)
-
-    def start_updating(self) -> None:
-        """Starts the update loop in a separate thread."""
-        self._stop_event.clear()
+    def update(self) -> None:
+        """Recomputes the composite value from the current values of its instruments."""
         try:
-            self._update_thread.start()
-        except RuntimeError:
-            logger.error(f"Instrument {self.name} updating thread already started.")
-
-    def halt_updating_thread(self) -> None:
-        """Stops the update loop."""
-        self._stop_event.set()
-        self.update_semaphore.release()
-
-    def join_updating_thread(self) -> None:
-        """Joins the update loop thread."""
-        if self._update_thread.is_alive():
-            self._update_thread.join()
+            new_value = self._composition_function(
+                [instrument.value for instrument in self._instruments]
+            )
+        except (TypeError, ValueError, ArithmeticError) as e:
+            logger.error("Error in composition function for %s: %s", self.name, e)
+            self._set_value(None, SampleQuality.BAD)
+            return
+        self.set_composed_value(new_value)
+
+    def set_composed_value(self, value: Union[int, float, bool, None]) -> None:
+        """Sets a value computed for this composite elsewhere, such as in a vectorized batch.
+
+        A result that is not a finite number, e.g. from a division by zero, is set as a missing
+        value of BAD quality, as a failed composition function is.
+
+        Args:
+            value (Union[int, float, bool, None]): The composite value.
+        """
+        if isinstance(value, float) and not math.isfinite(value):
+            logger.error("Composition function for %s returned %s", self.name, value)
+            self._set_value(None, SampleQuality.BAD)
+            return
+        self._set_value(value, self._input_quality())
+
+    def _input_quality(self) -> SampleQuality:
+        """Returns the worst quality among the current samples of the instruments."""
+        qualities = {instrument.sample.quality for instrument in self._instruments}
+        for quality in (SampleQuality.BAD, SampleQuality.STALE):
+            if quality in qualities:
+                return quality
+        return SampleQuality.GOOD
+
+    def close(self) -> None:
+        """Stops delivering samples, including those of the instruments the composite is built
+        from."""
+        for instrument in self._instruments:
+            instrument.unregister_dependant_composite(self)
+        super().close()
+
+    def request_update(self) -> None:
+        """Signals that one of the instruments changed and the composite must be recomputed."""
+        update_hook = self._update_hook
+        if update_hook is not None:
+            update_hook(self)
+
+    def set_update_hook(self, update_hook: Union[callable, None]) -> None:
+        """Routes update requests to the given callable.
+
+        Args:
+            update_hook (Union[callable, None]): Called with the composite when it needs an update,
+            or None to ignore update requests (while acquisition is stopped).
+        """
+        self._update_hook = update_hook
 
     def command(self, command: float) -> None:
         """Raises NotImplementedError as this instrument does not support commands.
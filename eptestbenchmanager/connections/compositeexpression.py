@@ -0,0 +1,232 @@
+import ast
+import re
+from typing import Union
+import numpy as np
+
+
+class CompositeExpression:
+    """A composite instrument formula, parsed and compiled once when the apparatus is loaded.
+
+    Expressions are written in Python syntax over the values of the composite's instruments,
+    for example `(heater_voltage - offset) / heater_current * 1e3` or `polyval([-1.67, 204.75,
+    115.86], x)`. Instruments are referred to by UID, or by position as `x0`, `x1`, ... (`x` is
+    the first one). Only arithmetic, comparisons, numeric constants, lists of constants and the
+    functions in `FUNCTIONS` are allowed; anything else is rejected when the expression is
+    compiled, so expressions from apparatus configs cannot run arbitrary code.
+
+    The validated expression is rewritten to index into an array of instrument values and
+    compiled to a NumPy function. Expressions that are the same up to the instrument names share
+    one compiled instance, which lets the propagation engine evaluate several composites in one
+    vectorized call (`evaluate_many`).
+
+    Attributes:
+        FUNCTIONS (dict[str, callable]): Functions that expressions may call.
+        CONSTANTS (dict[str, float]): Named constants that expressions may use.
+        source (str): The expression as written for the first composite compiled to it.
+        arity (int): Number of instrument values the expression takes.
+        _function (callable): The compiled expression, taking an array of instrument values.
+    """
+
+    FUNCTIONS = {
+        "abs": np.abs,
+        "sqrt": np.sqrt,
+        "exp": np.exp,
+        "log": np.log,
+        "log10": np.log10,
+        "sin": np.sin,
+        "cos": np.cos,
+        "tan": np.tan,
+        "arcsin": np.arcsin,
+        "arccos": np.arccos,
+        "arctan": np.arctan,
+        "arctan2": np.arctan2,
+        "hypot": np.hypot,
+        "polyval": np.polyval,
+        "minimum": np.minimum,
+        "maximum": np.maximum,
+        "clip": np.clip,
+        "where": np.where,
+    }
+    CONSTANTS = {"pi": np.pi, "e": np.e}
+
+    _ALLOWED_NODES = (
+        ast.Expression,
+        ast.BinOp,
+        ast.UnaryOp,
+        ast.Compare,
+        ast.Call,
+        ast.Name,
+        ast.Load,
+        ast.Constant,
+        ast.List,
+        ast.Tuple,
+        ast.Add,
+        ast.Sub,
+        ast.Mult,
+        ast.Div,
+        ast.FloorDiv,
+        ast.Mod,
+        ast.Pow,
+        ast.USub,
+        ast.UAdd,
+        ast.Lt,
+        ast.LtE,
+        ast.Gt,
+        ast.GtE,
+        ast.Eq,
+        ast.NotEq,
+    )
+    _POSITIONAL_NAME = re.compile(r"x(\d*)")
+    _cache: dict[str, "CompositeExpression"] = {}
+
+    def __init__(self, source: str, arity: int, function: callable):
+        """Initializes the CompositeExpression. Use `compile` to create one from source.
+
+        Args:
+            source (str): The expression source.
+            arity (int): Number of instrument values the expression takes.
+            function (callable): The compiled expression.
+        """
+        self.source = source
+        self.arity = arity
+        self._function = function
+
+    @classmethod
+    def compile(cls, source: str, names: list[str]) -> "CompositeExpression":
+        """Parses, validates and compiles an expression.
+
+        Args:
+            source (str): The expression.
+            names (list[str]): UIDs of the composite's instruments, in order.
+
+        Returns:
+            CompositeExpression: The compiled expression, shared with any earlier composite whose
+            expression is the same up to instrument names.
+
+        Raises:
+            ValueError: If the expression is invalid or uses anything that is not allowed.
+        """
+        try:
+            tree = ast.parse(source.strip(), mode="eval")
+        except SyntaxError as e:
+            raise ValueError(f"Invalid composite expression {source!r}: {e.msg}") from e
+
+        body = cls._rewrite(tree.body, names, source)
+        key = f"{len(names)}:{ast.dump(body)}"
+        if key not in cls._cache:
+            function_tree = ast.Expression(
+                body=ast.Lambda(
+                    args=ast.arguments(
+                        posonlyargs=[],
+                        args=[ast.arg(arg="v")],
+                        kwonlyargs=[],
+                        kw_defaults=[],
+                        defaults=[],
+                    ),
+                    body=body,
+                )
+            )
+            ast.fix_missing_locations(function_tree)
+            # Evaluated once, to build the function; only the allowed functions are reachable
+            function = eval(  # pylint: disable=eval-used
+                compile(function_tree, f"<expression {source}>", "eval"),
+                {"__builtins__": {}, **cls.FUNCTIONS},
+            )
+            cls._cache[key] = cls(source, len(names), function)
+        return cls._cache[key]
+
+    @classmethod
+    def _rewrite(cls, node: ast.AST, names: list[str], source: str) -> ast.AST:
+        """Validates a node and replaces instrument names with indices into the values `v`."""
+        if not isinstance(node, cls._ALLOWED_NODES):
+            raise ValueError(
+                f"{type(node).__name__} is not allowed in composite expressions ({source!r})"
+            )
+
+        if isinstance(node, ast.Call):
+            if not (isinstance(node.func, ast.Name) and node.func.id in cls.FUNCTIONS):
+                raise ValueError(
+                    f"Only {', '.join(cls.FUNCTIONS)} can be called in composite expressions "
+                    f"({source!r})"
+                )
+            if node.keywords:
+                raise ValueError(f"Keyword arguments are not allowed ({source!r})")
+            return ast.Call(
+                func=ast.Name(id=node.func.id, ctx=ast.Load()),
+                args=[cls._rewrite(arg, names, source) for arg in node.args],
+                keywords=[],
+            )
+
+        if isinstance(node, ast.Name):
+            return cls._rewrite_name(node.id, names, source)
+
+        if isinstance(node, ast.Constant):
+            if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+                raise ValueError(f"Only numeric constants are allowed ({source!r})")
+            return node
+
+        for field, value in ast.iter_fields(node):
+            if isinstance(value, list):
+                setattr(
+                    node,
+                    field,
+                    [
+                        cls._rewrite(item, names, source) if isinstance(item, ast.AST) else item
+                        for item in value
+                    ],
+                )
+            elif isinstance(value, ast.AST):
+                setattr(node, field, cls._rewrite(value, names, source))
+        return node
+
+    @classmethod
+    def _rewrite_name(cls, name: str, names: list[str], source: str) -> ast.AST:
+        """Resolves a name to an instrument value or a constant."""
+        if name in names:
+            index = names.index(name)
+        elif name in cls.CONSTANTS:
+            return ast.Constant(value=cls.CONSTANTS[name])
+        elif (match := cls._POSITIONAL_NAME.fullmatch(name)) and int(
+            match.group(1) or 0
+        ) < len(names):
+            index = int(match.group(1) or 0)
+        else:
+            raise ValueError(f"Unknown name {name!r} in composite expression ({source!r})")
+        return ast.Subscript(
+            value=ast.Name(id="v", ctx=ast.Load()), slice=ast.Constant(value=index), ctx=ast.Load()
+        )
+
+    def __call__(self, values: list) -> Union[float, bool]:
+        """Evaluates the expression for one composite.
+
+        Args:
+            values (list): The values of the composite's instruments, in order.
+
+        Returns:
+            Union[float, bool]: The composite value.
+
+        Raises:
+            TypeError: If an instrument has no value yet.
+        """
+        return self.evaluate_many([values])[0]
+
+    def evaluate_many(self, values: list[list]) -> list:
+        """Evaluates the expression for several composites in one vectorized call.
+
+        Args:
+            values (list[list]): For each composite, the values of its instruments, in order.
+
+        Returns:
+            list: The value of each composite. Invalid operations, such as a division by zero,
+            give inf or nan rather than raising.
+
+        Raises:
+            TypeError: If an instrument has no value yet.
+        """
+        if any(value is None for row in values for value in row):
+            raise TypeError("Composite expression evaluated with missing values")
+        # One row per instrument, one column per composite
+        array = np.asarray(values, dtype=float).reshape(len(values), self.arity).T
+        with np.errstate(all="ignore"):
+            result = self._function(array)
+        return np.broadcast_to(result, (len(values),)).tolist()
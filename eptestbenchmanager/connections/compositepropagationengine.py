@@ -0,0 +1,210 @@
+import logging
+from threading import Thread, Condition
+from time import sleep
+from typing import Union, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from eptestbenchmanager.connections import CompositeVirtualInstrument
+
+logger = logging.getLogger(__name__)
+
+
+class CompositePropagationEngine:
+    """Recomputes composite virtual instruments in dependency order.
+
+    The composites of an apparatus form a directed acyclic graph, which is compiled once into a
+    topological order: every composite comes after the composites it is built from. When an
+    instrument changes, the composites built from it are marked dirty. A propagation pass walks the
+    order and recomputes each dirty composite once; composites downstream of a recomputed one are
+    marked dirty during the pass and recomputed later in the same pass. A burst of updates thus
+    costs at most one recomputation per composite per pass, however many inputs changed.
+
+    The order is split into levels of composites that do not depend on each other. Within a level,
+    dirty composites that share a compiled expression are evaluated together in one vectorized
+    call.
+
+    The engine either runs passes on its own thread (`start`), or asks another scheduler to run
+    them (`start_driven`), as the async acquisition engine does.
+
+    Attributes:
+        levels (list[list[CompositeVirtualInstrument]]): The composites, grouped by their depth in
+        the graph; each level only depends on the levels before it.
+        order (list[CompositeVirtualInstrument]): The composites, in topological order.
+        tick_interval (int): Delay before each pass, in milliseconds, so that bursts of updates
+        are collapsed into one pass. 0 runs a pass as soon as anything is dirty.
+        _dirty (set[CompositeVirtualInstrument]): Composites waiting to be recomputed.
+        _condition (Condition): Guards the dirty set and wakes the propagation thread.
+        _on_dirty (Union[callable, None]): When driven, called whenever the engine goes from clean
+        to dirty.
+        _thread (Union[Thread, None]): The propagation thread, when not driven.
+        _running (bool): Whether the engine is running.
+    """
+
+    def __init__(
+        self, composites: list["CompositeVirtualInstrument"], tick_interval: int = 0
+    ):
+        """Initializes the CompositePropagationEngine and compiles the dependency graph.
+
+        Args:
+            composites (list[CompositeVirtualInstrument]): The composites to update.
+            tick_interval (int, optional): Delay before each pass, in milliseconds. Defaults to 0.
+
+        Raises:
+            ValueError: If the composites depend on each other in a cycle.
+        """
+        self.levels = self._levels(composites)
+        self.order = [composite for level in self.levels for composite in level]
+        self.tick_interval = tick_interval
+        self._dirty: set["CompositeVirtualInstrument"] = set()
+        self._condition = Condition()
+        self._on_dirty: Union[callable, None] = None
+        self._thread: Union[Thread, None] = None
+        self._running = False
+
+    @staticmethod
+    def _levels(
+        composites: list["CompositeVirtualInstrument"],
+    ) -> list[list["CompositeVirtualInstrument"]]:
+        """Groups composites by depth, so each comes after the composites it is built from.
+
+        Within a level, composites keep their given order.
+        """
+        members = set(composites)
+        dependants: dict["CompositeVirtualInstrument", list] = {c: [] for c in composites}
+        missing_inputs = {}
+        for composite in composites:
+            inputs = {instrument for instrument in composite.instruments if instrument in members}
+            missing_inputs[composite] = len(inputs)
+            for instrument in inputs:
+                dependants[instrument].append(composite)
+
+        order = [composite for composite in composites if missing_inputs[composite] == 0]
+        for composite in order:  # The list grows as composites become ready
+            for dependant in dependants[composite]:
+                missing_inputs[dependant] -= 1
+                if missing_inputs[dependant] == 0:
+                    order.append(dependant)
+
+        if len(order) != len(composites):
+            cycle = [composite.uid for composite in composites if missing_inputs[composite] > 0]
+            raise ValueError(f"Composite virtual instruments form a cycle: {', '.join(cycle)}")
+
+        depths: dict["CompositeVirtualInstrument", int] = {}
+        for composite in order:
+            depths[composite] = 1 + max(
+                (depths[i] for i in composite.instruments if i in members), default=-1
+            )
+        levels = [[] for _ in range(max(depths.values(), default=-1) + 1)]
+        for composite in composites:
+            levels[depths[composite]].append(composite)
+        return levels
+
+    def mark_dirty(self, composite: "CompositeVirtualInstrument") -> None:
+        """Marks a composite for recomputation in the next pass. Safe to call from any thread.
+
+        Args:
+            composite (CompositeVirtualInstrument): The composite whose inputs changed.
+        """
+        with self._condition:
+            was_clean = not self._dirty
+            self._dirty.add(composite)
+            on_dirty = self._on_dirty
+            if on_dirty is None:
+                self._condition.notify()
+        if was_clean and on_dirty is not None:
+            on_dirty()
+
+    def propagate(self) -> bool:
+        """Runs one pass, recomputing every dirty composite in topological order.
+
+        Returns:
+            bool: Whether composites were marked dirty again during the pass and need another one.
+        """
+        for level in self.levels:
+            with self._condition:
+                dirty = [composite for composite in level if composite in self._dirty]
+                self._dirty.difference_update(dirty)
+            if dirty:
+                self._recompute(dirty)
+        with self._condition:
+            return bool(self._dirty)
+
+    @staticmethod
+    def _recompute(composites: list["CompositeVirtualInstrument"]) -> None:
+        """Recomputes independent composites, batching those that share an expression."""
+        batches: dict[object, list["CompositeVirtualInstrument"]] = {}
+        for composite in composites:
+            key = composite.expression if composite.expression is not None else composite
+            batches.setdefault(key, []).append(composite)
+
+        for key, batch in batches.items():
+            if len(batch) > 1:
+                try:
+                    values = key.evaluate_many(
+                        [[instrument.value for instrument in c.instruments] for c in batch]
+                    )
+                except (TypeError, ValueError):
+                    pass  # Some inputs have no usable value; update one by one below
+                else:
+                    for composite, value in zip(batch, values):
+                        composite.set_composed_value(value)
+                    continue
+            for composite in batch:
+                try:
+                    composite.update()
+                except Exception as e:  # pylint: disable=broad-except # keep propagating
+                    logger.error("Error updating composite %s: %s", composite.name, e)
+
+    def start(self) -> None:
+        """Starts the propagation thread. Every composite is computed once at start."""
+        self._attach(None)
+        self._thread = Thread(
+            target=self._propagation_loop, name="Composite Propagation Thread", daemon=True
+        )
+        self._thread.start()
+
+    def start_driven(self, on_dirty: callable) -> None:
+        """Starts the engine without a thread; `propagate()` must be run by the caller.
+
+        Args:
+            on_dirty (callable): Called whenever the engine goes from clean to dirty, to have the
+            caller schedule a pass. Called once at start, as every composite is computed then.
+        """
+        self._attach(on_dirty)
+        on_dirty()
+
+    def halt(self) -> None:
+        """Stops routing updates to the engine and signals the propagation thread to stop."""
+        for composite in self.order:
+            composite.set_update_hook(None)
+        with self._condition:
+            self._running = False
+            self._on_dirty = None
+            self._condition.notify_all()
+
+    def join(self) -> None:
+        """Waits for the propagation thread to stop."""
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join()
+        self._thread = None
+
+    def _attach(self, on_dirty: Union[callable, None]) -> None:
+        """Routes the update requests of every composite to the engine and marks all dirty."""
+        with self._condition:
+            self._running = True
+            self._on_dirty = on_dirty
+            self._dirty.update(self.order)
+        for composite in self.order:
+            composite.set_update_hook(self.mark_dirty)
+
+    def _propagation_loop(self) -> None:
+        """Runs a pass whenever composites are dirty, until the engine is halted."""
+        while True:
+            with self._condition:
+                while self._running and not self._dirty:
+                    self._condition.wait()
+                if not self._running:
+                    return
+            if self.tick_interval > 0:
+                sleep(self.tick_interval / 1000)
+            self.propagate()
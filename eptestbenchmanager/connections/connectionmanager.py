@@ -1,18 +1,27 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
 from threading import Thread, Lock
+from time import monotonic
 from pathlib import Path
+from typing import Union
 import os
 import sys
 from yaml import load, FullLoader
 import importlib
 from eptestbenchmanager.dashboard.elements import ApparatusControl
+from eptestbenchmanager.chat.alert_manager import AlertSeverity
 
 from . import (
     VirtualInstrumentFactory,
     PollingVirtualInstrument,
     ExperimentStatusVirtualInstrument,
-    CompositeVirtualInstrument,
+    CompositePropagationEngine,
     Batcher,
+    PollScheduler,
+    AsyncAcquisitionEngine,
+    InstrumentExecutor,
+    CircuitBreaker,
+    InstrumentHealth,
 )
 
 logger = logging.getLogger(__name__)
@@ -22,12 +31,29 @@ class ConnectionManager:
     """Manages connections to physical and virtual instruments for the testbench.
 
     Attributes:
-        _physical_instruments (dict): Dictionary of physical instruments.
+        _physical_instruments (dict): Dictionary of I/O executors wrapping the physical instruments.
         _virtual_instruments (dict): Dictionary of virtual instruments.
+        _acquisition_engine (Union[PollScheduler, AsyncAcquisitionEngine]): Runs the polls of all
+        polling instruments and batchers and the composite updates. Chosen by the `acquisition`
+        setting of the apparatus config.
+        _composite_propagation (Union[CompositePropagationEngine, None]): Recomputes the composite
+        instruments in dependency order, compiled when the apparatus is loaded.
+        load_timings (list[tuple[str, str, float]]): How long each step of the last apparatus load
+        took, as (step, instrument UID, seconds) tuples. Steps are "connect" for physical
+        instruments and "initialize" for virtual instruments.
+        load_duration (Union[float, None]): How long the last apparatus load took, in seconds.
         _experiment_manager: The experiment manager from the testbench manager.
         _testbench_manager: Global TestbenchManager object.
     """
 
+    STATUS_INSTRUMENTS = {
+        "experiment_current_segment_id": "Current Experiment Segment ID",
+        "experiment_current_segment_uid": "Current Experiment Segment UID",
+        "experiment_current_segment_name": "Current Experiment Segment Name",
+    }
+
+    MAX_LOAD_WORKERS = 16
+
     def __init__(self, testbench_manager, config_dir: Path):
         """Initializes the ConnectionManager with the given testbench manager and config file path.
 
@@ -39,6 +65,12 @@ class ConnectionManager:
         self._physical_instruments = {}
         self._batchers = {}
         self._virtual_instruments = {}
+        self._loaded_physical_configs: dict[str, dict] = {}
+        self._loaded_virtual_configs: dict[str, dict] = {}
+        self.load_timings: list[tuple[str, str, float]] = []
+        self.load_duration: Union[float, None] = None
+        self._acquisition_engine = PollScheduler()
+        self._composite_propagation: Union[CompositePropagationEngine, None] = None
         self._experiment_manager = testbench_manager.runner
         self._testbench_manager = testbench_manager
         self.current_apparatus_config = None
@@ -108,46 +140,22 @@ class ConnectionManager:
             if apparatus_config not in self._configs:
                 logger.error("Invalid apparatus config: %s", apparatus_config)
                 return
-            print("setting up apparatus config")
-            # Signal the shutdown of the current polling threads
-            for batcher in self._batchers.values():
-                batcher.halt_poll()
-            for instrument in self._virtual_instruments.values():
-                if isinstance(instrument, PollingVirtualInstrument):
-                    instrument.halt_poll()
-                if isinstance(instrument, CompositeVirtualInstrument):
-                    instrument.halt_updating_thread()
-
-            # Join the polling threads
-            for batcher in self._batchers.values():
-                batcher.join_poll()
-            for instrument in self._virtual_instruments.values():
-                if isinstance(instrument, PollingVirtualInstrument):
-                    instrument.join_poll()
-                if isinstance(instrument, CompositeVirtualInstrument):
-                    instrument.join_updating_thread()
-
-            self._virtual_instruments = {}
-            self._batchers = {}
-
-            # Close all physical instruments
-            for instrument in self._physical_instruments.values():
-                try:
-                    instrument.close()
-                except Exception as e:
-                    logger.error("Error closing physical instrument: %s", e)
-
-
+            logger.info("Setting up apparatus config %s", apparatus_config)
+            # Signal the shutdown of the acquisition engine, then wait for in-flight polls and
+            # composite updates to finish. Unchanged instruments are kept and re-added by run().
+            self._acquisition_engine.halt()
+            self._acquisition_engine.join()
 
             # Load the configuration file for the selected apparatus
             config_file_path = os.path.join(self.config_dir, f"{apparatus_config}.yaml")
-            self.load_instruments(config_file_path)
+            changed = self.load_instruments(config_file_path)
 
             # Start polling and updating for virtual instruments
             self.run()
 
-            # (Re)Load the experiments
-            self._testbench_manager.runner.load_experiments()
+            # Experiments hold references to virtual instruments; reload them if any were replaced
+            if changed:
+                self._testbench_manager.runner.load_experiments()
             self.current_apparatus_config = apparatus_config
 
         finally:
@@ -156,83 +164,450 @@ class ConnectionManager:
             if self.reload is not None:
                 self.reload.reload()
 
-
-    def load_instruments(self, config_file_path: str) -> None:
+    def load_instruments(self, config_file_path: str) -> bool:
         """Loads and configures physical and virtual instruments from a given configuration file.
 
+        The configuration is compared with the one currently loaded. Only the physical instruments
+        whose definitions changed are reconnected, and only the virtual instruments that changed,
+        use a reconnected physical instrument, share a batcher with a replaced instrument, or are
+        composed from a replaced instrument are recreated. All other instruments are kept, with
+        their rolling storage, recordings and dashboard elements. The acquisition engine must be
+        stopped while this runs.
+
+        Physical instruments are connected concurrently on a pool of loader threads. Each virtual
+        instrument is created as soon as its physical instrument is connected and, for a
+        composite, the instruments it is built from exist; its initial read then runs on the pool
+        too. Batchers are only polled once the acquisition engine starts, after all of their
+        instruments exist.
+
         Args:
             config_file_path (Path): The path to the configuration file.
-        """
-
-        # I think what we need to do here is a) close all existing physical instruments, and
-        # b) stop all existing polling threads
 
+        Returns:
+            bool: Whether any instrument was added, removed or replaced.
+        """
         with open(config_file_path, "r", encoding="utf-8") as config_file:
             config = load(config_file, Loader=FullLoader)
 
+        self._acquisition_engine = self._create_acquisition_engine(
+            config.get("acquisition", {})
+        )
+
         try:
-            for uid, instrument_config in config["physical_instruments"].items():
-                module_name = ".".join(instrument_config["class"].split(".")[0:-1])
-                class_name = instrument_config["class"].split(".")[-1]
-                importlib.import_module(module_name)
-                physical_instrument_class = getattr(
-                    sys.modules[module_name], class_name
-                )
+            return self._apply_config(config)
+        except Exception:
+            # The loaded instruments no longer match any config; rebuild everything next time
+            self._loaded_physical_configs = {}
+            self._loaded_virtual_configs = {}
+            raise
 
-                self._physical_instruments[uid] = physical_instrument_class(
-                    **instrument_config["arguments"]
-                )
-        except AttributeError as e:
-            logger.error(
-                "Error loading physical instruments: %s (Perhaps none are defined?)", e
-            )
+    def _apply_config(self, config: dict) -> bool:
+        """Brings the loaded instruments in line with an apparatus config. See `load_instruments`.
 
-        for uid, instrument_config in config["virtual_instruments"].items():
-            self._virtual_instruments[uid] = VirtualInstrumentFactory.create_instrument(
-                self._testbench_manager,
-                self._physical_instruments,
-                self._batchers,
-                self.virtual_instruments,
-                uid,
-                instrument_config,
-            )
+        Args:
+            config (dict): The apparatus config.
 
-        for virtual_instrument in self._virtual_instruments.values():
-            setattr(self, virtual_instrument.uid, virtual_instrument)
+        Returns:
+            bool: Whether any instrument was added, removed or replaced.
+        """
+        self._testbench_manager.data_bus.configure(config.get("data_bus") or {})
+        self._testbench_manager.recording_writer.configure(config.get("recording_writer") or {})
+
+        physical_configs = config.get("physical_instruments") or {}
+        changed_physical = {
+            uid
+            for uid in physical_configs.keys() | self._physical_instruments.keys()
+            if physical_configs.get(uid) != self._loaded_physical_configs.get(uid)
+        }
+
+        # Close the physical instruments (and their I/O executors) that changed or were removed
+        for uid in changed_physical & self._physical_instruments.keys():
+            try:
+                self._physical_instruments.pop(uid).close()
+            except Exception as e:
+                logger.error("Error closing physical instrument %s: %s", uid, e)
+
+        physical_classes = {
+            uid: self._get_physical_instrument_class(instrument_config["class"])
+            for uid, instrument_config in physical_configs.items()
+        }
+        self._loaded_physical_configs = physical_configs
+
+        # Merge plain polling instruments into batched reads where the drivers allow it
+        virtual_instrument_configs = VirtualInstrumentFactory.plan_batches(
+            physical_configs,
+            physical_classes,
+            config["virtual_instruments"],
+        )
+        affected = self._find_affected_virtual_instruments(
+            self._loaded_virtual_configs, virtual_instrument_configs, changed_physical
+        )
+        removed = {
+            uid
+            for uid in self._virtual_instruments
+            if uid not in virtual_instrument_configs and uid not in self.STATUS_INSTRUMENTS
+        }
+
+        # Drop the replaced and removed virtual instruments, and the batchers that read them
+        for uid in affected | removed:
+            old_config = self._loaded_virtual_configs.get(uid)
+            if old_config is not None and old_config["type"] == "batchable_polling":
+                self._batchers.pop(VirtualInstrumentFactory.batcher_key(old_config), None)
+            instrument = self._virtual_instruments.pop(uid, None)
+            if instrument is not None:
+                instrument.close()
+                if hasattr(self, uid):
+                    delattr(self, uid)
+
+        load_start = monotonic()
+        self.load_timings = []
+        with ThreadPoolExecutor(
+            max_workers=self.MAX_LOAD_WORKERS, thread_name_prefix="Instrument Loader"
+        ) as pool:
+            connecting = {
+                pool.submit(
+                    self._connect_physical_instrument,
+                    uid,
+                    physical_classes[uid],
+                    physical_configs[uid],
+                ): uid
+                for uid in sorted(changed_physical & physical_configs.keys())
+            }
+            initializing = self._create_virtual_instruments(
+                pool,
+                connecting,
+                virtual_instrument_configs,
+                [uid for uid in virtual_instrument_configs if uid in affected],
+            )
+            for future in [*connecting, *initializing]:
+                future.result()  # Raises if a physical instrument failed to connect
+        self.load_duration = monotonic() - load_start
+        self._log_load_timings()
+        self._loaded_virtual_configs = virtual_instrument_configs
+
+        # Keep the config order, with the hard-coded status instruments last
+        self._virtual_instruments = {
+            uid: self._virtual_instruments[uid]
+            for uid in [*virtual_instrument_configs, *self.STATUS_INSTRUMENTS]
+            if uid in self._virtual_instruments
+        }
 
         # Virtual instruments that inform about experiment status are hard-coded; they are not defined in the config file
-        self._virtual_instruments["experiment_current_segment_id"] = (
-            ExperimentStatusVirtualInstrument(
-                self._testbench_manager,
-                "experiment_current_segment_id",
-                "Current Experiment Segment ID",
-            )
+        for uid, name in self.STATUS_INSTRUMENTS.items():
+            if uid not in self._virtual_instruments:
+                self._virtual_instruments[uid] = ExperimentStatusVirtualInstrument(
+                    self._testbench_manager, uid, name
+                )
+
+        self._composite_propagation = VirtualInstrumentFactory.compile_composites(
+            self._virtual_instruments,
+            config.get("acquisition", {}).get("composite_tick_interval", 0),
         )
-        self._virtual_instruments["experiment_current_segment_uid"] = (
-            ExperimentStatusVirtualInstrument(
-                self._testbench_manager,
-                "experiment_current_segment_uid",
-                "Current Experiment Segment UID",
-            )
+
+        logger.info(
+            "Apparatus config applied: %d physical instruments reconnected, %d virtual "
+            "instruments recreated, %d removed, %d kept",
+            len(changed_physical & physical_configs.keys()),
+            len(affected),
+            len(removed),
+            len(virtual_instrument_configs) - len(affected),
         )
-        self._virtual_instruments["experiment_current_segment_name"] = (
-            ExperimentStatusVirtualInstrument(
-                self._testbench_manager,
-                "experiment_current_segment_name",
-                "Current Experiment Segment Name",
-            )
+        return bool(changed_physical or affected or removed)
+
+    def _connect_physical_instrument(
+        self, uid: str, physical_instrument_class: type, instrument_config: dict
+    ) -> InstrumentExecutor:
+        """Connects a physical instrument and wraps it in its I/O executor. Runs on the pool.
+
+        Args:
+            uid (str): UID of the physical instrument.
+            physical_instrument_class (type): The driver class.
+            instrument_config (dict): The physical instrument config.
+
+        Returns:
+            InstrumentExecutor: The I/O executor of the instrument.
+        """
+        start = monotonic()
+        # All I/O with the instrument is queued through its executor
+        executor = InstrumentExecutor(
+            uid,
+            physical_instrument_class(**instrument_config["arguments"]),
+            self._create_circuit_breaker(uid, instrument_config.get("circuit_breaker", {})),
         )
+        # Stored here rather than by the caller, so it is closed on the next load if another
+        # instrument fails
+        self._physical_instruments[uid] = executor
+        self.load_timings.append(("connect", uid, monotonic() - start))
+        return executor
+
+    def _create_virtual_instruments(
+        self,
+        pool: ThreadPoolExecutor,
+        connecting: dict[Future, str],
+        configs: dict[str, dict],
+        uids: list[str],
+    ) -> list[Future]:
+        """Creates virtual instruments as soon as what they depend on is available.
+
+        An instrument is created once its physical instrument is connected and, for a composite,
+        once the instruments it is built from exist. Its initial read is then submitted to the
+        pool, so that it overlaps with the loading of other instruments.
+
+        Args:
+            pool (ThreadPoolExecutor): The loader pool.
+            connecting (dict[Future, str]): Connections in progress, by physical instrument UID.
+            configs (dict[str, dict]): The planned virtual instrument configs, by UID.
+            uids (list[str]): UIDs of the virtual instruments to create, in config order.
+
+        Returns:
+            list[Future]: The initial reads.
+
+        Raises:
+            ValueError: If a composite depends on instruments that do not exist, or on itself.
+        """
+        connecting = dict(connecting)
+        pending = list(uids)
+        initializing = []
+        while pending:
+            waiting_for = set(connecting.values())
+            ready = [
+                uid
+                for uid in pending
+                if configs[uid].get("physical_instrument") not in waiting_for
+                and all(
+                    dependency in self._virtual_instruments
+                    for dependency in VirtualInstrumentFactory.get_dependencies(configs[uid])
+                )
+            ]
+            if not ready:
+                if not connecting:
+                    raise ValueError(
+                        f"Cannot resolve the instruments used by: {', '.join(pending)}"
+                    )
+                done, _ = wait(connecting, return_when=FIRST_COMPLETED)
+                for future in done:
+                    connecting.pop(future)
+                    future.result()  # Raises if the connection failed
+                continue
+
+            for uid in ready:
+                pending.remove(uid)
+                instrument = VirtualInstrumentFactory.create_instrument(
+                    self._testbench_manager,
+                    self._physical_instruments,
+                    self._batchers,
+                    self.virtual_instruments,
+                    uid,
+                    configs[uid],
+                )
+                self._virtual_instruments[uid] = instrument
+                setattr(self, uid, instrument)
+                initializing.append(pool.submit(self._initialize_virtual_instrument, instrument))
+        return initializing
+
+    def _initialize_virtual_instrument(self, instrument) -> None:
+        """Performs the initial read of a virtual instrument. Runs on the pool.
+
+        A failed initial read is logged; the instrument starts without a value.
+
+        Args:
+            instrument (VirtualInstrument): The virtual instrument.
+        """
+        start = monotonic()
+        try:
+            instrument.initialize()
+        except Exception as e:  # pylint: disable=broad-except # one instrument must not stop the load
+            logger.error("Error initializing virtual instrument %s: %s", instrument.uid, e)
+        self.load_timings.append(("initialize", instrument.uid, monotonic() - start))
+
+    def _log_load_timings(self) -> None:
+        """Logs the duration of the last load and its slowest steps."""
+        self.load_timings.sort(key=lambda timing: timing[2], reverse=True)
+        logger.info(
+            "Apparatus loaded in %.3f s (%d connections, %d initial reads)",
+            self.load_duration,
+            sum(1 for step, _, _ in self.load_timings if step == "connect"),
+            sum(1 for step, _, _ in self.load_timings if step == "initialize"),
+        )
+        for step, uid, seconds in self.load_timings[:10]:
+            logger.info("  %-10s %-30s %.3f s", step, uid, seconds)
+
+    @staticmethod
+    def _get_physical_instrument_class(class_path: str) -> type:
+        """Imports the driver class of a physical instrument.
+
+        Args:
+            class_path (str): Dotted path of the class, as in the `class` setting.
+
+        Returns:
+            type: The driver class.
+        """
+        module_name = ".".join(class_path.split(".")[0:-1])
+        class_name = class_path.split(".")[-1]
+        importlib.import_module(module_name)
+        return getattr(sys.modules[module_name], class_name)
+
+    @staticmethod
+    def _find_affected_virtual_instruments(
+        old_configs: dict[str, dict], new_configs: dict[str, dict], changed_physical: set[str]
+    ) -> set[str]:
+        """Finds the virtual instruments that must be recreated for a new config.
+
+        An instrument is affected if it is new, its config changed, or its physical instrument
+        changed. Affected and removed instruments also affect every instrument sharing a batcher
+        with them (under the old or the new batch plan) and every composite built from them.
+
+        Args:
+            old_configs (dict[str, dict]): The loaded virtual instrument configs, by UID.
+            new_configs (dict[str, dict]): The new virtual instrument configs, by UID.
+            changed_physical (set[str]): UIDs of the physical instruments that changed.
+
+        Returns:
+            set[str]: UIDs of the virtual instruments in the new config to recreate.
+        """
+        related: dict[str, set[str]] = {}
+        for configs in (old_configs, new_configs):
+            batcher_members: dict[tuple, set[str]] = {}
+            for uid, config in configs.items():
+                if config["type"] == "batchable_polling":
+                    batcher_members.setdefault(
+                        VirtualInstrumentFactory.batcher_key(config), set()
+                    ).add(uid)
+            for members in batcher_members.values():
+                for uid in members:
+                    related.setdefault(uid, set()).update(members)
+        for uid, config in new_configs.items():
+            for dependency in VirtualInstrumentFactory.get_dependencies(config):
+                related.setdefault(dependency, set()).add(uid)
+
+        pending = [
+            uid
+            for uid in old_configs.keys() | new_configs.keys()
+            if old_configs.get(uid) != new_configs.get(uid)
+            or (new_configs.get(uid) or {}).get("physical_instrument") in changed_physical
+        ]
+        affected = set(pending)
+        while pending:
+            for uid in related.get(pending.pop(), ()):
+                if uid not in affected:
+                    affected.add(uid)
+                    pending.append(uid)
+        return affected & new_configs.keys()
 
     def run(self):
         """Starts polling and updating for virtual instruments."""
         for instrument in self._virtual_instruments.values():
             if isinstance(instrument, PollingVirtualInstrument):
-                instrument.start_poll()
-            if isinstance(instrument, CompositeVirtualInstrument):
-                instrument.start_updating()
+                self._acquisition_engine.add(instrument)
 
         for batcher in self._batchers.values():
-            batcher.start_poll()
+            self._acquisition_engine.add(batcher)
+
+        if self._composite_propagation is not None:
+            self._acquisition_engine.set_composite_propagation(self._composite_propagation)
+
+        self._acquisition_engine.start()
+
+    def poll_statistics(self) -> dict[str, dict]:
+        """Returns the timing statistics of every polling instrument and batcher.
+
+        Returns:
+            dict[str, dict]: Poll statistics snapshots, by instrument or batcher name.
+        """
+        return self._acquisition_engine.poll_statistics()
+
+    def data_bus_metrics(self) -> dict[str, dict]:
+        """Returns the queue depth, overflow counts and delivery lag of every data bus subscriber.
+
+        Returns:
+            dict[str, dict]: Data bus metrics, by subscriber name.
+        """
+        return self._testbench_manager.data_bus.metrics()
+
+    def recording_writer_metrics(self) -> dict:
+        """Returns the queue depth, write latency and write counts of the recording writer.
+
+        Returns:
+            dict: Recording writer metrics.
+        """
+        return self._testbench_manager.recording_writer.metrics()
+
+    def _create_circuit_breaker(
+        self, uid: str, circuit_breaker_config: Union[dict, bool, None]
+    ) -> Union[CircuitBreaker, None]:
+        """Creates the circuit breaker of a physical instrument from its config.
+
+        Args:
+            uid (str): The UID of the physical instrument.
+            circuit_breaker_config (Union[dict, bool, None]): The `circuit_breaker` section of the
+            physical instrument config. False or None disables the circuit breaker.
+
+        Returns:
+            Union[CircuitBreaker, None]: The circuit breaker, or None if it is disabled.
+        """
+        if circuit_breaker_config is False or circuit_breaker_config is None:
+            return None
+        if circuit_breaker_config is True:
+            circuit_breaker_config = {}
+        return CircuitBreaker.from_config(
+            uid,
+            circuit_breaker_config,
+            on_state_change=lambda old_state, new_state, error: self._alert_instrument_health(
+                uid, old_state, new_state, error
+            ),
+        )
+
+    def _alert_instrument_health(
+        self,
+        uid: str,
+        old_state: InstrumentHealth,
+        new_state: InstrumentHealth,
+        error: Union[Exception, None],
+    ) -> None:
+        """Sends an alert when a physical instrument stops responding (its circuit breaker opens)
+        and when it recovers from that. Intermittent failures (DEGRADED and back) are only logged,
+        by the circuit breaker, so a flaky link does not flood the chat."""
+        if new_state == InstrumentHealth.OPEN:
+            severity = AlertSeverity.WARNING
+            message = (
+                f"Physical instrument **{uid}** is not responding; its readings are stale "
+                f"until it recovers. Last error: {error}"
+            )
+        elif old_state == InstrumentHealth.OPEN:
+            severity = AlertSeverity.INFO
+            message = f"Physical instrument **{uid}** has recovered (now {new_state.value})."
+        else:
+            return
+        try:
+            self._testbench_manager.alert_manager.send_alert(message, severity=severity)
+        except Exception as e:  # pylint: disable=broad-except # alerts must not stop the I/O
+            logger.error("Failed to send instrument health alert for %s: %s", uid, e)
+
+    @staticmethod
+    def _create_acquisition_engine(
+        acquisition_config: dict,
+    ) -> Union[PollScheduler, AsyncAcquisitionEngine]:
+        """Creates the acquisition engine selected by the apparatus config.
+
+        Args:
+            acquisition_config (dict): The `acquisition` section of the apparatus config, with an
+            `engine` of "threaded" (the default) or "async" and an optional `max_workers`.
+
+        Returns:
+            Union[PollScheduler, AsyncAcquisitionEngine]: The acquisition engine.
+        """
+        engine = acquisition_config.get("engine", "threaded")
+        max_workers = acquisition_config.get("max_workers", None)
+        match engine:
+            case "threaded":
+                return PollScheduler(max_workers)
+            case "async":
+                return AsyncAcquisitionEngine(max_workers)
+            case _:
+                logger.error(
+                    "Unknown acquisition engine %s, using the threaded engine", engine
+                )
+                return PollScheduler(max_workers)
 
     @property
     def virtual_instruments(self):
@@ -0,0 +1,351 @@
+import logging
+from collections import deque
+from queue import SimpleQueue
+from threading import Thread, Lock, Condition
+from time import monotonic
+from typing import Union
+from . import OverflowPolicy, Sample
+
+logger = logging.getLogger(__name__)
+
+
+class DataBus:
+    """Delivers the samples of virtual instruments to their consumers, off the acquisition threads.
+
+    Publishing a sample only puts it on the queue of every subscription to the instrument; a pool
+    of delivery threads then calls the subscribers. Each subscription is drained by one delivery
+    thread at a time, so its callback sees the samples in order and is never called concurrently,
+    and a thread moves on to other subscriptions after `DRAIN_BATCH` samples so that a slow
+    subscriber cannot starve the others. A subscriber that falls behind only fills its own bounded
+    queue; what happens when it is full is set by its overflow policy. Samples are the `Sample`
+    records of the instruments.
+
+    Queue sizes and overflow policies are set per kind of subscriber ("rolling", "recording",
+    "gauge"), from the `data_bus` section of the apparatus config. Dependant composites are not
+    subscribers: instruments mark them for recomputation directly.
+
+    Attributes:
+        DEFAULT_POLICIES (dict[str, tuple[int, OverflowPolicy]]): Queue size and overflow policy
+        of each kind of subscriber, unless configured otherwise.
+        WORKERS (int): Number of delivery threads.
+        DRAIN_BATCH (int): Samples delivered to a subscriber before its thread moves on.
+        policies (dict[str, tuple[int, OverflowPolicy]]): The queue size and overflow policy of
+        each kind of subscriber.
+        _subscriptions (dict[str, tuple[DataBus.Subscription, ...]]): Subscriptions by topic. The
+        tuples are replaced rather than modified, so publishing needs no lock.
+        _lock (Lock): Guards changes to the subscriptions.
+        _ready (SimpleQueue): Subscriptions with samples waiting to be delivered.
+    """
+
+    DEFAULT_POLICIES = {
+        "rolling": (1000, OverflowPolicy.DROP_OLDEST),
+        "recording": (10000, OverflowPolicy.BLOCK),
+        "gauge": (1, OverflowPolicy.COALESCE),
+    }
+    WORKERS = 4
+    DRAIN_BATCH = 64
+
+    class Subscription:
+        """A subscriber to a topic of the data bus, with its queue and delivery metrics.
+
+        Attributes:
+            topic (str): The topic subscribed to.
+            name (str): Name of the subscriber, used in log messages and metrics.
+            kind (str): Kind of the subscriber, which selects its queue size and overflow policy.
+            max_queue (int): The most samples that may wait in the queue.
+            overflow (OverflowPolicy): What to do with a sample published while the queue is full.
+            delivered (int): Samples delivered to the subscriber.
+            dropped (int): Samples discarded by the DROP_OLDEST policy.
+            coalesced (int): Samples replaced by the COALESCE policy.
+            blocked_time (float): Total time publishers waited under the BLOCK policy, in seconds.
+            lag (Union[float, None]): Time from publishing to delivery of the last sample, in
+            seconds.
+            max_lag (float): The longest lag seen, in seconds.
+            _callback (callable): Called with each sample.
+            _queue (deque[tuple[float, Sample]]): Queued samples, with their `time.monotonic()`
+            publishing time.
+            _condition (Condition): Guards the queue and metrics; wakes blocked publishers and
+            flushing threads.
+            _scheduled (bool): Whether the subscription is waiting for or held by a delivery
+            thread.
+            _active (bool): False once unsubscribed.
+        """
+
+        def __init__(  # pylint: disable=too-many-arguments
+            self,
+            topic: str,
+            name: str,
+            kind: str,
+            callback: callable,
+            max_queue: int,
+            overflow: OverflowPolicy,
+        ):
+            """Initializes the Subscription. Use `DataBus.subscribe` to create one.
+
+            Args:
+                topic (str): The topic subscribed to.
+                name (str): Name of the subscriber.
+                kind (str): Kind of the subscriber.
+                callback (callable): Called with each sample.
+                max_queue (int): The most samples that may wait in the queue.
+                overflow (OverflowPolicy): What to do with a sample published while the queue is
+                full.
+            """
+            self.topic = topic
+            self.name = name
+            self.kind = kind
+            self.max_queue = max(1, max_queue)
+            self.overflow = overflow
+            self.delivered = 0
+            self.dropped = 0
+            self.coalesced = 0
+            self.blocked_time = 0.0
+            self.lag: Union[float, None] = None
+            self.max_lag = 0.0
+            self._callback = callback
+            self._queue: deque[tuple[float, Sample]] = deque()
+            self._condition = Condition()
+            self._scheduled = False
+            self._active = True
+
+        def offer(self, published: float, sample: Sample) -> bool:
+            """Queues a sample, applying the overflow policy if the queue is full.
+
+            Args:
+                published (float): When the sample was published, in `time.monotonic()` seconds.
+                sample (Sample): The sample.
+
+            Returns:
+                bool: Whether the subscription must be handed to a delivery thread.
+            """
+            with self._condition:
+                if not self._active:
+                    return False
+                if len(self._queue) >= self.max_queue:
+                    match self.overflow:
+                        case OverflowPolicy.DROP_OLDEST:
+                            self._queue.popleft()
+                            self.dropped += 1
+                        case OverflowPolicy.COALESCE:
+                            self._queue.pop()
+                            self.coalesced += 1
+                        case OverflowPolicy.BLOCK:
+                            block_start = monotonic()
+                            while self._active and len(self._queue) >= self.max_queue:
+                                self._condition.wait()
+                            self.blocked_time += monotonic() - block_start
+                            if not self._active:
+                                return False
+                self._queue.append((published, sample))
+                if self._scheduled:
+                    return False
+                self._scheduled = True
+                return True
+
+        def drain(self, batch: int) -> bool:
+            """Delivers queued samples to the subscriber. Run by one delivery thread at a time.
+
+            Args:
+                batch (int): The most samples to deliver.
+
+            Returns:
+                bool: Whether samples are left, so the subscription must be handed back to a
+                delivery thread.
+            """
+            for _ in range(batch):
+                with self._condition:
+                    if not self._queue:
+                        self._scheduled = False
+                        self._condition.notify_all()
+                        return False
+                    published, sample = self._queue.popleft()
+                    self._condition.notify_all()
+
+                try:
+                    self._callback(sample)
+                except Exception as e:  # pylint: disable=broad-except # keep delivering
+                    logger.error("Error delivering a sample to %s: %s", self.name, e)
+
+                lag = monotonic() - published
+                with self._condition:
+                    self.delivered += 1
+                    self.lag = lag
+                    self.max_lag = max(self.max_lag, lag)
+            return True
+
+        def flush(self, timeout: Union[float, None] = None) -> bool:
+            """Waits until every queued sample has been delivered.
+
+            Args:
+                timeout (Union[float, None], optional): The longest time to wait, in seconds.
+                Defaults to None, to wait indefinitely.
+
+            Returns:
+                bool: Whether the queue was emptied in time.
+            """
+            with self._condition:
+                return self._condition.wait_for(lambda: not self._scheduled, timeout)
+
+        def cancel(self) -> None:
+            """Stops delivery to the subscriber; queued samples are discarded."""
+            with self._condition:
+                self._active = False
+                self._queue.clear()
+                self._condition.notify_all()
+
+        def configure(self, max_queue: int, overflow: OverflowPolicy) -> None:
+            """Changes the queue size and overflow policy.
+
+            Args:
+                max_queue (int): The most samples that may wait in the queue.
+                overflow (OverflowPolicy): What to do with a sample published while the queue is
+                full.
+            """
+            with self._condition:
+                self.max_queue = max(1, max_queue)
+                self.overflow = overflow
+                self._condition.notify_all()
+
+        def metrics(self) -> dict:
+            """Returns the delivery metrics of the subscription.
+
+            Returns:
+                dict: The topic, kind, queue depth and size, overflow policy, delivered, dropped
+                and coalesced sample counts, total blocked time, and the last and longest lag
+                (in seconds) of the subscription.
+            """
+            with self._condition:
+                return {
+                    "topic": self.topic,
+                    "kind": self.kind,
+                    "queue_depth": len(self._queue),
+                    "max_queue": self.max_queue,
+                    "overflow": self.overflow.value,
+                    "delivered": self.delivered,
+                    "dropped": self.dropped,
+                    "coalesced": self.coalesced,
+                    "blocked_time": self.blocked_time,
+                    "lag": self.lag,
+                    "max_lag": self.max_lag,
+                }
+
+    def __init__(self):
+        """Initializes the DataBus and starts its delivery threads."""
+        self.policies = dict(self.DEFAULT_POLICIES)
+        self._subscriptions: dict[str, tuple["DataBus.Subscription", ...]] = {}
+        self._lock = Lock()
+        self._ready: SimpleQueue = SimpleQueue()
+        for index in range(self.WORKERS):
+            Thread(
+                target=self._delivery_loop, name=f"Data Bus Worker {index}", daemon=True
+            ).start()
+
+    def configure(self, config: dict) -> None:
+        """Sets the queue sizes and overflow policies from the `data_bus` section of the apparatus
+        config, for new and existing subscriptions.
+
+        Args:
+            config (dict): Maps kinds of subscriber to a `max_queue` and an `overflow` policy
+            ("drop_oldest", "coalesce" or "block"). Kinds that are not given use the defaults.
+        """
+        policies = dict(self.DEFAULT_POLICIES)
+        for kind, policy_config in config.items():
+            default_size, default_overflow = policies.get(
+                kind, self.DEFAULT_POLICIES["rolling"]
+            )
+            try:
+                policies[kind] = (
+                    int(policy_config.get("max_queue", default_size)),
+                    OverflowPolicy(policy_config.get("overflow", default_overflow.value)),
+                )
+            except (AttributeError, ValueError) as e:
+                logger.error("Invalid data bus config for %s subscribers: %s", kind, e)
+
+        with self._lock:
+            self.policies = policies
+            subscriptions = [s for topic in self._subscriptions.values() for s in topic]
+        for subscription in subscriptions:
+            subscription.configure(*self._policy(subscription.kind))
+
+    def _policy(self, kind: str) -> tuple[int, OverflowPolicy]:
+        """Returns the queue size and overflow policy of a kind of subscriber."""
+        return self.policies.get(kind, self.DEFAULT_POLICIES["rolling"])
+
+    def subscribe(
+        self, topic: str, name: str, kind: str, callback: callable
+    ) -> "DataBus.Subscription":
+        """Subscribes a callback to the samples published to a topic.
+
+        Args:
+            topic (str): The topic, the UID of a virtual instrument.
+            name (str): Name of the subscriber, used in log messages and metrics.
+            kind (str): Kind of the subscriber, which selects its queue size and overflow policy.
+            callback (callable): Called with each sample, on a delivery thread.
+
+        Returns:
+            DataBus.Subscription: The subscription.
+        """
+        with self._lock:
+            subscription = self.Subscription(
+                topic, name, kind, callback, *self._policy(kind)
+            )
+            self._subscriptions[topic] = (*self._subscriptions.get(topic, ()), subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: "DataBus.Subscription") -> None:
+        """Cancels a subscription.
+
+        Args:
+            subscription (DataBus.Subscription): The subscription.
+        """
+        with self._lock:
+            remaining = tuple(
+                s for s in self._subscriptions.get(subscription.topic, ()) if s is not subscription
+            )
+            if remaining:
+                self._subscriptions[subscription.topic] = remaining
+            else:
+                self._subscriptions.pop(subscription.topic, None)
+        subscription.cancel()
+
+    def remove_topic(self, topic: str) -> None:
+        """Cancels every subscription to a topic, for an instrument that is removed.
+
+        Args:
+            topic (str): The topic.
+        """
+        with self._lock:
+            subscriptions = self._subscriptions.pop(topic, ())
+        for subscription in subscriptions:
+            subscription.cancel()
+
+    def publish(self, topic: str, sample: Sample) -> None:
+        """Queues a sample for every subscriber of a topic.
+
+        Returns without waiting for delivery, unless a subscriber with the BLOCK policy is full.
+
+        Args:
+            topic (str): The topic, the UID of a virtual instrument.
+            sample (Sample): The sample.
+        """
+        published = monotonic()
+        for subscription in self._subscriptions.get(topic, ()):
+            if subscription.offer(published, sample):
+                self._ready.put(subscription)
+
+    def metrics(self) -> dict[str, dict]:
+        """Returns the delivery metrics of every subscription.
+
+        Returns:
+            dict[str, dict]: Metrics, by subscriber name. See `Subscription.metrics`.
+        """
+        with self._lock:
+            subscriptions = [s for topic in self._subscriptions.values() for s in topic]
+        return {subscription.name: subscription.metrics() for subscription in subscriptions}
+
+    def _delivery_loop(self) -> None:
+        """Drains subscriptions as they get samples; runs on each delivery thread."""
+        while True:
+            subscription = self._ready.get()
+            if subscription.drain(self.DRAIN_BATCH):
+                self._ready.put(subscription)
@@ -0,0 +1,403 @@
+import asyncio
+import inspect
+import logging
+from collections import deque
+from concurrent.futures import Future
+from threading import Thread, Condition
+from typing import Any, Union
+from epcomms.equipment.base.instrument import Instrument
+from . import CircuitBreaker, InstrumentHealth, InstrumentUnavailable
+
+logger = logging.getLogger(__name__)
+
+
+class InstrumentExecutor:
+    """Runs all I/O with one physical instrument on a single thread, fed by a request queue.
+
+    Every virtual instrument and batcher that talks to the physical instrument goes through its
+    executor, so serial/VISA transactions are never interleaved. Identical queries (same getter
+    function and arguments) that are waiting in the queue together are merged into a single
+    transaction, and its result is given to every waiter. Commands are never merged, except for
+    setpoints: a setpoint that is superseded by a newer one for the same setter before it is sent
+    is dropped (last writer wins), as long as no other command was queued in between.
+
+    Drivers whose methods are coroutine functions are awaited rather than called: on the event loop
+    of the async acquisition engine when one is attached, otherwise on a private event loop owned
+    by the I/O thread. Either way they remain serialized with every other request.
+
+    An optional circuit breaker tracks failing requests. While it is open, new requests fail at
+    once with `InstrumentUnavailable` instead of queueing behind I/O timeouts, and requests already
+    queued are failed when it opens.
+
+    Attributes:
+        uid (str): The UID of the physical instrument in the apparatus config.
+        instrument (Instrument): The physical instrument.
+        coalesced_requests (int): Number of queries served by another queued transaction.
+        superseded_setpoints (int): Number of setpoints replaced by a newer one before being sent.
+        circuit_breaker (Union[CircuitBreaker, None]): Tracks the health of the instrument, if
+        enabled.
+        _queue (deque): Requests waiting to be sent to the instrument.
+        _pending_queries (dict): Queued, not yet started queries, by coalescing key.
+        _last_command (Union[_Request, None]): The last command queued, while it is not started.
+        _condition (Condition): Guards the queue and wakes the I/O thread.
+        _running (bool): Whether the executor accepts requests.
+        _io_thread (Thread): The thread that talks to the instrument.
+        _event_loop (Union[asyncio.AbstractEventLoop, None]): Event loop that coroutine driver
+        methods are run on, if one is attached.
+        _private_event_loop (Union[asyncio.AbstractEventLoop, None]): The I/O thread's own event
+        loop for coroutine driver methods, created on first use.
+    """
+
+    class _Request:
+        """A single queued call on the physical instrument.
+
+        Attributes:
+            function_name (str): Name of the instrument method to call.
+            args (tuple): Positional arguments for the call.
+            kwargs (dict): Keyword arguments for the call.
+            coalescing_key (Union[tuple, None]): Key identifying identical queries, or None if the
+            request must not be merged.
+            setpoint_key (Union[tuple, None]): Key identifying the setter of a setpoint, or None if
+            the request is not a setpoint that may be superseded.
+            future (Future): Resolved with the result of the call.
+        """
+
+        def __init__(  # pylint: disable=too-many-arguments
+            self,
+            function_name: str,
+            args: tuple,
+            kwargs: dict,
+            coalescing_key,
+            setpoint_key=None,
+        ):
+            self.function_name = function_name
+            self.args = args
+            self.kwargs = kwargs
+            self.coalescing_key = coalescing_key
+            self.setpoint_key = setpoint_key
+            self.future = Future()
+
+    class BoundQuery:
+        """A getter call with fixed arguments, usable as a plain getter function.
+
+        Calling it blocks until the value is read; `submit()` returns a future instead, which lets
+        the async acquisition engine await the read without holding a thread.
+        """
+
+        def __init__(self, executor: "InstrumentExecutor", function_name: str, kwargs: dict):
+            self._executor = executor
+            self._function_name = function_name
+            self._kwargs = kwargs
+
+        def __call__(self) -> Any:
+            return self._executor.query(self._function_name, **self._kwargs)
+
+        def submit(self) -> Future:
+            """Queues the query. See `InstrumentExecutor.submit_query`."""
+            return self._executor.submit_query(self._function_name, **self._kwargs)
+
+    class BoundSetpoint:
+        """A setter call with fixed arguments, usable as a plain setter function.
+
+        Calling it with a value blocks until the value is written; `submit()` returns a future
+        instead.
+        """
+
+        def __init__(self, executor: "InstrumentExecutor", function_name: str, kwargs: dict):
+            self._executor = executor
+            self._function_name = function_name
+            self._kwargs = kwargs
+
+        def __call__(self, value: Any) -> Any:
+            return self.submit(value).result()
+
+        def submit(self, value: Any) -> Future:
+            """Queues the setpoint. See `InstrumentExecutor.submit_setpoint`."""
+            return self._executor.submit_setpoint(self._function_name, value, **self._kwargs)
+
+    def __init__(
+        self, uid: str, instrument: Instrument, circuit_breaker: CircuitBreaker = None
+    ):
+        """Initializes the InstrumentExecutor and starts its I/O thread.
+
+        Args:
+            uid (str): The UID of the physical instrument in the apparatus config.
+            instrument (Instrument): The physical instrument.
+            circuit_breaker (CircuitBreaker, optional): Tracks the health of the instrument.
+            Defaults to None, which always sends requests.
+        """
+        self.uid = uid
+        self.instrument = instrument
+        self.coalesced_requests = 0
+        self.superseded_setpoints = 0
+        self.circuit_breaker = circuit_breaker
+        self._queue: deque[InstrumentExecutor._Request] = deque()
+        self._pending_queries: dict[tuple, InstrumentExecutor._Request] = {}
+        self._last_command: Union[InstrumentExecutor._Request, None] = None
+        self._condition = Condition()
+        self._running = True
+        self._event_loop: Union[asyncio.AbstractEventLoop, None] = None
+        self._private_event_loop: Union[asyncio.AbstractEventLoop, None] = None
+        self._io_thread = Thread(
+            target=self._io_loop, name=f"{uid} I/O Thread", daemon=True
+        )
+        self._io_thread.start()
+
+    def submit_query(self, function_name: str, **kwargs) -> Future:
+        """Queues a getter call, merging it with an identical queued query if there is one.
+
+        Args:
+            function_name (str): Name of the getter function on the physical instrument.
+            **kwargs: Arguments for the getter function.
+
+        Returns:
+            Future: Resolved with the value returned by the instrument.
+        """
+        coalescing_key = self._coalescing_key(function_name, kwargs)
+        with self._condition:
+            if coalescing_key is not None:
+                pending = self._pending_queries.get(coalescing_key)
+                if pending is not None:
+                    self.coalesced_requests += 1
+                    return pending.future
+            if not self._allow_request():
+                return self._unavailable()
+            request = self._Request(function_name, (), kwargs, coalescing_key)
+            if coalescing_key is not None:
+                self._pending_queries[coalescing_key] = request
+            return self._enqueue(request)
+
+    def submit_command(self, function_name: str, *args, **kwargs) -> Future:
+        """Queues a setter (or any other state-changing) call.
+
+        Args:
+            function_name (str): Name of the function on the physical instrument.
+            *args: Positional arguments for the function.
+            **kwargs: Keyword arguments for the function.
+
+        Returns:
+            Future: Resolved with the value returned by the instrument.
+        """
+        with self._condition:
+            if not self._allow_request():
+                return self._unavailable()
+            request = self._Request(function_name, args, kwargs, None)
+            self._enqueue(request)
+            self._last_command = request
+            return request.future
+
+    def submit_setpoint(self, function_name: str, value: Any, **kwargs) -> Future:
+        """Queues a setter call that a later setpoint for the same setter may supersede.
+
+        If the last command in the queue is a setpoint for the same setter and arguments that has
+        not been sent yet, its value is replaced and its future is returned; the future then
+        resolves once the newest value is written. A setpoint is never merged across another
+        command, so the instrument sees state changes in the order they were requested.
+
+        Args:
+            function_name (str): Name of the setter function on the physical instrument.
+            value (Any): The value to set.
+            **kwargs: Other arguments for the setter function.
+
+        Returns:
+            Future: Resolved with the value returned by the instrument.
+        """
+        setpoint_key = self._coalescing_key(function_name, kwargs)
+        with self._condition:
+            last_command = self._last_command
+            if (
+                setpoint_key is not None
+                and last_command is not None
+                and last_command.setpoint_key == setpoint_key
+            ):
+                last_command.args = (value,)
+                self.superseded_setpoints += 1
+                return last_command.future
+            if not self._allow_request():
+                return self._unavailable()
+            request = self._Request(function_name, (value,), kwargs, None, setpoint_key)
+            self._enqueue(request)
+            self._last_command = request
+            return request.future
+
+    def query(self, function_name: str, **kwargs) -> Any:
+        """Calls a getter on the instrument and waits for the result. See `submit_query`."""
+        return self.submit_query(function_name, **kwargs).result()
+
+    def command(self, function_name: str, *args, **kwargs) -> Any:
+        """Calls a setter on the instrument and waits for it to complete. See `submit_command`."""
+        return self.submit_command(function_name, *args, **kwargs).result()
+
+    @property
+    def health(self) -> InstrumentHealth:
+        """The health of the instrument. Always HEALTHY without a circuit breaker."""
+        if self.circuit_breaker is None:
+            return InstrumentHealth.HEALTHY
+        return self.circuit_breaker.state
+
+    def bind_query(self, function_name: str, **kwargs) -> "InstrumentExecutor.BoundQuery":
+        """Binds a getter call to its arguments, for use as a virtual instrument getter.
+
+        Args:
+            function_name (str): Name of the getter function on the physical instrument.
+            **kwargs: Arguments for the getter function.
+
+        Returns:
+            InstrumentExecutor.BoundQuery: The bound query.
+        """
+        return self.BoundQuery(self, function_name, kwargs)
+
+    def bind_setpoint(self, function_name: str, **kwargs) -> "InstrumentExecutor.BoundSetpoint":
+        """Binds a setter call to its arguments, for use as a virtual instrument setter.
+
+        Args:
+            function_name (str): Name of the setter function on the physical instrument.
+            **kwargs: Arguments for the setter function, other than the value.
+
+        Returns:
+            InstrumentExecutor.BoundSetpoint: The bound setpoint.
+        """
+        return self.BoundSetpoint(self, function_name, kwargs)
+
+    def attach_event_loop(self, event_loop: Union[asyncio.AbstractEventLoop, None]) -> None:
+        """Sets the event loop that coroutine driver methods run on.
+
+        Args:
+            event_loop (Union[asyncio.AbstractEventLoop, None]): The event loop, or None to run
+            them on the I/O thread's own loop.
+        """
+        self._event_loop = event_loop
+
+    def close(self) -> None:
+        """Stops the I/O thread, fails any queued requests, and closes the instrument."""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._io_thread.is_alive():
+            self._io_thread.join()
+
+        with self._condition:
+            abandoned = list(self._queue)
+            self._queue.clear()
+            self._pending_queries.clear()
+            self._last_command = None
+        for request in abandoned:
+            request.future.set_exception(
+                RuntimeError(f"Physical instrument {self.uid} was closed")
+            )
+
+        close_result = self.instrument.close()
+        if inspect.isawaitable(close_result):
+            # The I/O thread has stopped, so its loop can be driven from here
+            if self._private_event_loop is None:
+                self._private_event_loop = asyncio.new_event_loop()
+            self._private_event_loop.run_until_complete(close_result)
+        if self._private_event_loop is not None:
+            self._private_event_loop.close()
+
+    def _enqueue(self, request: "_Request") -> Future:
+        """Appends a request to the queue. Must be called with the condition held."""
+        if not self._running:
+            raise RuntimeError(f"Physical instrument {self.uid} is closed")
+        self._queue.append(request)
+        self._condition.notify()
+        return request.future
+
+    def _io_loop(self) -> None:
+        """Sends queued requests to the instrument, one at a time."""
+        while True:
+            with self._condition:
+                while self._running and not self._queue:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                request = self._queue.popleft()
+                if request is self._last_command:
+                    # Started setpoints can no longer be superseded
+                    self._last_command = None
+                if request.coalescing_key is not None:
+                    # Later identical queries want a fresh reading, not this one
+                    self._pending_queries.pop(request.coalescing_key, None)
+
+            if not request.future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = getattr(self.instrument, request.function_name)(
+                    *request.args, **request.kwargs
+                )
+                if inspect.isawaitable(result):
+                    result = self._await(result)
+            except Exception as e:  # pylint: disable=broad-except # handed to the waiters
+                request.future.set_exception(e)
+                self._record_failure(e)
+            else:
+                request.future.set_result(result)
+                if self.circuit_breaker is not None:
+                    self.circuit_breaker.record_success()
+
+    def _allow_request(self) -> bool:
+        """Asks the circuit breaker whether a new request may be queued."""
+        return self.circuit_breaker is None or self.circuit_breaker.allow_request()
+
+    def _unavailable(self) -> Future:
+        """Returns a future that has already failed with InstrumentUnavailable."""
+        future = Future()
+        future.set_exception(
+            InstrumentUnavailable(f"Physical instrument {self.uid} is unavailable (circuit open)")
+        )
+        return future
+
+    def _record_failure(self, error: Exception) -> None:
+        """Reports a failed request to the circuit breaker, failing the queue if it opens."""
+        if self.circuit_breaker is None:
+            return
+        self.circuit_breaker.record_failure(error)
+        if self.circuit_breaker.state != InstrumentHealth.OPEN:
+            return
+        with self._condition:
+            abandoned = list(self._queue)
+            self._queue.clear()
+            self._pending_queries.clear()
+            self._last_command = None
+        for request in abandoned:
+            if request.future.set_running_or_notify_cancel():
+                request.future.set_exception(
+                    InstrumentUnavailable(
+                        f"Physical instrument {self.uid} is unavailable (circuit open)"
+                    )
+                )
+
+    def _await(self, awaitable) -> Any:
+        """Runs a coroutine returned by the driver to completion. Called on the I/O thread."""
+        event_loop = self._event_loop
+        if event_loop is not None and event_loop.is_running():
+            return asyncio.run_coroutine_threadsafe(
+                self._as_coroutine(awaitable), event_loop
+            ).result()
+        if self._private_event_loop is None:
+            self._private_event_loop = asyncio.new_event_loop()
+        return self._private_event_loop.run_until_complete(awaitable)
+
+    @staticmethod
+    async def _as_coroutine(awaitable) -> Any:
+        """Wraps any awaitable in a coroutine, as required by `run_coroutine_threadsafe`."""
+        return await awaitable
+
+    @classmethod
+    def _coalescing_key(cls, function_name: str, kwargs: dict) -> Union[tuple, None]:
+        """Builds a hashable key identifying a query, or None if its arguments are unhashable."""
+        try:
+            key = (function_name, cls.freeze(kwargs))
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    @classmethod
+    def freeze(cls, value):
+        """Converts lists and dicts (e.g. channel lists) into hashable tuples."""
+        if isinstance(value, dict):
+            return tuple(sorted((key, cls.freeze(item)) for key, item in value.items()))
+        if isinstance(value, (list, tuple)):
+            return tuple(cls.freeze(item) for item in value)
+        return value
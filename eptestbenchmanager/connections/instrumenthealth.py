@@ -0,0 +1,15 @@
+from enum import Enum
+
+
+class InstrumentHealth(Enum):
+    """
+    Enum for the health of a physical instrument, as tracked by its circuit breaker.
+
+    HEALTHY instruments answer normally. DEGRADED instruments have failed recently but are still
+    tried on every request. OPEN instruments have failed repeatedly; requests fail immediately
+    instead of waiting on I/O timeouts, except for an occasional probe.
+    """
+
+    HEALTHY = "healthy"
+    DEGRADED = "degraded"
+    OPEN = "open"
@@ -0,0 +1,2 @@
+class InstrumentUnavailable(Exception):
+    """Raised instead of talking to a physical instrument whose circuit breaker is open."""
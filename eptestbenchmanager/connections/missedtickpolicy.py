@@ -0,0 +1,15 @@
+from enum import Enum
+
+
+class MissedTickPolicy(Enum):
+    """
+    Enum for what a poll scheduler does when a poll overruns one or more polling deadlines.
+
+    SKIP drops the missed deadlines and waits for the next one in the future. CATCH_UP polls once
+    immediately in place of all missed deadlines, then returns to the schedule. BURST polls once
+    for every missed deadline, back-to-back, until the schedule is caught up.
+    """
+
+    SKIP = "skip"
+    CATCH_UP = "catch_up"
+    BURST = "burst"
@@ -0,0 +1,15 @@
+from enum import Enum
+
+
+class OverflowPolicy(Enum):
+    """
+    Enum for what the data bus does when a sample is published to a subscriber whose queue is full.
+
+    DROP_OLDEST discards the oldest queued sample to make room. COALESCE replaces the newest
+    queued sample, so the subscriber only sees the latest value. BLOCK makes the publisher wait
+    until the subscriber has caught up, so no sample is lost.
+    """
+
+    DROP_OLDEST = "drop_oldest"
+    COALESCE = "coalesce"
+    BLOCK = "block"
@@ -1,9 +1,16 @@
+import asyncio
 import logging
+from concurrent.futures import Future
+from time import monotonic
 from typing import Union
-from threading import Thread, Event
-from time import monotonic, sleep
-from epcomms.equipment.base.instrument import Instrument
-from . import VirtualInstrument
+from . import (
+    VirtualInstrument,
+    InstrumentExecutor,
+    MissedTickPolicy,
+    PollStatistics,
+    AdaptivePollingController,
+    InstrumentUnavailable,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -11,14 +18,21 @@ logger = logging.getLogger(__name__)
 class PollingVirtualInstrument(VirtualInstrument):
     """A virtual instrument that polls a physical instrument at regular intervals.
 
+    Polls are driven by the connection manager's `PollScheduler`, which calls `poll()` once per
+    polling interval.
+
     Attributes:
-        _physical_instrument (Instrument): The physical instrument being polled.
+        _physical_instrument (InstrumentExecutor): I/O executor of the physical instrument being
+        polled.
         _setter_function (Union[callable, None]): Function to command the physical instrument with a
         value.
         _getter_function (Union[callable, None]): Function to get the physical instrument value.
         _polling_interval (int): Interval between polls in milliseconds.
-        _polling_thread (Thread): Thread that runs the polling loop.
-        _stop_event (Event): Event to signal the polling thread to stop.
+        missed_tick_policy (MissedTickPolicy): How the scheduler handles polls that overrun.
+        poll_statistics (PollStatistics): Lateness and jitter of the polls, recorded by the
+        scheduler.
+        adaptive_polling (Union[AdaptivePollingController, None]): Adjusts the polling interval to
+        the signal, if adaptive polling is enabled.
     """
 
     def __init__(  # pylint: disable=too-many-arguments #(This is built by a factory)
@@ -26,11 +40,13 @@ class PollingVirtualInstrument(VirtualInstrument):
         testbench_manager,
         uid: str,
         name: str,
-        physical_instrument: Instrument,
+        physical_instrument: InstrumentExecutor,
         setter_function: Union[callable, None],  # We assume this is threadsafe
         getter_function: Union[callable, None],  # We assume this is threadsafe
         polling_interval: int,  # in milliseconds
         unit: str = None,
+        missed_tick_policy: MissedTickPolicy = MissedTickPolicy.CATCH_UP,
+        adaptive_polling: AdaptivePollingController = None,
     ):
         """Initializes the PollingVirtualInstrument.
 
@@ -38,21 +54,24 @@ class PollingVirtualInstrument(VirtualInstrument):
             testbench_manager: Global TestbenchManager object.
             uid (str): Unique identifier for the instrument.
             name (str): Name of the instrument.
-            physical_instrument (Instrument): The physical instrument being polled.
+            physical_instrument (InstrumentExecutor): I/O executor of the physical instrument.
             setter_function (Union[callable, None]): Function to set the instrument value.
             getter_function (Union[callable, None]): Function to get the instrument value.
             polling_interval (int): Interval between polls in milliseconds.
             unit (str, optional): Unit of the instrument value. Defaults to None.
+            missed_tick_policy (MissedTickPolicy, optional): How the scheduler handles polls that
+            overrun. Defaults to MissedTickPolicy.CATCH_UP.
+            adaptive_polling (AdaptivePollingController, optional): Adjusts the polling interval
+            between its bounds as the signal changes. Defaults to None, for a fixed interval.
         """
+        self.missed_tick_policy = missed_tick_policy
+        self.poll_statistics = PollStatistics()
+        self.adaptive_polling = adaptive_polling
         super().__init__(testbench_manager, uid, name, unit)
         self._physical_instrument = physical_instrument
         self._setter_function = setter_function
         self._getter_function = getter_function
         self._polling_interval = polling_interval
-        self._polling_thread = Thread(
-            target=self._polling_loop, name=f"{self.name} Polling Thread", daemon=True
-        )
-        self._stop_event = Event()
 
     def command(self, command: Union[str, int, float, bool]) -> None:
         """Command the instrument with a value.
@@ -65,41 +84,65 @@ class PollingVirtualInstrument(VirtualInstrument):
         else:
             super().command(command)
 
-    def start_poll(self) -> None:
-        """Starts the polling thread."""
-        self._stop_event.clear()
+    def command_async(self, command: Union[str, int, float, bool]) -> Future:
+        """Command the instrument with a value without waiting for it to be written.
+
+        Args:
+            command (Union[str, int, float, bool]): The value to command.
+
+        Returns:
+            Future: Resolved once the value is written.
+        """
+        submit = getattr(self._setter_function, "submit", None)
+        if submit is None:
+            return super().command_async(command)
+        return submit(command)
+
+    @property
+    def polling_interval(self) -> int:
+        """The interval between polls, in milliseconds."""
+        if self.adaptive_polling is not None:
+            return self.adaptive_polling.interval
+        return self._polling_interval
+
+    @property
+    def poll_key(self) -> Union[InstrumentExecutor, None]:
+        """The physical instrument polled, used to keep polls of one instrument sequential."""
+        return self._physical_instrument
+
+    def poll(self) -> None:
+        """Polls the physical instrument once and updates the value."""
         try:
-            self._polling_thread.start()
-        except RuntimeError:
-            logger.error(f"Instrument {self.name} polling thread already started.")
-
-    def halt_poll(self) -> None:
-        """Stops the polling thread."""
-        self._stop_event.set()
-
-    def join_poll(self) -> None:
-        """Joins the polling thread."""
-        if self._polling_thread.is_alive():
-            self._polling_thread.join()
-
-    def _polling_loop(self) -> None:
-        """The main polling loop that runs in a separate thread."""
-        while True:
-            next_poll_time = monotonic() + self._polling_interval / 1000
-            if self._stop_event.is_set():
-                return  # Exit the thread
-            try:
-                value = self._getter_function()
-                self._set_value(value)
-            except Exception as e:
-                logger.error("Instrument %s encountered exception: %s", self.name, e)
-            sleep_time = next_poll_time - monotonic()
-            if sleep_time > 0:
-                sleep(sleep_time)
+            value = self._getter_function()
+            self._set_value(value)
+            self._adapt_polling_interval(value)
+        except InstrumentUnavailable:
+            self._mark_stale()  # The circuit breaker reports the outage
+        except Exception as e:
+            logger.error("Instrument %s encountered exception: %s", self.name, e)
+
+    async def poll_async(self) -> None:
+        """Polls the physical instrument once from the async acquisition engine.
+
+        Reads queued on an instrument executor are awaited directly; any other getter runs on the
+        event loop's default executor.
+        """
+        try:
+            submit = getattr(self._getter_function, "submit", None)
+            if submit is not None:
+                value = await asyncio.wrap_future(submit())
             else:
-                # We missed the polling interval
-                logger.error(
-                    "Instrument %s missed a polling interval by %f seconds.",
-                    self.name,
-                    -sleep_time,
+                value = await asyncio.get_running_loop().run_in_executor(
+                    None, self._getter_function
                 )
+            self._set_value(value)
+            self._adapt_polling_interval(value)
+        except InstrumentUnavailable:
+            self._mark_stale()  # The circuit breaker reports the outage
+        except Exception as e:
+            logger.error("Instrument %s encountered exception: %s", self.name, e)
+
+    def _adapt_polling_interval(self, value) -> None:
+        """Feeds a numeric reading to the adaptive polling controller, if there is one."""
+        if self.adaptive_polling is not None and isinstance(value, (int, float)):
+            self.adaptive_polling.record(monotonic(), value)
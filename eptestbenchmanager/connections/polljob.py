@@ -0,0 +1,72 @@
+from . import MissedTickPolicy, PollStatistics
+
+
+class PollJob:
+    """Deadline bookkeeping for a single polled object, shared by the acquisition engines.
+
+    Deadlines are anchored to absolute times: the k-th poll is due at anchor + k * interval,
+    so an overrun never shifts the phase of later polls.
+
+    Attributes:
+        pollable: The polled object.
+        key: The key used to serialize polls for the same physical instrument.
+        policy (MissedTickPolicy): What to do with deadlines missed by an overrunning poll.
+        statistics (PollStatistics): Where poll timing is recorded.
+        anchor (float): Time of tick 0, in `time.monotonic()` seconds.
+        tick (int): Index of the next scheduled tick.
+        interval_s (float): The polling interval the anchor was set for, in seconds.
+        deadline (float): The deadline of the next scheduled tick.
+    """
+
+    def __init__(self, pollable):
+        self.pollable = pollable
+        poll_key = pollable.poll_key
+        # Objects without a physical instrument (e.g. noise) serialize only with themselves
+        self.key = poll_key if poll_key is not None else self
+        self.policy: MissedTickPolicy = pollable.missed_tick_policy
+        self.statistics: PollStatistics = pollable.poll_statistics
+        self.anchor = None
+        self.tick = 0
+        self.interval_s = pollable.polling_interval / 1000
+        self.deadline = None
+
+    def start(self, now: float) -> float:
+        """Anchors the schedule at the given time and returns the first deadline."""
+        self.anchor = now
+        self.tick = 0
+        return now
+
+    def next_deadline(self, now: float) -> float:
+        """Advances to the next tick, applying the missed tick policy if it is overdue.
+
+        Args:
+            now (float): The current time, in `time.monotonic()` seconds.
+
+        Returns:
+            float: The deadline of the next poll.
+        """
+        interval_s = self.pollable.polling_interval / 1000
+        if interval_s != self.interval_s:
+            # Re-anchor on the tick that just ran, so the new interval starts from it
+            self.anchor = self.deadline
+            self.tick = 0
+            self.interval_s = interval_s
+            self.statistics.reset_period()
+
+        self.tick += 1
+        deadline = self.anchor + self.tick * self.interval_s
+        if deadline <= now and self.interval_s > 0:
+            overdue = int((now - self.anchor) // self.interval_s) - self.tick + 1
+            match self.policy:
+                case MissedTickPolicy.SKIP:
+                    self.tick += overdue
+                    missed = overdue
+                case MissedTickPolicy.CATCH_UP:
+                    self.tick += overdue - 1
+                    missed = overdue - 1
+                case _:  # MissedTickPolicy.BURST runs every overdue tick
+                    missed = 0
+            if missed > 0:
+                self.statistics.record_missed_ticks(missed)
+            deadline = self.anchor + self.tick * self.interval_s
+        return deadline
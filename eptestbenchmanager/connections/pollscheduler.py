@@ -0,0 +1,204 @@
+import heapq
+import itertools
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from threading import Thread, Condition
+from time import monotonic
+from typing import Union, TYPE_CHECKING
+from . import PollJob
+
+if TYPE_CHECKING:
+    from eptestbenchmanager.connections import CompositePropagationEngine
+
+logger = logging.getLogger(__name__)
+
+
+class PollScheduler:
+    """Runs the polls of every polled object from a single deadline-ordered scheduling thread.
+
+    A polled object (a polling virtual instrument or a batcher) exposes a `poll()` method that
+    performs one acquisition, a `polling_interval` in milliseconds, a `poll_key` identifying the
+    physical instrument it talks to, a `missed_tick_policy` and a `poll_statistics` object that the
+    scheduler records timing into. The scheduling thread keeps the objects in a heap ordered by
+    their next absolute deadline and hands due polls to a bounded worker pool. Polls that share a
+    `poll_key` are never run concurrently; a poll that comes due while its instrument is busy is
+    deferred until the running poll completes.
+
+    Composite virtual instruments are recomputed by a composite propagation engine on its own
+    thread, which the scheduler starts and stops with the polls.
+
+    Attributes:
+        _max_workers (Union[int, None]): Size of the worker pool, or None to size it from the
+        number of distinct poll keys.
+        _heap (list): Heap of (deadline, sequence number, job) tuples.
+        _sequence (itertools.count): Tie-breaker for jobs with equal deadlines.
+        _jobs (list[PollJob]): All jobs known to the scheduler.
+        _propagation (Union[CompositePropagationEngine, None]): Recomputes the composites.
+        _busy_keys (set): Poll keys that currently have a poll running.
+        _deferred (dict): Jobs that came due while their poll key was busy, by poll key.
+        _condition (Condition): Guards the scheduler state and wakes the scheduling thread.
+        _executor (ThreadPoolExecutor): The worker pool running the polls.
+        _scheduling_thread (Thread): Thread that dispatches due polls.
+        _running (bool): Whether the scheduler is running.
+    """
+
+    def __init__(self, max_workers: int = None):
+        """Initializes the PollScheduler.
+
+        Args:
+            max_workers (int, optional): Size of the worker pool. Defaults to None, which sizes the
+            pool from the number of distinct poll keys when the scheduler starts.
+        """
+        self._max_workers = max_workers
+        self._heap = []
+        self._sequence = itertools.count()
+        self._jobs: list[PollJob] = []
+        self._propagation: Union["CompositePropagationEngine", None] = None
+        self._busy_keys = set()
+        self._deferred: dict[object, deque] = {}
+        self._condition = Condition()
+        self._executor: ThreadPoolExecutor = None
+        self._scheduling_thread: Thread = None
+        self._running = False
+
+    def add(self, pollable) -> None:
+        """Adds a polled object to the scheduler. Its first poll is due immediately.
+
+        Args:
+            pollable: An object exposing `poll()`, `polling_interval` and `poll_key`.
+        """
+        job = PollJob(pollable)
+        with self._condition:
+            self._jobs.append(job)
+            if self._running:
+                self._push(job, job.start(monotonic()))
+
+    def set_composite_propagation(self, propagation: "CompositePropagationEngine") -> None:
+        """Sets the engine that recomputes the composites; it runs with the scheduler.
+
+        Args:
+            propagation (CompositePropagationEngine): The composite propagation engine.
+        """
+        with self._condition:
+            self._propagation = propagation
+            running = self._running
+        if running:
+            propagation.start()
+
+    def start(self) -> None:
+        """Starts the scheduling thread, the worker pool and the composite propagation."""
+        with self._condition:
+            if self._running:
+                logger.error("Poll scheduler already started.")
+                return
+            max_workers = self._max_workers
+            if max_workers is None:
+                max_workers = max(1, min(8, len({job.key for job in self._jobs})))
+            self._executor = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="Polling Worker"
+            )
+            self._running = True
+            now = monotonic()
+            for job in self._jobs:
+                self._push(job, job.start(now))
+            self._scheduling_thread = Thread(
+                target=self._scheduling_loop, name="Poll Scheduler Thread", daemon=True
+            )
+            self._scheduling_thread.start()
+            propagation = self._propagation
+        if propagation is not None:
+            propagation.start()
+        logger.info(
+            "Poll scheduler started with %d polled objects and %d workers",
+            len(self._jobs),
+            max_workers,
+        )
+
+    def halt(self) -> None:
+        """Signals the scheduler to stop. Polls already running are allowed to finish."""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+            propagation = self._propagation
+        if propagation is not None:
+            propagation.halt()
+
+    def join(self) -> None:
+        """Waits for the scheduler and any running polls and updates to stop, then forgets all."""
+        if self._scheduling_thread is not None and self._scheduling_thread.is_alive():
+            self._scheduling_thread.join()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+        if self._propagation is not None:
+            self._propagation.join()
+        with self._condition:
+            self._heap = []
+            self._jobs = []
+            self._propagation = None
+            self._busy_keys = set()
+            self._deferred = {}
+            self._executor = None
+            self._scheduling_thread = None
+
+    def _push(self, job: PollJob, deadline: float) -> None:
+        """Schedules a job for the given deadline. Must be called with the condition held."""
+        job.deadline = deadline
+        heapq.heappush(self._heap, (deadline, next(self._sequence), job))
+        self._condition.notify()
+
+    def _scheduling_loop(self) -> None:
+        """Waits for the earliest deadline and dispatches due jobs."""
+        with self._condition:
+            while self._running:
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+                deadline, _, job = self._heap[0]
+                delay = deadline - monotonic()
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+                heapq.heappop(self._heap)
+                self._dispatch(job)
+
+    def _dispatch(self, job: PollJob) -> None:
+        """Submits a job to the pool, or defers it if its key is busy. Condition must be held."""
+        if job.key in self._busy_keys:
+            self._deferred.setdefault(job.key, deque()).append(job)
+            return
+        self._busy_keys.add(job.key)
+        self._executor.submit(self._run_job, job)
+
+    def _run_job(self, job: PollJob) -> None:
+        """Runs a single poll on a worker thread and reschedules the job."""
+        start_time = monotonic()
+        job.statistics.record_poll(job.deadline, start_time, job.interval_s)
+        try:
+            job.pollable.poll()
+        except Exception as e:  # pylint: disable=broad-except # a poll must never kill a worker
+            logger.error("Unhandled exception polling %s: %s", job.pollable, e)
+        end_time = monotonic()
+
+        with self._condition:
+            self._busy_keys.discard(job.key)
+            if not self._running:
+                return
+            deferred = self._deferred.get(job.key)
+            if deferred:
+                self._dispatch(deferred.popleft())
+            if job in self._jobs:
+                self._push(job, job.next_deadline(end_time))
+
+    def poll_statistics(self) -> dict[str, dict]:
+        """Returns a snapshot of the poll statistics of every scheduled object.
+
+        Returns:
+            dict[str, dict]: Statistics snapshots, by polled object name.
+        """
+        with self._condition:
+            jobs = list(self._jobs)
+        return {
+            getattr(job.pollable, "name", str(job.pollable)): job.statistics.snapshot()
+            for job in jobs
+        }
@@ -0,0 +1,105 @@
+from threading import Lock
+from bisect import bisect_left
+
+
+class PollStatistics:
+    """Timing statistics for the polls of one polled object.
+
+    Lateness is how long after its deadline a poll actually started. Jitter is how far the time
+    between the starts of two consecutive polls deviated from the polling interval. Both are kept
+    as histograms with fixed millisecond bins, so recording a poll is O(1) and the memory used does
+    not grow with run time.
+
+    Attributes:
+        BIN_EDGES_MS (tuple): Upper edges of the histogram bins, in milliseconds. The last bin
+        collects everything above the last edge.
+        polls (int): Number of polls run.
+        missed_ticks (int): Number of deadlines that were skipped or merged into another poll.
+        _lateness_histogram (list[int]): Poll counts per lateness bin.
+        _jitter_histogram (list[int]): Poll counts per jitter bin.
+        _total_lateness_s (float): Sum of all lateness values, in seconds.
+        _max_lateness_s (float): Largest lateness seen, in seconds.
+        _max_jitter_s (float): Largest jitter seen, in seconds.
+        _last_start_time (Union[float, None]): Start time of the previous poll.
+        _lock (Lock): Keeps snapshots consistent with concurrent updates.
+    """
+
+    BIN_EDGES_MS = (0.1, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+
+    def __init__(self):
+        """Initializes empty PollStatistics."""
+        self.polls = 0
+        self.missed_ticks = 0
+        self._lateness_histogram = [0] * (len(self.BIN_EDGES_MS) + 1)
+        self._jitter_histogram = [0] * (len(self.BIN_EDGES_MS) + 1)
+        self._total_lateness_s = 0.0
+        self._max_lateness_s = 0.0
+        self._max_jitter_s = 0.0
+        self._last_start_time = None
+        self._lock = Lock()
+
+    def record_poll(self, deadline: float, start_time: float, interval_s: float) -> None:
+        """Records the start of a poll.
+
+        Args:
+            deadline (float): The deadline the poll was scheduled for, in monotonic seconds.
+            start_time (float): When the poll actually started, in monotonic seconds.
+            interval_s (float): The polling interval in force, in seconds.
+        """
+        lateness = max(0.0, start_time - deadline)
+        with self._lock:
+            self.polls += 1
+            self._total_lateness_s += lateness
+            self._max_lateness_s = max(self._max_lateness_s, lateness)
+            self._lateness_histogram[self._bin(lateness)] += 1
+            if self._last_start_time is not None:
+                jitter = abs((start_time - self._last_start_time) - interval_s)
+                self._max_jitter_s = max(self._max_jitter_s, jitter)
+                self._jitter_histogram[self._bin(jitter)] += 1
+            self._last_start_time = start_time
+
+    def record_missed_ticks(self, count: int) -> None:
+        """Records deadlines that were skipped or merged into another poll.
+
+        Args:
+            count (int): The number of missed deadlines.
+        """
+        with self._lock:
+            self.missed_ticks += count
+
+    def reset_period(self) -> None:
+        """Forgets the previous start time, e.g. after the polling interval changes."""
+        with self._lock:
+            self._last_start_time = None
+
+    def snapshot(self) -> dict:
+        """Returns a consistent copy of the statistics.
+
+        Returns:
+            dict: The statistics, with times in milliseconds. Histograms are lists of
+            [bin label, count] pairs.
+        """
+        with self._lock:
+            labels = [f"≤ {edge:g} ms" for edge in self.BIN_EDGES_MS] + [
+                f"> {self.BIN_EDGES_MS[-1]:g} ms"
+            ]
+            return {
+                "polls": self.polls,
+                "missed_ticks": self.missed_ticks,
+                "mean_lateness_ms": (
+                    1000 * self._total_lateness_s / self.polls if self.polls else 0.0
+                ),
+                "max_lateness_ms": 1000 * self._max_lateness_s,
+                "max_jitter_ms": 1000 * self._max_jitter_s,
+                "lateness_histogram": [
+                    list(pair) for pair in zip(labels, self._lateness_histogram)
+                ],
+                "jitter_histogram": [
+                    list(pair) for pair in zip(labels, self._jitter_histogram)
+                ],
+            }
+
+    @classmethod
+    def _bin(cls, seconds: float) -> int:
+        """Returns the histogram bin index for a duration in seconds."""
+        return bisect_left(cls.BIN_EDGES_MS, seconds * 1000)
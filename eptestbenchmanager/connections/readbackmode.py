@@ -0,0 +1,15 @@
+from enum import Enum
+
+
+class ReadbackMode(Enum):
+    """
+    Enum for how a command-driven virtual instrument reads its value back after a command.
+
+    SYNC waits for the read-back before the command completes. ASYNC completes the command once
+    the value is written and updates the value when the queued read-back returns. NONE skips the
+    read-back and takes the commanded value as the new value.
+    """
+
+    SYNC = "sync"
+    ASYNC = "async"
+    NONE = "none"
@@ -0,0 +1,22 @@
+from typing import NamedTuple, Union
+from . import SampleQuality
+
+
+class Sample(NamedTuple):
+    """An immutable snapshot of the value of a virtual instrument.
+
+    A new sample replaces the previous one as a whole, so a sample read from an instrument is
+    always consistent without taking a lock.
+
+    Attributes:
+        value (Union[str, int, float, bool, None]): The value.
+        timestamp (Union[float, None]): When the value was acquired, in `time.time()` seconds, or
+        None if there is no value yet.
+        sequence (int): Number of values the instrument has had; 0 before the first one.
+        quality (SampleQuality): How far the value can be trusted.
+    """
+
+    value: Union[str, int, float, bool, None]
+    timestamp: Union[float, None]
+    sequence: int
+    quality: SampleQuality
@@ -0,0 +1,15 @@
+from enum import Enum
+
+
+class SampleQuality(Enum):
+    """
+    Enum for how far the value of a virtual instrument sample can be trusted.
+
+    GOOD is a value read or computed normally. STALE is the last good value of an instrument that
+    is currently not responding. BAD means there is no usable value, such as before the first
+    reading or when a composite could not be computed.
+    """
+
+    GOOD = "good"
+    STALE = "stale"
+    BAD = "bad"
@@ -1,14 +1,17 @@
 import logging
+import time
+from concurrent.futures import Future
 from typing import Union, TYPE_CHECKING
-from threading import Lock
+from threading import Condition, Lock
 from abc import ABC, abstractmethod
-from eptestbenchmanager.recording import Recording
+from eptestbenchmanager.recording import Recording, RecordingView
+from . import SampleQuality, Sample
 
 from eptestbenchmanager.dashboard.elements import DigitalGauge
 from eptestbenchmanager.dashboard.pages import InstrumentDetail
 
 if TYPE_CHECKING:
-    from eptestbenchmanager.connections import CompositeVirtualInstrument
+    from eptestbenchmanager.connections import CompositeVirtualInstrument, DataBus
 
 logger = logging.getLogger(__name__)
 
@@ -20,15 +23,29 @@ class VirtualInstrument(ABC):
         uid (str): Unique identifier for the virtual instrument.
         name (str): Name of the virtual instrument.
         rolling_storage_size (int): The number of values to store in the rolling storage.
+        RECORDING_FLUSH_TIMEOUT (float): The longest time to wait for the queued samples of a
+        recording to be written when it is stopped, in seconds.
+        _data_bus (DataBus): Delivers the samples of the instrument to its rolling storage,
+        recordings and gauge.
         _physical_instrument (Instrument): The physical instrument associated with this virtual
         instrument.
         _setter_function (Union[callable, None]): A function to set the value of the instrument,
         assumed to be threadsafe.
-        _value (Union[str, int, float, bool, None]): The current value of the instrument.
-        _lock (Lock): A threading lock to ensure thread safety when accessing or modifying the
-        value.
+        _sample (Sample): The current value of the instrument, with its timestamp, sequence number
+        and quality. Replaced as a whole on every update, so it can be read without a lock.
+        _update_condition (Condition): Serializes updates and wakes the threads waiting for one.
+        _recording_subscriptions (dict[str, DataBus.Subscription]): The data bus subscription of
+        each recording, by record ID.
+        _views (dict[str, RecordingView]): The records that are views of store recordings, by
+        record ID.
+        _dependant_composites (tuple[CompositeVirtualInstrument, ...]): The composites built from
+        the instrument, marked for recomputation directly on every update. The tuple is replaced
+        rather than modified, so updates need no lock.
+        _dependants_lock (Lock): Guards changes to the dependant composites.
     """
 
+    RECORDING_FLUSH_TIMEOUT = 10.0
+
     def __init__(  # pylint: disable=too-many-arguments #(This is built by a factory)
         self,
         testbench_manager,
@@ -54,10 +71,12 @@ class VirtualInstrument(ABC):
         self.name = name
         self.unit = unit
 
-        self._value: Union[str, int, float, bool, None] = None
-        self._lock = Lock()
+        self._sample = Sample(None, None, 0, SampleQuality.BAD)
+        self._update_condition = Condition()
 
-        self._dependant_composites: list["CompositeVirtualInstrument"] = []
+        self._data_bus: "DataBus" = testbench_manager.data_bus
+        self._dependant_composites: tuple["CompositeVirtualInstrument", ...] = ()
+        self._dependants_lock = Lock()
 
         self._rolling_storage = Recording(
             self.testbench_manager,
@@ -69,6 +88,8 @@ class VirtualInstrument(ABC):
         )
         self._rolling_storage.start_recording()
         self._recordings: dict[str, Recording] = {}
+        self._recording_subscriptions: dict[str, "DataBus.Subscription"] = {}
+        self._views: dict[str, RecordingView] = {}
 
         # Attach the UI elements
         if not hasattr(self, "gauge"):
@@ -79,21 +100,63 @@ class VirtualInstrument(ABC):
             InstrumentDetail, (self, self.testbench_manager)
         )
 
+        self._data_bus.subscribe(
+            self.uid,
+            f"{self.uid} rolling storage",
+            "rolling",
+            lambda sample: self._rolling_storage.add_sample(sample.value, sample.timestamp),
+        )
+        self._data_bus.subscribe(self.uid, f"{self.uid} gauge", "gauge", self._update_gauge)
+
+    def initialize(self) -> None:
+        """
+        Perform the initial I/O of the virtual instrument, such as reading its starting value.
+
+        Called once after construction, on a loader thread, while other instruments are still
+        being loaded. Does nothing by default.
+        """
+
     @property
     def value(self) -> Union[str, int, float, bool]:
         """
         Retrieve the current value of the virtual instrument.
 
-        This method acquires a lock to ensure thread safety, retrieves the value stored in the
-        `_value` attribute, and then releases the lock.
-
         Returns:
             Union[str, int, float, bool]: The current value of the virtual instrument.
         """
-        self._lock.acquire()
-        value = self._value
-        self._lock.release()
-        return value
+        return self._sample.value
+
+    @property
+    def sample(self) -> Sample:
+        """
+        Retrieve the current value of the virtual instrument with its acquisition time, sequence
+        number and quality.
+
+        Returns:
+            Sample: The current sample of the virtual instrument.
+        """
+        return self._sample
+
+    def wait_for_update(
+        self, after_sequence: int, timeout: Union[float, None] = None
+    ) -> Union[Sample, None]:
+        """
+        Wait until the virtual instrument has a newer value than a given one.
+
+        Args:
+            after_sequence (int): Sequence number of the last sample seen.
+            timeout (Union[float, None], optional): The longest time to wait, in seconds. Defaults
+            to None, to wait indefinitely.
+
+        Returns:
+            Union[Sample, None]: The current sample, or None if no newer one arrived in time.
+        """
+        with self._update_condition:
+            if self._update_condition.wait_for(
+                lambda: self._sample.sequence > after_sequence, timeout
+            ):
+                return self._sample
+            return None
 
     @property
     def rolling_storage(self) -> Recording:
@@ -105,39 +168,67 @@ class VirtualInstrument(ABC):
         """
         return self._rolling_storage
 
-    def _set_value(self, value: Union[str, int, float, bool]) -> None:
+    def _set_value(
+        self,
+        value: Union[str, int, float, bool, None],
+        quality: SampleQuality = SampleQuality.GOOD,
+    ) -> None:
         """
         Set the value of the virtual instrument.
 
-        This method acquires a lock to ensure thread safety, sets the value stored in the `_value`
-        attribute, and then releases the lock. It also updates dependant composites,
-        rolling storage, active recordings, and the UI gauge component.
+        The value is stamped with the current time and the next sequence number and swapped in as
+        a new sample, waking the threads in `wait_for_update`. Dependant composites are marked for
+        recomputation right away, so a propagation pass in progress recomputes them later in the
+        same pass. The sample is then published on the data bus, which updates rolling storage,
+        active recordings, and the UI gauge component on its own threads.
 
         Args:
-            value (Union[str, int, float, bool]): The value to set.
+            value (Union[str, int, float, bool, None]): The value to set.
+            quality (SampleQuality, optional): How far the value can be trusted. Defaults to GOOD.
         """
-        self._lock.acquire()
+        with self._update_condition:
+            sample = Sample(value, time.time(), self._sample.sequence + 1, quality)
+            self._sample = sample
+            self._update_condition.notify_all()
 
-        self._value = value
+        for composite in self._dependant_composites:
+            composite.request_update()
+        self._data_bus.publish(self.uid, sample)
 
-        self._lock.release()
+    def _mark_stale(self) -> None:
+        """
+        Mark the current value as STALE, when the instrument is not responding.
 
-        # Update any dependant composite virtual instruments
-        for composite in self._dependant_composites:
-            composite.update_semaphore.release()
+        This is not a new value: the sequence number is kept and nothing is published.
+        """
+        with self._update_condition:
+            if self._sample.quality == SampleQuality.GOOD:
+                self._sample = self._sample._replace(quality=SampleQuality.STALE)
 
-        # Update the rolling storage (which should always be active)
-        self._rolling_storage.add_sample(value)
+    def _update_gauge(self, sample: Sample) -> None:
+        """
+        Show a sample on the UI gauge component. Called by the data bus.
 
-        # Update any active recordings
-        for recording in self._recordings.values():
-            if recording.active:
-                recording.add_sample(value)
+        Args:
+            sample (Sample): The sample.
+        """
         try:
-            self.gauge.set_value(value)
+            self.gauge.set_value(sample.value)
         except RuntimeError as e:
             # expected until the dashboard is up and running
-            logger.error("Error updating gauge for %s: %s", self.name, e)  # expected until the dashboard is up and running
+            logger.error("Error updating gauge for %s: %s", self.name, e)
+
+    @staticmethod
+    def _record(recording: Recording, sample: Sample) -> None:
+        """
+        Add a sample to a recording if it is active. Called by the data bus.
+
+        Args:
+            recording (Recording): The recording.
+            sample (Sample): The sample.
+        """
+        if recording.active:
+            recording.add_sample(sample.value, sample.timestamp)
 
     def begin_recording(
         self,
@@ -147,6 +238,7 @@ class VirtualInstrument(ABC):
         max_samples=None,
         stored_samples=250,
         max_time=None,
+        record_format=None,
     ) -> None:
         """
         Begin a new named recording.
@@ -159,9 +251,13 @@ class VirtualInstrument(ABC):
             Defaults to None.
             stored_samples (optional): The number of samples to store. Defaults to 250.
             max_time (optional): The maximum time for the recording. Defaults to None.
+            record_format (optional): The file format of the recording. Defaults to None, for the
+            format configured for the apparatus.
         """
         logger.info("Beginning recording %s", record_id)
-        self._recordings[record_id] = Recording(
+        if record_id in self._recording_subscriptions:
+            self._data_bus.unsubscribe(self._recording_subscriptions.pop(record_id))
+        recording = Recording(
             self.testbench_manager,
             record_id,
             record_name,
@@ -170,8 +266,16 @@ class VirtualInstrument(ABC):
             stored_samples,
             max_time,
             file_id=file_id,
+            record_format=record_format,
+        )
+        recording.start_recording()
+        self._recordings[record_id] = recording
+        self._recording_subscriptions[record_id] = self._data_bus.subscribe(
+            self.uid,
+            f"{self.uid} recording {record_id}",
+            "recording",
+            lambda sample: self._record(recording, sample),
         )
-        self._recordings[record_id].start_recording()
         self.detail_page.update_graphs()
 
     def recording_exists(self, record_id) -> bool:
@@ -199,14 +303,154 @@ class VirtualInstrument(ABC):
 
     def stop_recording(self, record_id) -> None:
         """
-        Stop a recording.
+        Stop a recording, once the samples published before it stopped are written.
 
         Args:
             record_id: The ID of the recording to stop.
         """
         logger.info("Stopping recording %s", record_id)
+        if not self._recording_subscriptions[record_id].flush(self.RECORDING_FLUSH_TIMEOUT):
+            logger.warning(
+                "Recording %s of %s stopped with samples still queued", record_id, self.name
+            )
         self._recordings[record_id].stop_recording()
 
+    def begin_view(
+        self,
+        store_id,
+        record_id,
+        record_name,
+        store_file_id,
+        record_format=None,
+    ) -> RecordingView:
+        """
+        Begin or resume a named record that is a view of a shared store recording, which is
+        started (or resumed) if it is not recording. Each instrument is thus recorded once, into
+        its store, however many records of it overlap.
+
+        Args:
+            store_id: The record ID of the store, e.g. the run ID.
+            record_id: The ID of the record.
+            record_name: The name of the record, used when it is created.
+            store_file_id: The file ID for the store, used when it is created.
+            record_format (optional): The file format of the store, used when it is created.
+            Defaults to None, for the format configured for the apparatus.
+
+        Returns:
+            RecordingView: The view.
+        """
+        if not self.recording_exists(store_id):
+            self.begin_recording(store_id, "Run", store_file_id, record_format=record_format)
+        elif not self._recordings[store_id].active:
+            self.resume_recording(store_id)
+        store = self._recordings[store_id]
+
+        view = self._views.get(record_id)
+        if view is None or view.store is not store:
+            logger.info("Beginning view %s of recording %s", record_id, store_id)
+            view = RecordingView(store, record_id, record_name or record_id)
+            self._views[record_id] = view
+        view.start()
+        return view
+
+    def stop_view(self, record_id) -> RecordingView:
+        """
+        Stop a record that is a view of a store recording, once the samples published before it
+        stopped are in the store. The store keeps recording, so the next record of the run only
+        starts another view of it; it is stopped by `stop_store` at the end of the run.
+
+        Args:
+            record_id: The ID of the record.
+
+        Returns:
+            RecordingView: The view.
+        """
+        view = self._views[record_id]
+        store_id = view.store.record_id
+        if not self._recording_subscriptions[store_id].flush(self.RECORDING_FLUSH_TIMEOUT):
+            logger.warning(
+                "View %s of %s stopped with samples still queued", record_id, self.name
+            )
+        view.stop()
+        return view
+
+    def stop_store(self, store_id) -> list[RecordingView]:
+        """
+        Stop a store recording and close its file, at the end of its run, stopping any of its
+        views still active (e.g. when a segment failed before stopping its records).
+
+        Args:
+            store_id: The record ID of the store.
+
+        Returns:
+            list[RecordingView]: The views that were still active.
+        """
+        if not self.recording_exists(store_id):
+            return []
+        store = self._recordings[store_id]
+        active_views = [
+            view for view in self._views.values() if view.store is store and view.active
+        ]
+        for view in active_views:
+            self.stop_view(view.record_id)
+        self.stop_recording(store_id)
+        return active_views
+
+    @property
+    def views(self) -> dict[str, RecordingView]:
+        """
+        Retrieve the records of the virtual instrument that are views of store recordings.
+
+        Returns:
+            dict[str, RecordingView]: The views, by record ID.
+        """
+        return self._views
+
+    def read_range(
+        self, start_time: float, end_time: float, max_points=None, record_id=None
+    ) -> tuple[list, list]:
+        """
+        Read the recorded samples of the virtual instrument within a time range. See
+        `Recording.read_range`.
+
+        Args:
+            start_time: The start of the range, in seconds since the epoch.
+            end_time: The end of the range, included, in seconds since the epoch.
+            max_points (optional): The most points wanted. Defaults to None, for every sample.
+            record_id (optional): The ID of the recording, or of a view of one, to read.
+            Defaults to None, for the rolling storage if it holds the whole range, or else the
+            latest recording whose samples overlap the range, or else the rolling storage.
+
+        Returns:
+            tuple[list, list]: The times and the samples.
+
+        Raises:
+            KeyError: If there is no recording or view with the record ID.
+        """
+        if record_id in self._views:
+            # Only the samples the record took, not the rest of its store
+            return self._views[record_id].read_range(start_time, end_time, max_points)
+        if record_id is not None:
+            return self._recordings[record_id].read_range(start_time, end_time, max_points)
+
+        rolling_first_time = self._rolling_storage.first_time
+        if rolling_first_time is not None and rolling_first_time <= start_time:
+            return self._rolling_storage.read_range(start_time, end_time, max_points)
+        # Stopped recordings are kept, so only those with samples in the range are candidates
+        overlapping = [
+            recording
+            for recording in self._recordings.values()
+            if recording.first_time is not None
+            and recording.first_time <= end_time
+            and recording.last_time >= start_time
+        ]
+        recording = (
+            max(overlapping, key=lambda recording: recording.first_time)
+            if overlapping
+            else self._rolling_storage
+        )
+        return recording.read_range(start_time, end_time, max_points)
+
     def register_dependant_composite(
         self, composite: "CompositeVirtualInstrument"
     ) -> None:
@@ -216,7 +460,40 @@ class VirtualInstrument(ABC):
         Args:
             composite (CompositeVirtualInstrument): The composite virtual instrument to register.
         """
-        self._dependant_composites.append(composite)
+        with self._dependants_lock:
+            if composite not in self._dependant_composites:
+                self._dependant_composites = (*self._dependant_composites, composite)
+
+    def unregister_dependant_composite(
+        self, composite: "CompositeVirtualInstrument"
+    ) -> None:
+        """
+        Stop updating a composite virtual instrument from this virtual instrument.
+
+        Args:
+            composite (CompositeVirtualInstrument): The composite virtual instrument to unregister.
+        """
+        with self._dependants_lock:
+            self._dependant_composites = tuple(
+                dependant for dependant in self._dependant_composites if dependant is not composite
+            )
+
+    def close(self) -> None:
+        """
+        Stop delivering the samples of the virtual instrument, when it is removed or replaced.
+
+        Its recordings are stopped first, once their queued samples are written, so their record
+        files are closed rather than left open with nothing feeding them.
+        """
+        for record_id in list(self._recording_subscriptions):
+            try:
+                self.stop_recording(record_id)
+            except Exception as e:  # pylint: disable=broad-except # keep closing the others
+                logger.error("Error stopping recording %s of %s: %s", record_id, self.name, e)
+        self._data_bus.remove_topic(self.uid)
+        with self._dependants_lock:
+            self._dependant_composites = ()
+        self._recording_subscriptions.clear()
 
     @abstractmethod
     def command(self, command: Union[str, int, float, bool]) -> None:
@@ -235,6 +512,26 @@ class VirtualInstrument(ABC):
             f"{self.name} (type: {self.__class__.__name__}, uid: {self.uid}) does not accept commands"  # pylint: disable=line-too-long
         )
 
+    def command_async(self, command: Union[str, int, float, bool]) -> Future:
+        """
+        Sends a command to the virtual instrument without waiting for it, where supported.
+
+        This lets callers send commands to several instruments at once. By default the command is
+        sent synchronously and the returned future is already resolved.
+
+        Args:
+            command (Union[str, int, float, bool]): The command to be sent to the instrument.
+
+        Returns:
+            Future: Resolved once the command has completed, or failed with its error.
+        """
+        future = Future()
+        try:
+            future.set_result(self.command(command))
+        except Exception as e:  # pylint: disable=broad-except # handed to the caller
+            future.set_exception(e)
+        return future
+
     @property
     def recordings(self) -> dict[str, Recording]:
         """
@@ -1,17 +1,27 @@
+import logging
+from typing import Union
 import numpy as np
-from epcomms.equipment.base.instrument import Instrument
 from . import (
+    InstrumentExecutor,
+    MissedTickPolicy,
+    ReadbackMode,
+    AdaptivePollingController,
     VirtualInstrument,
     PollingVirtualInstrument,
     NoiseVirtualInstrument,
     CompositeVirtualInstrument,
+    CompositePropagationEngine,
+    CompositeExpression,
     ManualVirtualInstrument,
     CommandDrivenVirtualInstrument,
     NullVirtualInstrument,
     BatchedPollingVirtualInstrument,
     Batcher,
+    BatchingScheme,
 )
 
+logger = logging.getLogger(__name__)
+
 
 class VirtualInstrumentFactory:
     """Factory class for creating virtual instruments."""
@@ -20,7 +30,7 @@ class VirtualInstrumentFactory:
     def create_instrument(
         cls,
         testbench_manager,
-        physical_instruments: list[Instrument],
+        physical_instruments: dict[str, InstrumentExecutor],
         batchers: list[Batcher],
         virtual_instruments: list[VirtualInstrument],
         uid: str,
@@ -30,7 +40,8 @@ class VirtualInstrumentFactory:
 
         Args:
             testbench_manager: Global TestbenchManager object.
-            physical_instruments (list[Instrument]): List of physical instruments.
+            physical_instruments (dict[str, InstrumentExecutor]): I/O executors of the physical
+            instruments, by UID.
             virtual_instruments (list[VirtualInstrument]): List of virtual instruments.
             uid (str): Unique identifier for the virtual instrument.
             config (dict): Configuration dictionary for the virtual instrument.
@@ -69,7 +80,7 @@ class VirtualInstrumentFactory:
     def _create_polling_instrument(
         cls,
         testbench_manager,
-        physical_instruments: list[Instrument],
+        physical_instruments: dict[str, InstrumentExecutor],
         uid: str,
         config: dict,
     ) -> PollingVirtualInstrument:
@@ -77,7 +88,8 @@ class VirtualInstrumentFactory:
 
         Args:
             testbench_manager: Global TestbenchManager object.
-            physical_instruments (list[Instrument]): List of physical instruments.
+            physical_instruments (dict[str, InstrumentExecutor]): I/O executors of the physical
+            instruments, by UID.
             uid (str): Unique identifier for the virtual instrument.
             config (dict): Configuration dictionary for the virtual instrument.
 
@@ -85,30 +97,13 @@ class VirtualInstrumentFactory:
             PollingVirtualInstrument: A polling virtual instrument object.
         """
         physical_instrument = physical_instruments[config["physical_instrument"]]
-
-        setter_arguments = config.get("setter_arguments", {})
-        setter_function = (
-            (
-                lambda value: getattr(physical_instrument, config["setter_function"])(
-                    value, **setter_arguments
-                )
+        setter_function = cls._create_setter_function(physical_instrument, config)
+        getter_function = cls._create_getter_function(physical_instrument, config)
+        adaptive_polling = None
+        if "adaptive_polling" in config:
+            adaptive_polling = AdaptivePollingController.from_config(
+                config["polling_interval"], config["adaptive_polling"]
             )
-            if config["setter_function"] != "None"
-            else None
-        )
-
-        getter_arguments = config.get("getter_arguments", {})
-        getter_function = (
-            (
-                lambda: (
-                    getattr(physical_instrument, config["getter_function"])(
-                        **getter_arguments
-                    )
-                )
-            )
-            if config["getter_function"] != "None"
-            else None
-        )
 
         return PollingVirtualInstrument(
             testbench_manager,
@@ -119,31 +114,54 @@ class VirtualInstrumentFactory:
             getter_function=getter_function,
             polling_interval=config["polling_interval"],
             unit=config.get("unit", None),
+            missed_tick_policy=MissedTickPolicy(config.get("missed_tick_policy", "catch_up")),
+            adaptive_polling=adaptive_polling,
         )
     
     @classmethod
-    def create_batched_polling_instrument(cls, testbench_manager, physical_instruments, batchers, uid: str, config: dict) -> BatchedPollingVirtualInstrument:
-        batcher_uid = f"{config['physical_instrument']}_{config['batching_scheme']}_{config['getter_function']}_{'_'.join(f"{key}-{value}" for key, value in config['getter_arguments'].items())}_{config["polling_interval"]}"
-        if batcher_uid not in batchers:
-            # We need to create the batcher
-            physical_instrument = physical_instruments[config["physical_instrument"]]
-            getter_arguments = config.get("setter_arguments", {})
-            getter_function = config["getter_function"]
-            batcher = Batcher(physical_instrument, getter_function, getter_arguments, config["batching_scheme"], config["polling_interval"])
-            batchers[batcher_uid] = batcher
+    def create_batched_polling_instrument(
+        cls,
+        testbench_manager,
+        physical_instruments: dict[str, InstrumentExecutor],
+        batchers: dict[tuple, Batcher],
+        uid: str,
+        config: dict,
+    ) -> BatchedPollingVirtualInstrument:
+        """Creates a batched polling virtual instrument, and its batcher if it is the first.
 
-        # Create the virtual instrument
-        setter_arguments = config.get("setter_arguments", {})
-        setter_function = (
-            (
-                lambda value: getattr(physical_instrument, config["setter_function"])(
-                    value, **setter_arguments
-                )
+        Instruments that share a physical instrument, batching scheme, getter, getter arguments
+        and polling interval are read by the same batcher.
+
+        Args:
+            testbench_manager: Global TestbenchManager object.
+            physical_instruments (dict[str, InstrumentExecutor]): I/O executors of the physical
+            instruments, by UID.
+            batchers (dict[tuple, Batcher]): The batchers created so far, by batcher key.
+            uid (str): Unique identifier for the virtual instrument.
+            config (dict): Configuration dictionary for the virtual instrument.
+
+        Returns:
+            BatchedPollingVirtualInstrument: A batched polling virtual instrument object.
+        """
+        getter_arguments = config.get("getter_arguments", {})
+        batcher_key = cls.batcher_key(config)
+        physical_instrument = physical_instruments[config["physical_instrument"]]
+        if batcher_key not in batchers:
+            batchers[batcher_key] = Batcher(
+                physical_instrument,
+                config["getter_function"],
+                getter_arguments,
+                config["batching_scheme"],
+                config["polling_interval"],
+                name=(
+                    f"{config['physical_instrument']} {config['getter_function']} batcher "
+                    f"({config['polling_interval']} ms)"
+                ),
+                missed_tick_policy=MissedTickPolicy(config.get("missed_tick_policy", "catch_up")),
             )
-            if config["setter_function"] != "None"
-            else None
-        )
 
+        # Create the virtual instrument
+        setter_function = cls._create_setter_function(physical_instrument, config)
 
         instrument = BatchedPollingVirtualInstrument(
             testbench_manager,
@@ -151,13 +169,198 @@ class VirtualInstrumentFactory:
             config["name"],
             setter_function,
             config.get("unit", None),
-            )
-        
-        batchers[batcher_uid].add_polling_instrument(instrument, config["batching_argument_value"])
+        )
+
+        batchers[batcher_key].add_polling_instrument(instrument, config["batching_argument_value"])
 
-        
         return instrument
 
+    @staticmethod
+    def batcher_key(config: dict) -> tuple:
+        """Returns the key of the batcher that reads a batchable polling instrument.
+
+        Args:
+            config (dict): Configuration dictionary of a batchable polling virtual instrument.
+
+        Returns:
+            tuple: The batcher key, equal for all instruments read by the same batcher.
+        """
+        return (
+            config["physical_instrument"],
+            config["batching_scheme"],
+            config["getter_function"],
+            InstrumentExecutor.freeze(config.get("getter_arguments", {})),
+            config["polling_interval"],
+        )
+
+    @staticmethod
+    def get_dependencies(config: dict) -> list[str]:
+        """Returns the UIDs of the virtual instruments a virtual instrument is built from.
+
+        Args:
+            config (dict): Configuration dictionary for the virtual instrument.
+
+        Returns:
+            list[str]: The UIDs of the virtual instruments it depends on.
+        """
+        if config["type"] == "composite":
+            return list(config["instruments"])
+        return []
+
+    @staticmethod
+    def compile_composites(
+        virtual_instruments: dict[str, VirtualInstrument], tick_interval: int = 0
+    ) -> CompositePropagationEngine:
+        """Compiles the composite virtual instruments into a dependency graph and its engine.
+
+        Args:
+            virtual_instruments (dict[str, VirtualInstrument]): All virtual instruments, by UID.
+            tick_interval (int, optional): Delay before each propagation pass, in milliseconds.
+            Defaults to 0.
+
+        Returns:
+            CompositePropagationEngine: The engine that recomputes the composites in dependency
+            order.
+
+        Raises:
+            ValueError: If the composites depend on each other in a cycle.
+        """
+        composites = [
+            instrument
+            for instrument in virtual_instruments.values()
+            if isinstance(instrument, CompositeVirtualInstrument)
+        ]
+        propagation = CompositePropagationEngine(composites, tick_interval)
+        logger.info(
+            "Composite graph: %s",
+            " -> ".join(composite.uid for composite in propagation.order) or "no composites",
+        )
+        return propagation
+
+    @classmethod
+    def plan_batches(
+        cls,
+        physical_instrument_configs: dict[str, dict],
+        physical_instrument_classes: dict[str, type],
+        virtual_instrument_configs: dict[str, dict],
+    ) -> dict[str, dict]:
+        """Merges plain polling instruments into batched reads where the driver supports it.
+
+        Polling instruments are grouped by physical instrument, getter, getter arguments (other
+        than the batching argument) and polling interval. A group of two or more is turned into
+        batchable polling instruments if a batching scheme is declared for its getter, either in
+        the physical instrument config or by the driver class:
+
+            batching_schemes:
+              measure_voltage: SCPI_chanlist
+              measure_channel: {scheme: custom_USBTC08, getter_function: measure_all_channels}
+
+        Instruments with adaptive polling keep their own schedule and are never merged. Only the
+        driver classes are needed, so batches can be planned before the instruments are connected.
+
+        Args:
+            physical_instrument_configs (dict[str, dict]): Physical instrument configs, by UID.
+            physical_instrument_classes (dict[str, type]): Driver classes of the physical
+            instruments, by UID.
+            virtual_instrument_configs (dict[str, dict]): Virtual instrument configs, by UID.
+
+        Returns:
+            dict[str, dict]: The virtual instrument configs, with merged instruments rewritten as
+            batchable polling instruments.
+        """
+        groups: dict[tuple, list[str]] = {}
+        schemes: dict[tuple, dict] = {}
+        for uid, config in virtual_instrument_configs.items():
+            if config["type"] != "polling" or "adaptive_polling" in config:
+                continue
+            physical_uid = config["physical_instrument"]
+            scheme = cls._get_batching_scheme(
+                physical_instrument_configs.get(physical_uid) or {},
+                physical_instrument_classes.get(physical_uid),
+                config["getter_function"],
+            )
+            if scheme is None:
+                continue
+            if not BatchingScheme.is_registered(scheme["scheme"]):
+                logger.error("Unknown batching scheme %s declared for %s", scheme["scheme"], uid)
+                continue
+            batching_argument = BatchingScheme.get(scheme["scheme"]).batching_argument
+            getter_arguments = dict(config.get("getter_arguments", {}))
+            if batching_argument not in getter_arguments:
+                continue
+            getter_arguments.pop(batching_argument)
+            key = (
+                physical_uid,
+                config["getter_function"],
+                InstrumentExecutor.freeze(getter_arguments),
+                config["polling_interval"],
+            )
+            groups.setdefault(key, []).append(uid)
+            schemes[key] = scheme
+
+        planned_configs = dict(virtual_instrument_configs)
+        transactions_before = sum(
+            1000 / config["polling_interval"]
+            for config in virtual_instrument_configs.values()
+            if config["type"] == "polling" and config.get("polling_interval")
+        )
+        transactions_saved = 0.0
+        for key, uids in groups.items():
+            if len(uids) < 2:
+                continue
+            physical_uid, getter_function, _, polling_interval = key
+            scheme = schemes[key]
+            batching_argument = BatchingScheme.get(scheme["scheme"]).batching_argument
+            for uid in uids:
+                config = virtual_instrument_configs[uid]
+                getter_arguments = dict(config.get("getter_arguments", {}))
+                batching_argument_value = getter_arguments.pop(batching_argument)
+                planned_configs[uid] = config | {
+                    "type": "batchable_polling",
+                    "batching_scheme": scheme["scheme"],
+                    "getter_function": scheme.get("getter_function", getter_function),
+                    "getter_arguments": getter_arguments,
+                    "batching_argument_value": batching_argument_value,
+                }
+            transactions_saved += (len(uids) - 1) * 1000 / polling_interval
+            logger.info(
+                "Batch plan: %d instruments on %s.%s every %d ms merged with %s (%s)",
+                len(uids),
+                physical_uid,
+                getter_function,
+                polling_interval,
+                scheme["scheme"],
+                ", ".join(uids),
+            )
+
+        logger.info(
+            "Batch plan: %.2f polling bus transactions/s before, %.2f after (%.2f saved)",
+            transactions_before,
+            transactions_before - transactions_saved,
+            transactions_saved,
+        )
+        return planned_configs
+
+    @staticmethod
+    def _get_batching_scheme(
+        physical_instrument_config: dict,
+        physical_instrument_class: Union[type, None],
+        getter_function: str,
+    ) -> Union[dict, None]:
+        """Looks up the batching scheme declared for a getter, by the config or the driver.
+
+        Returns:
+            Union[dict, None]: The scheme as {"scheme": name} plus an optional batched
+            "getter_function", or None if the getter cannot be batched.
+        """
+        declared_schemes = physical_instrument_config.get("batching_schemes", None)
+        if declared_schemes is None and physical_instrument_class is not None:
+            declared_schemes = getattr(physical_instrument_class, "batching_schemes", None)
+        scheme = (declared_schemes or {}).get(getter_function, None)
+        if isinstance(scheme, str):
+            return {"scheme": scheme}
+        return scheme
+
     @classmethod
     def create_null_instrument(
         cls, testbench_manager, uid: str, config: dict
@@ -230,36 +433,13 @@ class VirtualInstrumentFactory:
     def create_command_driven_instrument(
         cls,
         testbench_manager,
-        physical_instruments: list[Instrument],
+        physical_instruments: dict[str, InstrumentExecutor],
         uid: str,
         config: dict,
     ) -> CommandDrivenVirtualInstrument:
-        # TODO: This is too similar to the polling instrument creation. Refactor to reduce redundancy.
         physical_instrument = physical_instruments[config["physical_instrument"]]
-
-        setter_arguments = config.get("setter_arguments", {})
-        setter_function = (
-            (
-                lambda value: getattr(physical_instrument, config["setter_function"])(
-                    value, **setter_arguments
-                )
-            )
-            if config["setter_function"] != "None"
-            else None
-        )
-
-        getter_arguments = config.get("getter_arguments", {})
-        getter_function = (
-            (
-                lambda: (
-                    getattr(physical_instrument, config["getter_function"])(
-                        **getter_arguments
-                    )
-                )
-            )
-            if config["getter_function"] != "None"
-            else None
-        )
+        setter_function = cls._create_setter_function(physical_instrument, config)
+        getter_function = cls._create_getter_function(physical_instrument, config)
 
         instrument = CommandDrivenVirtualInstrument(
             testbench_manager,
@@ -269,23 +449,73 @@ class VirtualInstrumentFactory:
             setter_function=setter_function,
             getter_function=getter_function,
             unit=config.get("unit", None),
+            readback=ReadbackMode(config.get("readback", "sync")),
         )
 
         return instrument
 
+    @classmethod
+    def _create_setter_function(
+        cls, physical_instrument: InstrumentExecutor, config: dict
+    ) -> Union[callable, None]:
+        """Creates the function that commands the physical instrument with a value.
+
+        Commands go through the instrument's I/O executor as setpoints, so a value superseded by a
+        newer one before it is sent is never written.
+
+        Args:
+            physical_instrument (InstrumentExecutor): I/O executor of the physical instrument.
+            config (dict): Configuration dictionary for the virtual instrument.
+
+        Returns:
+            Union[callable, None]: The setter function, or None if the instrument has no setter.
+        """
+        if config["setter_function"] == "None":
+            return None
+        setter_arguments = config.get("setter_arguments", {})
+        return physical_instrument.bind_setpoint(
+            config["setter_function"], **setter_arguments
+        )
+
+    @classmethod
+    def _create_getter_function(
+        cls, physical_instrument: InstrumentExecutor, config: dict
+    ) -> Union[callable, None]:
+        """Creates the function that reads a value from the physical instrument.
+
+        Reads go through the instrument's I/O executor as queries, so identical reads queued
+        together by different virtual instruments are merged into one transaction.
+
+        Args:
+            physical_instrument (InstrumentExecutor): I/O executor of the physical instrument.
+            config (dict): Configuration dictionary for the virtual instrument.
+
+        Returns:
+            Union[callable, None]: The getter function, or None if the instrument has no getter.
+        """
+        if config["getter_function"] == "None":
+            return None
+        getter_arguments = config.get("getter_arguments", {})
+        return physical_instrument.bind_query(
+            config["getter_function"], **getter_arguments
+        )
+
     @classmethod
     def _create_composite_instrument(
         cls,
         testbench_manager,
-        virtual_instruments: list[Instrument],
+        virtual_instruments: list[VirtualInstrument],
         uid: str,
         config: dict,
     ) -> CompositeVirtualInstrument:
         """Creates a composite virtual instrument from a configuration dictionary.
 
+        The composite is defined either by a named `composition_function` or by an `expression`
+        over its instruments, which is compiled here, once.
+
         Args:
             testbench_manager: Global TestbenchManager object.
-            virtual_instruments (list[Instrument]): List of virtual instruments.
+            virtual_instruments (list[VirtualInstrument]): List of virtual instruments.
             uid (str): Unique identifier for the virtual instrument.
             config (dict): Configuration dictionary for the virtual instrument.
 
@@ -293,7 +523,7 @@ class VirtualInstrumentFactory:
             CompositeVirtualInstrument: A composite virtual instrument object.
 
         Raises:
-            ValueError: If a parent instrument UID is invalid.
+            ValueError: If a parent instrument UID or the expression is invalid.
         """
         try:
             instruments = [
@@ -304,9 +534,14 @@ class VirtualInstrumentFactory:
                 f"Invalid instrument UID ({e}). Ensure all parent instruments are defined before composite instruments."  # pylint: disable=line-too-long
             ) from e
 
-        composition_function = cls._get_composition_function(
-            config["composition_function"], len(instruments)
-        )
+        expression = None
+        composition_function = None
+        if "expression" in config:
+            expression = CompositeExpression.compile(config["expression"], config["instruments"])
+        else:
+            composition_function = cls._get_composition_function(
+                config["composition_function"], len(instruments)
+            )
 
         return CompositeVirtualInstrument(
             testbench_manager,
@@ -315,6 +550,7 @@ class VirtualInstrumentFactory:
             composition_function=composition_function,
             instruments=instruments,
             unit=config.get("unit", None),
+            expression=expression,
         )
 
     @classmethod
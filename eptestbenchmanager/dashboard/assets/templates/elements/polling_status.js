@@ -0,0 +1,22 @@
+var {{ data.uid }}_socket = io('{{ data.namespace }}');
+{{ data.uid }}_socket.on('update', function(data) {
+    var element = document.getElementById('{{ data.uid }}');
+    element.getElementsByClassName('ps_interval_label')[0].innerText =
+        data.adaptive ? 'Adaptive polling interval (ms)' : 'Polling interval (ms)';
+    ['polling_interval', 'polls', 'missed_ticks', 'mean_lateness_ms', 'max_lateness_ms', 'max_jitter_ms'].forEach(function(key) {
+        var value = data[key];
+        element.getElementsByClassName('ps_' + key)[0].innerText =
+            (typeof value === 'number' && !Number.isInteger(value)) ? value.toFixed(2) : value;
+    });
+    var histogram = element.getElementsByClassName('ps_histogram')[0];
+    histogram.innerHTML = '';
+    data.lateness_histogram.forEach(function(bin, i) {
+        var row = histogram.insertRow();
+        row.insertCell().innerText = bin[0];
+        row.insertCell().innerText = bin[1];
+        row.insertCell().innerText = data.jitter_histogram[i][1];
+    });
+});
+setInterval(function() {
+    {{ data.uid }}_socket.emit('request_update');
+}, 2000);
@@ -101,6 +101,26 @@ function updateRollingLabels(data) {
     return data.h_axis_data.map((timestamp) => formatRelativeTimeDynamic(timestamp));
 }
 
+// Ask for the graph history at the resolution of the graph (a min and max point per pixel)
+{{ data.uid }}_socket.on('connect', function() {
+    {{ data.uid }}_socket.emit('request_update', { width: {{ data.uid }}_element.clientWidth });
+});
+
+// When zoomed, ask for the samples of the range shown at full resolution; when reset, for the
+// whole history again. The graph is drawn empty first, so it takes event handlers.
+Plotly.newPlot({{ data.uid }}_element, {{ data.uid }}_data, {{ data.uid }}_layout);
+{{ data.uid }}_element.on('plotly_relayout', function(event) {
+    if (event['xaxis.range[0]'] !== undefined && event['xaxis.range[1]'] !== undefined) {
+        {{ data.uid }}_socket.emit('request_update', {
+            width: {{ data.uid }}_element.clientWidth,
+            start: event['xaxis.range[0]'],
+            end: event['xaxis.range[1]'],
+        });
+    } else if (event['xaxis.autorange']) {
+        {{ data.uid }}_socket.emit('request_update', { width: {{ data.uid }}_element.clientWidth });
+    }
+});
+
 // Socket event: Update graph with new data
 {{ data.uid }}_socket.on('update', function(data) {
     if ('{{ data.rolling }}' === 'True') {
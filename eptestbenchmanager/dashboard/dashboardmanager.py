@@ -2,12 +2,19 @@ import os
 import logging
 from pathlib import Path
 from typing import TYPE_CHECKING
-from flask import Flask, send_from_directory
+from flask import Flask, Response, abort, send_from_directory
+from werkzeug.utils import safe_join
 from flask_socketio import SocketIO
 from engineio.payload import Payload
 
 from .pages import MainPage, ConfigEditor
 from .elements import ExperimentControl
+from eptestbenchmanager.recording import (
+    BinaryRecordingFile,
+    RunLog,
+    CompressionCodec,
+    FrameCompressor,
+)
 
 if TYPE_CHECKING:
     from eptestbenchmanager.manager import TestbenchManager
@@ -97,6 +104,48 @@ class DashboardManager:
             except Exception as e:
                 logger.error("Error downloading archive: %s", e)
 
+        @self.app.route("/recording/<path:recording>")
+        def download_recording(recording):
+            """Handles downloading of recordings as CSV, converting binary recordings and channels
+            of run logs (`<run>/run.eplog/<channel>`) and decompressing compressed recordings."""
+            log_dir = os.path.join(
+                Path(os.path.abspath(__package__)).parent, "eptestbenchmanager", "logs"
+            )
+            logger.info("Downloading recording %s", recording)
+            recording_path = safe_join(log_dir, recording)
+            if recording_path is None:
+                abort(404)
+            run_log_path, _, channel = recording_path.partition(f"{RunLog.FILE_NAME}/")
+            if channel:
+                run_log_path = os.path.join(run_log_path, RunLog.FILE_NAME)
+                if not os.path.isfile(run_log_path):
+                    abort(404)
+                return Response(
+                    RunLog.iter_csv(run_log_path, channel),
+                    mimetype="text/csv",
+                    headers={"Content-Disposition": f'attachment; filename="{channel}.csv"'},
+                )
+            if recording_path.endswith(BinaryRecordingFile.EXTENSION):
+                if not os.path.isdir(recording_path):
+                    abort(404)
+                csv_name = Path(recording_path).stem + ".csv"
+                return Response(
+                    BinaryRecordingFile.iter_csv(recording_path),
+                    mimetype="text/csv",
+                    headers={"Content-Disposition": f'attachment; filename="{csv_name}"'},
+                )
+            codec = FrameCompressor.codec_of(recording_path)
+            if codec != CompressionCodec.NONE and os.path.isfile(recording_path):
+                csv_name = os.path.basename(recording_path).removesuffix(
+                    FrameCompressor.EXTENSIONS[codec]
+                )
+                return Response(
+                    FrameCompressor.iter_decompressed(recording_path),
+                    mimetype="text/csv",
+                    headers={"Content-Disposition": f'attachment; filename="{csv_name}"'},
+                )
+            return send_from_directory(log_dir, recording, as_attachment=True)
+
         # set up the experiment control elements
         # This must be done in the configure method so that the experiment runner is able to load
         # experiments before the experiment control element is created, but the dashboard manager
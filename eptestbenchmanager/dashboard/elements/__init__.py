@@ -7,3 +7,4 @@ from .settabledigitalgauge import SettableDigitalGauge
 from .apparatuscontrol import ApparatusControl
 from .reload import Reload
 from .editor import Editor
+from .pollingstatus import PollingStatus
@@ -45,7 +45,13 @@ class ApparatusControl(DashboardElement):
         """
         value = render_template(
             "elements/apparatus_control.html",
-            data={"uid": self.uid, "apparatuses": self.apparatuses, "current_apparatus_config":self.connection_manager.current_apparatus_config}
+            data={
+                "uid": self.uid,
+                "apparatuses": self.apparatuses,
+                "current_apparatus_config": self.connection_manager.current_apparatus_config,
+                "load_duration": self.connection_manager.load_duration,
+                "load_timings": self.connection_manager.load_timings,
+            },
         )
         return value
 
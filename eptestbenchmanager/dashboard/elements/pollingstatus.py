@@ -0,0 +1,94 @@
+import logging
+from typing import TYPE_CHECKING
+from flask import render_template
+from flask_socketio import emit, Namespace, SocketIO
+
+from ..dashboardelement import DashboardElement
+
+if TYPE_CHECKING:
+    from eptestbenchmanager.connections import PollingVirtualInstrument
+
+logger = logging.getLogger(__name__)
+
+
+class PollingStatus(DashboardElement):
+    """Shows the polling interval and the lateness and jitter statistics of a polled instrument.
+
+    The statistics are pulled by the client every few seconds rather than pushed on every poll.
+
+    Attributes:
+        instrument (PollingVirtualInstrument): The polled instrument.
+        namespace (str): The namespace for the SocketIO communication.
+    """
+
+    class PollingStatusNamespace(Namespace):
+        """Namespace for handling SocketIO events for PollingStatus.
+
+        Attributes:
+            element (PollingStatus): The associated PollingStatus instance.
+        """
+
+        def __init__(self, namespace, element):
+            """Initializes the PollingStatusNamespace.
+
+            Args:
+                namespace (str): The namespace for the SocketIO communication.
+                element (PollingStatus): The associated PollingStatus instance.
+            """
+            super().__init__(namespace)
+            self.element = element
+
+        def on_connect(self):
+            """Sends the current statistics to the connected client."""
+            logger.debug("Client connected to PollingStatusNamespace %s", self.element.namespace)
+            self.on_request_update()
+
+        def on_request_update(self, *_):
+            """Sends the current statistics to the requesting client."""
+            emit("update", self.element.status(), namespace=self.element.namespace)
+
+    def __init__(
+        self, uid: str, instrument: "PollingVirtualInstrument", socketio: SocketIO = None
+    ):
+        """Initializes the PollingStatus element.
+
+        Args:
+            uid (str): Unique identifier for the element.
+            instrument (PollingVirtualInstrument): The polled instrument.
+            socketio (SocketIO, optional): SocketIO instance for real-time communication.
+            Defaults to None.
+        """
+        super().__init__(uid, socketio)
+        self.instrument = instrument
+        self.namespace = f"/{uid}"
+        self.socketio.on_namespace(self.PollingStatusNamespace(self.namespace, self))
+
+    def status(self) -> dict:
+        """Returns the current polling interval along with the poll statistics.
+
+        Returns:
+            dict: The poll statistics snapshot, plus `polling_interval` in milliseconds and
+            whether the interval is `adaptive`.
+        """
+        return self.instrument.poll_statistics.snapshot() | {
+            "polling_interval": self.instrument.polling_interval,
+            "adaptive": getattr(self.instrument, "adaptive_polling", None) is not None,
+        }
+
+    def render_html(self):
+        """Renders the HTML for the polling status element.
+
+        Returns:
+            str: Rendered HTML template for the polling status.
+        """
+        data = {"uid": self.uid}
+        return render_template("elements/polling_status.html", data=data)
+
+    def render_js(self):
+        """Renders the JavaScript for the polling status element.
+
+        Returns:
+            str: Rendered JavaScript template for the polling status.
+        """
+        data = {"namespace": self.namespace, "uid": self.uid}
+        return render_template("elements/polling_status.js", data=data)
@@ -1,6 +1,6 @@
 import logging
 from typing import TYPE_CHECKING
-from flask_socketio import Namespace, SocketIO
+from flask_socketio import Namespace, SocketIO, emit
 from flask import render_template
 from ..dashboardelement import DashboardElement
 
@@ -26,6 +26,8 @@ class RecordingGraph(DashboardElement):
 
         Methods:
             on_connect(): Handles new client connections.
+            on_request_update(data): Sends the graph to a client at the resolution and time range
+            it asks for.
         """
 
         def on_connect(self):
@@ -37,6 +39,24 @@ class RecordingGraph(DashboardElement):
             logger.debug("New client connected to GraphNamespace %s", self.element.namespace)
             self.element.update()
 
+        def on_request_update(self, data):
+            """Sends the graph history to the requesting client only, with as many points as fit
+            its width, e.g. when it connects or is zoomed.
+
+            Args:
+                data (dict): `width` of the client's graph, in pixels, and optionally the `start`
+                and `end` of the time range shown, in seconds since the epoch.
+            """
+            try:
+                max_points = 2 * int(data["width"])  # A minimum and a maximum per pixel
+            except (KeyError, TypeError, ValueError):
+                max_points = None
+            try:
+                time_range = (float(data["start"]), float(data["end"]))
+            except (KeyError, TypeError, ValueError):
+                time_range = None
+            emit("update", self.element.data(max_points, time_range))
+
         def __init__(self, namespace, element):
             """Initializes the RecordingGraphNamespace with a namespace and element.
 
@@ -77,10 +97,8 @@ class RecordingGraph(DashboardElement):
         Returns:
             str: Rendered JavaScript template for the recording graph.
         """
-        try:
-            default_t0 = self.recording.times[0]
-        except IndexError:
-            default_t0 = 0
+        first_time = self.recording.first_time
+        default_t0 = first_time if first_time is not None else 0
         data = {
             "namespace": self.namespace,
             "uid": self.uid,
@@ -114,15 +132,30 @@ class RecordingGraph(DashboardElement):
             namespace=self.namespace,
         )
 
+    def data(self, max_points=None, time_range=None):
+        """Gets the horizontal and vertical axis data of the graph, from a consistent snapshot of
+        the recording, or for a time range from its record file.
+
+        Args:
+            max_points (int, optional): The most points wanted. Defaults to None, for the
+            recording's default resolution.
+            time_range (tuple[float, float], optional): The start and end of the time range, in
+            seconds since the epoch. Defaults to None, for the whole recording.
+
+        Returns:
+            dict: The `h_axis_data` and `v_axis_data`.
+        """
+        if time_range is not None:
+            h_axis_data, v_axis_data = self.recording.read_range(
+                *time_range, max_points or 2 * self.recording.stored_samples
+            )
+        else:
+            h_axis_data, v_axis_data = self.recording.snapshot(max_points)
+        return {"h_axis_data": h_axis_data, "v_axis_data": v_axis_data}
+
     def update(self):
         """Updates the graph with the latest data from the recording.
 
-        Emits an update event with the latest horizontal and vertical axis data.
+        Emits an update event with the latest horizontal and vertical axis data to every client.
         """
-        h_axis_data = self.recording.times
-        v_axis_data = self.recording.samples
-        self.socketio.emit(
-            "update",
-            {"h_axis_data": h_axis_data, "v_axis_data": v_axis_data},
-            namespace=self.namespace,
-        )
+        self.socketio.emit("update", self.data(), namespace=self.namespace)
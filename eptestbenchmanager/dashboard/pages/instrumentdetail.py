@@ -1,5 +1,5 @@
 from ..dashboardpage import DashboardPage
-from ..elements import Reload
+from ..elements import Reload, PollingStatus
 
 
 class InstrumentDetail(DashboardPage):
@@ -13,6 +13,7 @@ class InstrumentDetail(DashboardPage):
         rolling_graph (Graph): The rolling storage graph of the instrument.
         reload (Reload): The reload element for the page.
         gauge (Gauge): The gauge element of the instrument.
+        status_elements (list): Status elements of the instrument, such as its poll timing.
     """
 
     def __init__(self, virtual_instrument, testbench_manager, app=None, socketio=None):
@@ -32,6 +33,15 @@ class InstrumentDetail(DashboardPage):
         self.rolling_graph = virtual_instrument.rolling_storage.graph
         self.reload = Reload("reload", self.socketio)
         self.gauge = virtual_instrument.gauge
+        self.status_elements = []
+        if hasattr(virtual_instrument, "poll_statistics"):
+            self.status_elements.append(
+                PollingStatus(
+                    f"{virtual_instrument.uid}_polling_status",
+                    virtual_instrument,
+                    self.socketio,
+                )
+            )
         self.update_graphs()
 
     def render(self):
@@ -66,6 +76,13 @@ class InstrumentDetail(DashboardPage):
                     {self.rolling_graph.render_js()}
                 </script>
 
+                <div id="status_segment">
+                    {self.render_components_html(self.status_elements)}
+                </div>
+                <script>
+                    {self.render_components_js(self.status_elements)}
+                </script>
+
                 <div id="recording_graphs_segment">
                     {self.render_components_html(self.graphs)}
                 </div>
@@ -1,3 +1,4 @@
+from .runcontext import RunContext
 from .experiment import Experiment
 from .experiment_runner import ExperimentRunner
 from .experiment_factory import ExperimentFactory
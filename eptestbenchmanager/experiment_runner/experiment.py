@@ -2,9 +2,18 @@ import logging
 from threading import Thread, Lock, Event
 import time
 import datetime
+import os
 from io import StringIO
-from typing import TYPE_CHECKING
+from typing import Union, TYPE_CHECKING
 from eptestbenchmanager.chat.alert_manager import AlertSeverity
+from eptestbenchmanager.recording import (
+    RecordingFormat,
+    RecordingFile,
+    CsvRecordingFile,
+    RunLog,
+    RecordingView,
+)
+from .runcontext import RunContext
 from .experiment_segments.experiment_segment import (
     ExperimentSegment,
     AbortingSegmentFailure,
@@ -29,6 +38,12 @@ class Experiment:
         operator (str): Operator running the experiment.
         _testbench_manager (TestbenchManager): Global TestbenchManager object.
         run_id (str): Identifier for the current run of the experiment.
+        recording_format (Union[RecordingFormat, None]): The file format of the experiment's
+        recordings, or None for the format configured for the apparatus.
+        _boundary_log (Union[RecordingFile, None]): The log of segment transitions of the current
+        run.
+        _view_log (Union[RecordingFile, None]): The log of the sample ranges of the run's
+        recordings that each record took.
     """
 
     def __init__(
@@ -39,6 +54,7 @@ class Experiment:
         segments: list[ExperimentSegment],
         experiment_lock: Lock,
         testbench_manager: "TestbenchManager",
+        recording_format: Union[RecordingFormat, None] = None,
     ):
         """Initializes the Experiment with the given parameters.
 
@@ -49,11 +65,15 @@ class Experiment:
             segments (list[ExperimentSegment]): List of segments in the experiment.
             experiment_lock (Lock): Lock to ensure exclusive access to the experiment.
             testbench_manager (TestbenchManager): Global TestbenchManager object.
+            recording_format (Union[RecordingFormat, None], optional): The file format of the
+            experiment's recordings. Defaults to None, for the format configured for the
+            apparatus.
         """
         self.uid: str = uid
         self.name: str = name
         self.description: str = description
         self.segments: list[ExperimentSegment] = segments
+        self.recording_format = recording_format
         self.current_segment_id = None
         self._current_segment_name: str = None
         self._current_segment_uid: str = None
@@ -61,6 +81,8 @@ class Experiment:
         self.operator: str = None
         self._testbench_manager = testbench_manager
         self.run_id: str = None  # Not defined until the first run
+        self._boundary_log: Union[RecordingFile, None] = None
+        self._view_log: Union[RecordingFile, None] = None
         for segment in self.segments:  # Inject the experiment into the segments
             segment.inject_experiment(self)
         self._runner_thread: Thread = None
@@ -97,12 +119,15 @@ class Experiment:
         )
         try:
             self.current_segment_id = 0
+            self._open_boundary_log()
+            self._publish_run_context()
 
             for segment in self.segments:
                 segment_start_time = time.perf_counter()
                 self._current_segment_uid = segment.uid
                 self._current_segment_name = segment.name
                 self.current_segment_id += 1
+                self._publish_run_context()
 
                 self.update_vints()
 
@@ -146,10 +171,17 @@ class Experiment:
                     return
 
         finally:
+            # Every record of the run is a view of its run stores, which stay open until now
+            self._stop_run_stores()
+
             # Indicate we're finished
             self.current_segment_id = None
             self._current_segment_uid = None
             self._current_segment_name = None
+            self._publish_run_context()
+            self._close_boundary_log()
+            self._close_run_log()
+            self._testbench_manager.runner.run_context = RunContext(since=time.time())
 
             # Allow other experiments to run
             self._experiment_lock.release()
@@ -179,6 +211,106 @@ class Experiment:
             # Reset the operator
             self.operator = None
 
+    def _open_boundary_log(self) -> None:
+        """Opens the segment boundary and recording view logs of the run, next to its
+        recordings."""
+        run_log_dir = os.path.join(self._testbench_manager.report_manager.log_dir, self.run_id)
+        self._boundary_log = self._testbench_manager.recording_writer.open(
+            CsvRecordingFile(
+                os.path.join(run_log_dir, "segment_boundaries.csv"),
+                ["Time", "Segment ID", "Segment UID", "Segment Name"],
+            )
+        )
+        self._view_log = self._testbench_manager.recording_writer.open(
+            CsvRecordingFile(
+                os.path.join(run_log_dir, "recording_views.csv"),
+                [
+                    "Instrument UID",
+                    "Record ID",
+                    "Record Name",
+                    "Recording File",
+                    "Start Sample",
+                    "Stop Sample",
+                    "Segment UID",
+                ],
+            )
+        )
+
+    def _close_boundary_log(self) -> None:
+        """Closes the segment boundary and recording view logs, waiting (up to a few seconds) for
+        them to be written."""
+        for log in (self._boundary_log, self._view_log):
+            if log is not None:
+                if not self._testbench_manager.recording_writer.close(log).wait(5.0):
+                    logger.warning("Log %s is still being written", log.path)
+        self._boundary_log = None
+        self._view_log = None
+
+    def log_recording_view(self, view: RecordingView) -> None:
+        """Logs the sample range of a run recording that a record took while it was last active.
+
+        Args:
+            view (RecordingView): The record, just stopped.
+        """
+        if self._view_log is None:
+            return
+        start, stop = view.stop()
+        self._testbench_manager.recording_writer.write(
+            self._view_log,
+            [
+                view.store.instrument_uid,
+                view.record_id,
+                view.name,
+                os.path.relpath(
+                    view.store.file_path,
+                    os.path.join(self._testbench_manager.report_manager.log_dir, self.run_id),
+                ),
+                start,
+                stop,
+                self._current_segment_uid,
+            ],
+        )
+
+    def _stop_run_stores(self) -> None:
+        """Stops the store recordings of the run and closes their files, so they are complete
+        in the archive, logging the views that a failed segment left active."""
+        instruments = self._testbench_manager.connection_manager.virtual_instruments
+        for instrument in list(instruments.values()):
+            try:
+                for view in instrument.stop_store(self.run_id):
+                    self.log_recording_view(view)
+            except Exception as e:  # pylint: disable=broad-except # stop the other stores
+                logger.error("Error stopping the run recording of %s: %s", instrument.name, e)
+
+    def _close_run_log(self) -> None:
+        """Closes the run log of multiplexed recordings of the run, if any, waiting (up to a few
+        seconds) for it to be written."""
+        closed = self._testbench_manager.recording_writer.close_run_log(
+            os.path.join(
+                self._testbench_manager.report_manager.log_dir, self.run_id, RunLog.FILE_NAME
+            )
+        )
+        if closed is not None and not closed.wait(5.0):
+            logger.warning("Run log of %s is still being written", self.run_id)
+
+    def _publish_run_context(self) -> None:
+        """Publishes the current segment to the run context read by recordings, and logs the
+        transition in the segment boundary log."""
+        context = RunContext(
+            self.uid,
+            self.run_id,
+            self.current_segment_id,
+            self._current_segment_uid,
+            self._current_segment_name,
+            time.time(),
+        )
+        self._testbench_manager.runner.run_context = context
+        if self._boundary_log is not None:
+            self._testbench_manager.recording_writer.write(
+                self._boundary_log,
+                [context.since, context.segment_id, context.segment_uid, context.segment_name],
+            )
+
     def generate_report(self) -> StringIO:
         """Generates a report for the experiment.
 
@@ -3,6 +3,7 @@ from threading import Lock
 from typing import TYPE_CHECKING
 from collections.abc import Iterable
 from yaml import load, FullLoader
+from eptestbenchmanager.recording import RecordingFormat
 from .experiment import Experiment
 from .experiment_segments import (
     Pumpdown,
@@ -51,6 +52,7 @@ class ExperimentFactory:
         name = config["experiment"]["name"]
         description = config["experiment"]["description"]
         experiment_recordings = config.get("recordings", None)
+        recording_format = config["experiment"].get("recording_format", None)
 
         segments = []
 
@@ -69,7 +71,13 @@ class ExperimentFactory:
                 segments.append(segment)
 
         experiment = Experiment(
-            uid, name, description, segments, experiment_lock, testbench_manager
+            uid,
+            name,
+            description,
+            segments,
+            experiment_lock,
+            testbench_manager,
+            RecordingFormat(recording_format) if recording_format is not None else None,
         )
 
         return experiment
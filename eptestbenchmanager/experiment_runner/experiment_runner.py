@@ -4,6 +4,7 @@ from io import StringIO
 from os import path, walk
 from threading import Lock, Thread
 from typing import TYPE_CHECKING
+from .runcontext import RunContext
 from .experiment import Experiment
 from .experiment_factory import ExperimentFactory
 
@@ -21,6 +22,8 @@ class ExperimentRunner:
         _testbench_manager (TestbenchManager): Global TestbenchManager object.
         _experiment_lock (Lock): Lock to ensure only one experiment runs at a time.
         _current_experiment_uid (str): UID of the currently running experiment.
+        run_context (RunContext): The running experiment and segment. Replaced as a whole by the
+        running experiment, so it can be read without a lock.
     """
 
     def __init__(
@@ -35,6 +38,7 @@ class ExperimentRunner:
         self._testbench_manager = testbench_manager
         self._experiment_lock = Lock()
         self._current_experiment_uid = None
+        self.run_context = RunContext()
         self.experiment_config_dir = experiment_config_dir
 
     def load_experiments(self) -> None:
@@ -1,12 +1,14 @@
 import time
 from abc import ABC, abstractmethod
+from concurrent.futures import wait
 from threading import Thread
 from os import path
-from typing import TYPE_CHECKING
+from typing import Union, TYPE_CHECKING
 from eptestbenchmanager.monitor import Rule
 
 if TYPE_CHECKING:
     from eptestbenchmanager.manager import TestbenchManager
+    from eptestbenchmanager.connections import VirtualInstrument, Sample
 
 
 class AbortingSegmentFailure(Exception):
@@ -122,12 +124,14 @@ class ExperimentSegment(ABC):
                 ]
             )
 
-            if vinstrument.recording_exists(record_id):
-                vinstrument.resume_recording(record_id)
-            else:
-                file_id = self.generate_file_id(record_id)
-                record_name = vinstrument_data[vinstrument_id]["record_name"]
-                vinstrument.begin_recording(record_id, record_name, file_id=file_id)
+            # Every record of the instrument in the run is a view of one recording of the run
+            vinstrument.begin_view(
+                self.experiment.run_id,
+                record_id,
+                vinstrument_data[vinstrument_id].get("record_name"),
+                self.generate_file_id("run"),
+                record_format=self.experiment.recording_format,
+            )
 
     def stop_recordings(self):
         """Stops the recordings for the segment.
@@ -153,7 +157,8 @@ class ExperimentSegment(ABC):
                     vinstrument_id
                 ]
             )
-            vinstrument.stop_recording(record_id)
+            view = vinstrument.stop_view(record_id)
+            self.experiment.log_recording_view(view)
 
     def prerun(self):
         """Performs pre-run operations for the segment."""
@@ -185,6 +190,24 @@ class ExperimentSegment(ABC):
         """
         return f"{self.experiment.run_id}_{record_id}"
 
+    @staticmethod
+    def command_all(*commands: tuple) -> None:
+        """Sends commands to several virtual instruments at once and waits for all of them.
+
+        Commands to different physical instruments are sent concurrently; commands to the same
+        physical instrument are still sent in the order given.
+
+        Args:
+            *commands (tuple): (virtual instrument, value) pairs.
+
+        Raises:
+            Exception: The first error raised by a command, once all of them have completed.
+        """
+        futures = [instrument.command_async(value) for instrument, value in commands]
+        wait(futures)
+        for future in futures:
+            future.result()
+
     def interruptable_sleep(self, seconds: float):
         """Sleeps for the specified number of seconds, but can be interrupted by an abort.
 
@@ -198,6 +221,31 @@ class ExperimentSegment(ABC):
             remaining_time = end_time - time.perf_counter()
             time.sleep(min(remaining_time, 0.1))
 
+    def interruptable_wait_for_update(
+        self, instrument: "VirtualInstrument", after_sequence: int, seconds: float
+    ) -> Union["Sample", None]:
+        """Waits for a virtual instrument to have a newer value, but can be interrupted by an
+        abort.
+
+        Args:
+            instrument (VirtualInstrument): The virtual instrument.
+            after_sequence (int): Sequence number of the last sample seen.
+            seconds (float): The longest time to wait, in seconds.
+
+        Returns:
+            Union[Sample, None]: The newer sample, or None if none arrived in time.
+        """
+        end_time = time.perf_counter() + seconds
+        while True:
+            if self.experiment.abort.is_set():
+                raise AbortingSegmentFailure("Manual abort requested.")
+            remaining_time = end_time - time.perf_counter()
+            if remaining_time <= 0:
+                return None
+            sample = instrument.wait_for_update(after_sequence, min(remaining_time, 0.1))
+            if sample is not None:
+                return sample
+
     def interruptable(self, iterable):
         """Returns an interruptible iterator.
 
@@ -16,15 +16,15 @@ class IsoFilamentHold(IsoFilamentBase):
         self.hold_s = config["hold_s"]
 
     def run(self) -> None:
-        self.bias_current_limit.command(self.bias_current_limit_value)
-        self.bias_voltage_setpoint.command(self.bias_voltage_setpoint_value)
-        self.filament_current_limit.command(self.filament_current_limit_value)
-        self.filament_voltage_setpoint.command(self.filament_voltage_setpoint_value)
-        self.filament_output.command(True)
-        self.bias_output.command(True)
+        self.command_all(
+            (self.bias_current_limit, self.bias_current_limit_value),
+            (self.bias_voltage_setpoint, self.bias_voltage_setpoint_value),
+            (self.filament_current_limit, self.filament_current_limit_value),
+            (self.filament_voltage_setpoint, self.filament_voltage_setpoint_value),
+        )
+        self.command_all((self.filament_output, True), (self.bias_output, True))
         self.interruptable_sleep(self.hold_s)
-        self.filament_output.command(False)
-        self.bias_output.command(False)
+        self.command_all((self.filament_output, False), (self.bias_output, False))
 
     def generate_report(self):
         pass
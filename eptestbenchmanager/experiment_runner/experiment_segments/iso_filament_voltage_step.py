@@ -19,12 +19,13 @@ class IsoFilamentVoltageStep(IsoFilamentBase):
         self.step_delay = config["step_delay"]
 
     def run(self) -> None:
-        self.filament_voltage_setpoint.command(self.min_filament_voltage)
-        self.filament_current_limit.command(self.filament_current_limit_value)
-        self.bias_voltage_setpoint.command(self.bias_voltage_setpoint_value)
-        self.bias_current_limit.command(self.bias_current_limit_value)
-        self.bias_output.command(True)
-        self.filament_output.command(True)
+        self.command_all(
+            (self.filament_voltage_setpoint, self.min_filament_voltage),
+            (self.filament_current_limit, self.filament_current_limit_value),
+            (self.bias_voltage_setpoint, self.bias_voltage_setpoint_value),
+            (self.bias_current_limit, self.bias_current_limit_value),
+        )
+        self.command_all((self.bias_output, True), (self.filament_output, True))
 
         voltages = [
             float(voltage)
@@ -40,8 +41,7 @@ class IsoFilamentVoltageStep(IsoFilamentBase):
             self.filament_voltage_setpoint.command(float(voltage))
             self.interruptable_sleep(self.step_delay)
 
-        self.filament_output.command(False)
-        self.bias_output.command(False)
+        self.command_all((self.filament_output, False), (self.bias_output, False))
 
     def generate_report(self):
         pass
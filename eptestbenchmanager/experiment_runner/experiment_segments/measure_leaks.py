@@ -28,22 +28,28 @@ class MeasureLeaks(Pumpdown):
         Monitors the chamber pressure and raises an exception if the timeout expires.
         """
         with Timeout(Timeout.from_minutes(self.timeout_time_minutes)) as timeout:
-            pressure = self.chamber_pressure.value
+            pressure = self.chamber_pressure.sample
             threshold = ThresholdLastNValues(
-                20, pressure, self.comparison_operator, float(self.setpoint_mbar)
+                20, pressure.value, self.comparison_operator, float(self.setpoint_mbar)
             )
             self.data["metadata"]["start_time"] = time.time()
-            while threshold.update_evaluate(pressure):
-                if timeout.expired:
-                    if self.timeout_action != "continue":
-                        raise AbortingSegmentFailure(
-                            f"{self.uid} segment failed, aborting the experiment. "
-                            f"(Reason: {self.data['termination']['reason']})"
-                        )
-                    return
-
+            while threshold.update_evaluate(pressure.value):
                 next_loop_time = time.perf_counter() + self.time_resolution_s
-                pressure = self.chamber_pressure.value
+
+                new_pressure = None
+                while new_pressure is None:
+                    if timeout.expired:
+                        if self.timeout_action != "continue":
+                            raise AbortingSegmentFailure(
+                                f"{self.uid} segment failed, aborting the experiment. "
+                                f"(Reason: {self.data['termination']['reason']})"
+                            )
+                        return
+
+                    new_pressure = self.interruptable_wait_for_update(
+                        self.chamber_pressure, pressure.sequence, self.time_resolution_s
+                    )
+                pressure = new_pressure
                 sleep_time = next_loop_time - time.perf_counter()
                 if sleep_time > 0:
                     self.interruptable_sleep(sleep_time)
@@ -40,31 +40,38 @@ class Pumpdown(ExperimentSegment):
         """Executes the pumpdown segment.
 
         Monitors the chamber pressure and ensures it reaches the setpoint within the timeout period.
+        Only fresh readings count towards the threshold: each loop waits for a newer sample than
+        the last one rather than reading the same value again.
         """
         with Timeout(Timeout.from_minutes(self.timeout_time_minutes)) as timeout:
-            pressure = self.chamber_pressure.value
+            pressure = self.chamber_pressure.sample
             threshold = ThresholdLastNValues(
-                20, pressure, self.comparison_operator, float(self.setpoint_mbar)
+                20, pressure.value, self.comparison_operator, float(self.setpoint_mbar)
             )
             self.data["metadata"]["start_time"] = time.time()
-            while threshold.update_evaluate(pressure):
-                if timeout.expired:
-                    # We've timed out
-                    self.data["termination"]["reason"] = "timeout"
-                    self.data["metadata"]["end_time"] = time.time()
-
-                    if self.timeout_action != "continue":
-                        raise AbortingSegmentFailure(
-                            f"{self.uid} segment failed, aborting the experiment. (Reason: {self.data['termination']['reason']}"  # pylint: disable=line-too-long
-                        )
-                    return
-
+            while threshold.update_evaluate(pressure.value):
                 next_loop_time = time.perf_counter() + self.time_resolution_s
 
-                pressure = self.chamber_pressure.value
+                new_pressure = None
+                while new_pressure is None:
+                    if timeout.expired:
+                        # We've timed out
+                        self.data["termination"]["reason"] = "timeout"
+                        self.data["metadata"]["end_time"] = time.time()
+
+                        if self.timeout_action != "continue":
+                            raise AbortingSegmentFailure(
+                                f"{self.uid} segment failed, aborting the experiment. (Reason: {self.data['termination']['reason']}"  # pylint: disable=line-too-long
+                            )
+                        return
+
+                    new_pressure = self.interruptable_wait_for_update(
+                        self.chamber_pressure, pressure.sequence, self.time_resolution_s
+                    )
+                pressure = new_pressure
 
                 self.data["pressure"]["data"].append(
-                    [time.time(), pressure]
+                    [pressure.timestamp, pressure.value]
                 )  # TODO: Remove; this should be handled by recordings.
 
                 sleep_time = next_loop_time - time.perf_counter()
@@ -0,0 +1,25 @@
+from typing import NamedTuple, Union
+
+
+class RunContext(NamedTuple):
+    """An immutable snapshot of what the experiment runner is doing.
+
+    The running experiment replaces the context as a whole at every segment transition, so
+    recordings can read it on every sample without a lock or a call into the runner.
+
+    Attributes:
+        experiment_uid (Union[str, None]): UID of the running experiment, or None if none is.
+        run_id (Union[str, None]): Identifier of the current run.
+        segment_id (Union[int, None]): 1-based index of the current segment, or None between
+        segments.
+        segment_uid (Union[str, None]): UID of the current segment.
+        segment_name (Union[str, None]): Name of the current segment.
+        since (float): When the context was entered, in `time.time()` seconds.
+    """
+
+    experiment_uid: Union[str, None] = None
+    run_id: Union[str, None] = None
+    segment_id: Union[int, None] = None
+    segment_uid: Union[str, None] = None
+    segment_name: Union[str, None] = None
+    since: float = 0.0
@@ -3,7 +3,7 @@ from pathlib import Path
 from time import sleep
 import logging
 
-from eptestbenchmanager.connections import ConnectionManager
+from eptestbenchmanager.connections import ConnectionManager, DataBus
 from eptestbenchmanager.monitor import TestbenchMonitor
 from eptestbenchmanager.experiment_runner import ExperimentRunner
 from eptestbenchmanager.chat.alert_manager import DiscordAlertManager
@@ -11,6 +11,7 @@ from eptestbenchmanager.chat.engine import DiscordEngine
 from eptestbenchmanager.chat.chat_manager import DiscordChatManager
 from eptestbenchmanager.dashboard import DashboardManager
 from eptestbenchmanager.report import ReportManager
+from eptestbenchmanager.recording import RecordingWriter
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +21,9 @@ class TestbenchManager:
 
     Attributes:
         monitor (TestbenchMonitor): Monitors the testbench and evaluates rules.#TODO: Implement this
+        data_bus (DataBus): Delivers the samples of virtual instruments to recordings, gauges,
+        composites and other consumers.
+        recording_writer (RecordingWriter): Writes the files of all recordings from one thread.
         connection_manager (ConnectionManager): Manages connections with physical and virtual
         instruments.
         communication_engine (DiscordEngine): Engine that plugs into alert and chat managers.
@@ -33,6 +37,8 @@ class TestbenchManager:
     def __init__(self):
         """Initializes the TestbenchManager with default attributes."""
         self.monitor: TestbenchMonitor = None
+        self.data_bus = DataBus()
+        self.recording_writer = RecordingWriter()
         self.connection_manager: ConnectionManager = None
         self.communication_engine = DiscordEngine()
         self.alert_manager = DiscordAlertManager(self.communication_engine)
@@ -1 +1,14 @@
+from .ringbuffer import RingBuffer
+from .minmaxpyramid import MinMaxPyramid
+from .recordingformat import RecordingFormat
+from .compressioncodec import CompressionCodec
+from .framecompressor import FrameCompressor
+from .timeindex import TimeIndex
+from .recordingfile import RecordingFile
+from .csvrecordingfile import CsvRecordingFile
+from .binaryrecordingfile import BinaryRecordingFile
+from .runlog import RunLog
+from .runlogchannel import RunLogChannel
+from .recordingwriter import RecordingWriter
 from .recording import Recording
+from .recordingview import RecordingView
@@ -0,0 +1,395 @@
+import csv
+import io
+import json
+import logging
+import os
+from typing import Iterator, Union
+import numpy as np
+from . import RecordingFile
+
+logger = logging.getLogger(__name__)
+
+
+class BinaryRecordingFile(RecordingFile):
+    """A recording in a compact binary format: a directory of memory-mapped columns.
+
+    The directory holds:
+
+    - `header.json`: the instrument UID, name and unit, and the type of the values.
+    - `rows.i8`: the number of rows written and flushed, as a little-endian int64.
+    - `time_ns.i8`: the sample times, as little-endian int64 nanoseconds since the epoch.
+    - `value.f8`: the values, as little-endian float64 (None as NaN); or, for instruments with
+      non-numeric values, `value.jsonl` with one JSON value per line and `value.off` with the
+      int64 offset of the end of each line.
+    - `segment.i4`: for each sample, the little-endian int32 index of its experiment segment in
+      `segments.txt` (-1 for none).
+    - `segments.txt`: the segment UIDs, one per line, in the order they were first seen.
+
+    The fixed-width columns are preallocated `CHUNK_ROWS` rows at a time and written through
+    memory maps, and are truncated to the rows written when the file is closed. The row count is
+    only raised once the rows are flushed, so readers on other threads or processes can `map` the
+    columns while they are being written and see every row up to the count. A crash loses at most
+    the unflushed rows. `iter_csv` and `export_csv` convert a recording to the CSV format when it
+    is exported.
+
+    Attributes:
+        EXTENSION (str): Extension of recording directories.
+        CHUNK_ROWS (int): Rows the columns grow by.
+        metadata (dict): Instrument UID, name and unit, stored in the header.
+        value_type (Union[str, None]): "float64" or "json", decided by the first value.
+        rows (int): Rows written.
+        _capacity (int): Rows the columns have room for.
+        _columns (dict[str, np.memmap]): The memory-mapped fixed-width columns, by file name.
+        _count (Union[np.memmap, None]): The memory-mapped row count.
+        _text_files (dict[str, io.BufferedWriter]): The open text files, by name.
+        _json_end (int): Offset of the end of the JSON values.
+        _segments (dict[Union[str, None], int]): The index of each segment UID seen.
+    """
+
+    EXTENSION = ".eprec"
+    CHUNK_ROWS = 65536
+    _COLUMN_TYPES = {
+        "time_ns.i8": np.dtype("<i8"),
+        "segment.i4": np.dtype("<i4"),
+        "value.f8": np.dtype("<f8"),
+        "value.off": np.dtype("<i8"),
+    }
+
+    def __init__(self, path: str, metadata: dict):
+        """Initializes the BinaryRecordingFile.
+
+        Args:
+            path (str): Path of the recording directory.
+            metadata (dict): Instrument UID, name and unit, stored in the header.
+        """
+        super().__init__(path)
+        self.metadata = metadata
+        self.value_type: Union[str, None] = None
+        self.rows = 0
+        self._capacity = 0
+        self._columns: dict[str, np.memmap] = {}
+        self._count: Union[np.memmap, None] = None
+        self._text_files: dict[str, io.BufferedWriter] = {}
+        self._json_end = 0
+        self._segments: dict[Union[str, None], int] = {None: -1}
+
+    @property
+    def is_open(self) -> bool:
+        return self._count is not None
+
+    def open(self) -> None:
+        """Opens the recording for appending, picking up the rows, header and segments of an
+        existing recording."""
+        os.makedirs(self.path, exist_ok=True)
+        header = self.read_header(self.path)
+        if header is not None:
+            self.value_type = header["value_type"]
+        for index, segment in enumerate(self.read_segments(self.path)):
+            self._segments[segment] = index
+        self.rows = self.row_count(self.path)
+        self._text_files["segments.txt"] = open(os.path.join(self.path, "segments.txt"), "ab")  # pylint: disable=consider-using-with
+
+        count_path = os.path.join(self.path, "rows.i8")
+        if not os.path.exists(count_path):
+            np.zeros(1, "<i8").tofile(count_path)
+        self._count = np.memmap(count_path, dtype="<i8", mode="r+", shape=(1,))
+        self._count[0] = self.rows
+        if self.value_type is not None:
+            self._open_value_columns()
+        self._map_columns(max(self.rows, self.CHUNK_ROWS))
+
+    def _value_columns(self) -> tuple[str, ...]:
+        """Returns the names of the fixed-width columns for the value type."""
+        if self.value_type == "float64":
+            return ("time_ns.i8", "segment.i4", "value.f8")
+        if self.value_type == "json":
+            return ("time_ns.i8", "segment.i4", "value.off")
+        return ("time_ns.i8", "segment.i4")
+
+    def _open_value_columns(self) -> None:
+        """Opens the JSON value file, for non-numeric values, and maps the value column."""
+        if self.value_type == "json":
+            json_path = os.path.join(self.path, "value.jsonl")
+            self._text_files["value.jsonl"] = open(json_path, "ab")  # pylint: disable=consider-using-with
+            self._json_end = self._text_files["value.jsonl"].tell()
+        if self._capacity:
+            self._map_columns(self._capacity)
+
+    def _map_columns(self, capacity: int) -> None:
+        """Sizes the fixed-width columns for a number of rows and maps them.
+
+        Args:
+            capacity (int): Rows the columns must have room for.
+        """
+        for name, column in list(self._columns.items()):
+            column.flush()
+            del self._columns[name]
+        for name in self._value_columns():
+            dtype = self._COLUMN_TYPES[name]
+            column_path = os.path.join(self.path, name)
+            with open(column_path, "ab") as column_file:
+                if column_file.tell() < capacity * dtype.itemsize:
+                    column_file.truncate(capacity * dtype.itemsize)
+            self._columns[name] = np.memmap(column_path, dtype=dtype, mode="r+", shape=(capacity,))
+        self._capacity = capacity
+
+    def write_row(self, row: list) -> int:
+        timestamp, value, segment = row
+        if self.value_type is None:
+            # The first value decides how values are stored
+            self.value_type = (
+                "float64" if value is None or isinstance(value, (int, float)) else "json"
+            )
+            with open(os.path.join(self.path, "header.json"), "w", encoding="utf-8") as header:
+                json.dump(self.metadata | {"value_type": self.value_type}, header)
+            self._open_value_columns()
+
+        if self.rows == self._capacity:
+            self._map_columns(self._capacity + self.CHUNK_ROWS)
+
+        if segment not in self._segments:
+            self._segments[segment] = len(self._segments) - 1
+            self._text_files["segments.txt"].write(f"{segment}\n".encode("utf-8"))
+
+        written = 12  # time and segment index
+        if self.value_type == "float64":
+            try:
+                self._columns["value.f8"][self.rows] = np.nan if value is None else value
+            except (TypeError, ValueError):
+                logger.warning("Non-numeric value %r recorded as NaN in %s", value, self.path)
+                self._columns["value.f8"][self.rows] = np.nan
+            written += 8
+        else:
+            line = (json.dumps(value) + "\n").encode("utf-8")
+            self._text_files["value.jsonl"].write(line)
+            self._json_end += len(line)
+            self._columns["value.off"][self.rows] = self._json_end
+            written += 8 + len(line)
+
+        self._columns["time_ns.i8"][self.rows] = round(timestamp * 1e9)
+        self._columns["segment.i4"][self.rows] = self._segments[segment]
+        self.rows += 1
+        return written
+
+    def flush(self) -> None:
+        """Flushes the text files and publishes the rows written to readers."""
+        for text_file in self._text_files.values():
+            text_file.flush()
+        # The columns are shared memory maps, so the rows are visible once they are counted
+        self._count[0] = self.rows
+
+    def fsync(self) -> None:
+        for column in (*self._columns.values(), self._count):
+            column.flush()
+        for text_file in self._text_files.values():
+            os.fsync(text_file.fileno())
+
+    def close(self) -> None:
+        self.flush()
+        names = list(self._columns)
+        self._columns = {}  # Unmap before truncating
+        self._count = None
+        for name in names:
+            try:
+                os.truncate(
+                    os.path.join(self.path, name), self.rows * self._COLUMN_TYPES[name].itemsize
+                )
+            except OSError as e:  # Mapped by a reader, on some platforms
+                logger.debug("Column %s of %s not truncated: %s", name, self.path, e)
+        for text_file in self._text_files.values():
+            text_file.close()
+        self._text_files = {}
+        self._capacity = 0
+
+    @staticmethod
+    def read_header(path: str) -> Union[dict, None]:
+        """Reads the header of a recording directory.
+
+        Args:
+            path (str): Path of the recording directory.
+
+        Returns:
+            Union[dict, None]: The header, or None if no value has been written yet.
+        """
+        try:
+            with open(os.path.join(path, "header.json"), "r", encoding="utf-8") as header:
+                return json.load(header)
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def read_segments(path: str) -> list[str]:
+        """Reads the segment UIDs of a recording directory, in index order.
+
+        Args:
+            path (str): Path of the recording directory.
+
+        Returns:
+            list[str]: The segment UIDs.
+        """
+        try:
+            with open(os.path.join(path, "segments.txt"), "r", encoding="utf-8") as segments:
+                return segments.read().splitlines()
+        except FileNotFoundError:
+            return []
+
+    @classmethod
+    def row_count(cls, path: str) -> int:
+        """Returns the number of rows of a recording directory that readers may use.
+
+        Args:
+            path (str): Path of the recording directory.
+
+        Returns:
+            int: The number of flushed rows.
+        """
+        header = cls.read_header(path)
+        if header is None:
+            return 0
+        try:
+            rows = int(np.fromfile(os.path.join(path, "rows.i8"), dtype="<i8", count=1)[0])
+        except (FileNotFoundError, IndexError):
+            rows = None
+        value_column = "value.f8" if header["value_type"] == "float64" else "value.off"
+        for name in ("time_ns.i8", "segment.i4", value_column):
+            try:
+                size = os.path.getsize(os.path.join(path, name))
+            except FileNotFoundError:
+                size = 0
+            column_rows = size // cls._COLUMN_TYPES[name].itemsize
+            rows = column_rows if rows is None else min(rows, column_rows)
+        return rows
+
+    @classmethod
+    def map(
+        cls, path: str, start: int = 0, stop: Union[int, None] = None
+    ) -> tuple[np.ndarray, Union[np.ndarray, list], np.ndarray, list[str]]:
+        """Maps a range of rows of a recording directory, without reading the rest.
+
+        May be called while the recording is being written. Numeric columns are returned as
+        read-only memory-mapped arrays, so only the pages that are used are read from disk.
+
+        Args:
+            path (str): Path of the recording directory.
+            start (int, optional): First row, counted from the end if negative. Defaults to 0.
+            stop (Union[int, None], optional): Row after the last one, counted from the end if
+            negative. Defaults to None, for the last row written.
+
+        Returns:
+            tuple[np.ndarray, Union[np.ndarray, list], np.ndarray, list[str]]: The int64
+            nanosecond times, the values (a list of JSON values for non-numeric instruments), the
+            segment indices and the segment UIDs.
+        """
+        rows = cls.row_count(path)
+        start, stop, _ = slice(start, stop).indices(rows)
+        stop = max(start, stop)
+        if rows == 0:
+            return np.empty(0, np.int64), np.empty(0), np.empty(0, np.int32), []
+
+        def column(name: str) -> np.ndarray:
+            return np.memmap(
+                os.path.join(path, name), dtype=cls._COLUMN_TYPES[name], mode="r", shape=(rows,)
+            )[start:stop]
+
+        times = column("time_ns.i8")
+        segment_indices = column("segment.i4")
+        segments = cls.read_segments(path)
+        if cls.read_header(path)["value_type"] == "float64":
+            values = column("value.f8")
+        else:
+            values = cls._read_json(path, start, column("value.off"), rows)
+        return times, values, segment_indices, segments
+
+    @classmethod
+    def find_rows(cls, path: str, start_time: float, end_time: float) -> tuple[int, int]:
+        """Finds the rows of a recording directory within a time range.
+
+        The time column is its own index: it is binary-searched through its memory map, so only
+        a few of its pages are read however long the recording is. Times are assumed not to
+        decrease.
+
+        Args:
+            path (str): Path of the recording directory.
+            start_time (float): The start of the range, in seconds.
+            end_time (float): The end of the range, included, in seconds.
+
+        Returns:
+            tuple[int, int]: The [start, stop) rows, to pass to `map`.
+        """
+        rows = cls.row_count(path)
+        if rows == 0:
+            return 0, 0
+        times = np.memmap(
+            os.path.join(path, "time_ns.i8"),
+            dtype=cls._COLUMN_TYPES["time_ns.i8"],
+            mode="r",
+            shape=(rows,),
+        )
+        start = int(np.searchsorted(times, round(start_time * 1e9), side="left"))
+        stop = int(np.searchsorted(times, round(end_time * 1e9), side="right"))
+        return start, max(start, stop)
+
+    @classmethod
+    def _read_json(cls, path: str, start: int, ends: np.ndarray, rows: int) -> list:
+        """Reads the JSON values of a range of rows, given the end offsets of their lines."""
+        if len(ends) == 0:
+            return []
+        begin = 0
+        if start > 0:
+            begin = int(
+                np.memmap(
+                    os.path.join(path, "value.off"), dtype="<i8", mode="r", shape=(rows,)
+                )[start - 1]
+            )
+        with open(os.path.join(path, "value.jsonl"), "rb") as value_file:
+            value_file.seek(begin)
+            text = value_file.read(int(ends[-1]) - begin)
+        return [json.loads(line) for line in text.splitlines()]
+
+    @classmethod
+    def iter_csv(cls, path: str, chunk_rows: int = 10000) -> Iterator[str]:
+        """Converts a recording directory to CSV, in chunks of text.
+
+        The CSV has the same columns as recordings written in CSV format. Only one chunk of rows
+        is held in memory at a time.
+
+        Args:
+            path (str): Path of the recording directory.
+            chunk_rows (int, optional): Rows per chunk of text. Defaults to 10000.
+
+        Yields:
+            str: CSV text, starting with the header row.
+        """
+        yield "Time,Value,Segment UID\n"
+        rows = cls.row_count(path)
+        for start in range(0, rows, chunk_rows):
+            times, values, segment_indices, segments = cls.map(path, start, start + chunk_rows)
+            segment_names = np.array([*segments, ""], dtype=object)  # Index -1 is no segment
+            # A segment may be missing from segments.txt if it was not flushed with the rows
+            segment_indices = np.where(segment_indices < len(segments), segment_indices, -1)
+            text = io.StringIO()
+            csv.writer(text, lineterminator="\n").writerows(
+                zip(
+                    (times / 1e9).tolist(),
+                    [None if v != v else v for v in cls._as_list(values)],
+                    segment_names[segment_indices].tolist(),
+                )
+            )
+            yield text.getvalue()
+
+    @staticmethod
+    def _as_list(values: Union[np.ndarray, list]) -> list:
+        """Returns values as a list of Python objects."""
+        return values.tolist() if isinstance(values, np.ndarray) else values
+
+    @classmethod
+    def export_csv(cls, path: str, csv_path: str) -> None:
+        """Converts a recording directory to a CSV file.
+
+        Args:
+            path (str): Path of the recording directory.
+            csv_path (str): Path of the CSV file to write.
+        """
+        with open(csv_path, "w", newline="", encoding="utf-8") as csv_file:
+            for text in cls.iter_csv(path):
+                csv_file.write(text)
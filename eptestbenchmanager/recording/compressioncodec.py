@@ -0,0 +1,15 @@
+from enum import Enum
+
+
+class CompressionCodec(Enum):
+    """
+    Enum for how recording files are compressed while they are written.
+
+    NONE writes plain files. GZIP writes each flushed chunk as a gzip member, and ZSTD as a
+    Zstandard frame (which needs the optional `zstandard` package); either way a file is a valid
+    stream of its format, and a crash loses at most the chunk being written.
+    """
+
+    NONE = "none"
+    GZIP = "gzip"
+    ZSTD = "zstd"
@@ -0,0 +1,150 @@
+import csv
+import io
+import os
+from typing import Iterator, Union
+from . import RecordingFile, FrameCompressor, TimeIndex
+
+
+class CsvRecordingFile(RecordingFile):
+    """A recording file in CSV format, with one text row per sample.
+
+    With a compressor, the rows written between flushes are compressed into one frame when the
+    file is flushed.
+
+    The file keeps a sparse time index next to it, of rows (or, compressed, of frames) about
+    every `TimeIndex.interval` bytes, so `read_range` reads only around the rows it returns.
+
+    Attributes:
+        header (list): Row written first when the file is empty.
+        compressor (Union[FrameCompressor, None]): Compresses the flushed chunks, if any.
+        index (TimeIndex): The time index of the file.
+        _file: The open file.
+        _offset (int): The size of the file once its written data is flushed.
+        _chunk (bytearray): Rows waiting to be compressed, with a compressor.
+        _chunk_time (Union[float, None]): The time of the first row of the chunk.
+        _line (io.StringIO): Buffer each row is formatted into.
+        _csv_writer: CSV writer formatting rows into `_line`.
+    """
+
+    def __init__(
+        self, path: str, header: list, compressor: Union[FrameCompressor, None] = None
+    ):
+        """Initializes the CsvRecordingFile.
+
+        Args:
+            path (str): Path of the file.
+            header (list): Row written first when the file is empty.
+            compressor (Union[FrameCompressor, None], optional): Compresses the flushed chunks.
+            Defaults to None, for a plain file.
+        """
+        super().__init__(path)
+        self.header = header
+        self.compressor = compressor
+        self.index = TimeIndex(path)
+        self._file = None
+        self._offset = 0
+        self._chunk = bytearray()
+        self._chunk_time: Union[float, None] = None
+        self._line = io.StringIO()
+        self._csv_writer = csv.writer(self._line, lineterminator="\n")
+
+    @property
+    def is_open(self) -> bool:
+        return self._file is not None
+
+    def open(self) -> None:
+        """Opens the file and its index for appending, writing the header if it is empty."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._file = open(self.path, mode="ab")  # pylint: disable=consider-using-with
+        self._offset = self._file.tell()
+        self.index.open()
+        if self._offset == 0:
+            self._write(self.header)
+
+    def write_row(self, row: list) -> int:
+        if self.compressor is None:
+            self.index.add(row[0], self._offset)
+        elif self._chunk_time is None:
+            self._chunk_time = row[0]
+        return self._write(row)
+
+    def _write(self, row: list) -> int:
+        """Formats a row and writes it to the file buffer, or to the chunk to compress."""
+        self._line.seek(0)
+        self._line.truncate()
+        self._csv_writer.writerow(row)
+        line = self._line.getvalue().encode("utf-8")
+        if self.compressor is not None:
+            self._chunk += line
+        else:
+            self._file.write(line)
+            self._offset += len(line)
+        return len(line)
+
+    def flush(self) -> None:
+        if self._chunk:
+            frame = self.compressor.compress(bytes(self._chunk))
+            if self._chunk_time is not None:
+                self.index.add(self._chunk_time, self._offset)
+            self._file.write(frame)
+            self._offset += len(frame)
+            self._chunk.clear()
+            self._chunk_time = None
+        self._file.flush()
+        # After the data, so the index never points past it
+        self.index.flush()
+
+    def fsync(self) -> None:
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        self.flush()
+        self._file.close()
+        self._file = None
+        self.index.close()
+
+    @classmethod
+    def read_range(
+        cls, path: str, start_time: float, end_time: float
+    ) -> Iterator[tuple[float, Union[float, str, None], str]]:
+        """Reads the rows of a recording file within a time range, seeking to the range with the
+        time index of the file. Only the flushed rows (or complete frames) are read.
+
+        Args:
+            path (str): Path of the file, plain or compressed.
+            start_time (float): The start of the range, in seconds.
+            end_time (float): The end of the range, included, in seconds.
+
+        Yields:
+            tuple[float, Union[float, str, None], str]: The time, value and segment UID of each
+            row. Values that are not numbers are left as text, and empty ones are None. The
+            segment UID is empty in files written without it.
+        """
+        offset = TimeIndex.seek_offset(path, start_time)
+        lines = cls._iter_lines(FrameCompressor.iter_decompressed(path, offset=offset))
+        for row in csv.reader(lines):
+            try:
+                timestamp = float(row[0])
+            except (IndexError, ValueError):
+                continue  # The header, or an incomplete last row
+            if timestamp < start_time:
+                continue
+            if timestamp > end_time:
+                return
+            value = row[1] if len(row) > 1 else ""
+            try:
+                value = float(value) if value != "" else None
+            except ValueError:
+                pass
+            yield timestamp, value, row[2] if len(row) > 2 else ""
+
+    @staticmethod
+    def _iter_lines(chunks: Iterator[bytes]) -> Iterator[str]:
+        """Splits chunks of a file into complete lines of text, leaving out an incomplete last
+        line."""
+        rest = b""
+        for chunk in chunks:
+            lines = (rest + chunk).split(b"\n")
+            rest = lines.pop()
+            for line in lines:
+                yield line.decode("utf-8") + "\n"
@@ -0,0 +1,145 @@
+import logging
+import zlib
+from typing import Iterator
+from . import CompressionCodec
+
+try:
+    import zstandard
+except ImportError:  # Optional; ZSTD falls back to GZIP without it
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+
+class FrameCompressor:
+    """Compresses chunks of a recording file into independent frames, and reads them back.
+
+    Every chunk becomes a complete gzip member or Zstandard frame, so a file is readable up to
+    its last complete frame even if the writer was interrupted while writing the next one, and
+    concatenated frames are a valid .gz or .zst file for other tools.
+
+    Attributes:
+        DEFAULT_LEVELS (dict[CompressionCodec, int]): Compression level of each codec, unless
+        configured otherwise.
+        EXTENSIONS (dict[CompressionCodec, str]): File extension of each codec.
+        codec (CompressionCodec): The codec.
+        level (int): The compression level.
+        _zstd_compressor (Union[zstandard.ZstdCompressor, None]): The Zstandard compressor.
+    """
+
+    DEFAULT_LEVELS = {
+        CompressionCodec.NONE: 0,
+        CompressionCodec.GZIP: 6,
+        CompressionCodec.ZSTD: 3,
+    }
+    EXTENSIONS = {
+        CompressionCodec.NONE: "",
+        CompressionCodec.GZIP: ".gz",
+        CompressionCodec.ZSTD: ".zst",
+    }
+
+    def __init__(self, codec: CompressionCodec = CompressionCodec.NONE, level: int = None):
+        """Initializes the FrameCompressor.
+
+        Args:
+            codec (CompressionCodec, optional): The codec. Defaults to NONE.
+            level (int, optional): The compression level. Defaults to None, for the default of
+            the codec.
+        """
+        if codec == CompressionCodec.ZSTD and zstandard is None:
+            logger.error("zstandard is not installed; compressing recordings with gzip instead")
+            codec = CompressionCodec.GZIP
+        self.codec = codec
+        self.level = level if level is not None else self.DEFAULT_LEVELS[codec]
+        self._zstd_compressor = (
+            zstandard.ZstdCompressor(level=self.level) if codec == CompressionCodec.ZSTD else None
+        )
+
+    @property
+    def extension(self) -> str:
+        """The extension added to the names of files written with the codec."""
+        return self.EXTENSIONS[self.codec]
+
+    def compress(self, data: bytes) -> bytes:
+        """Compresses a chunk into a complete frame.
+
+        Args:
+            data (bytes): The chunk.
+
+        Returns:
+            bytes: The frame, or the chunk itself without compression.
+        """
+        match self.codec:
+            case CompressionCodec.GZIP:
+                compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)  # 31: gzip container
+                return compressor.compress(data) + compressor.flush()
+            case CompressionCodec.ZSTD:
+                return self._zstd_compressor.compress(data)
+            case _:
+                return data
+
+    @classmethod
+    def codec_of(cls, path: str) -> CompressionCodec:
+        """Returns the codec of a file, from its extension.
+
+        Args:
+            path (str): Path of the file.
+
+        Returns:
+            CompressionCodec: The codec.
+        """
+        for codec, extension in cls.EXTENSIONS.items():
+            if extension and path.endswith(extension):
+                return codec
+        return CompressionCodec.NONE
+
+    @classmethod
+    def iter_decompressed(
+        cls, path: str, chunk_size: int = 1 << 20, offset: int = 0
+    ) -> Iterator[bytes]:
+        """Reads a file written with a codec, one complete frame at a time. An incomplete last
+        frame, from an interrupted writer, is left out.
+
+        Args:
+            path (str): Path of the file; its extension gives the codec.
+            chunk_size (int, optional): Bytes read from the file at a time. Defaults to 1 MiB.
+            offset (int, optional): Where to start reading; the start of a frame. Defaults to 0.
+
+        Yields:
+            bytes: The decompressed data.
+        """
+        codec = cls.codec_of(path)
+
+        def new_decompressor():
+            if codec == CompressionCodec.ZSTD:
+                return zstandard.ZstdDecompressor().decompressobj()
+            return zlib.decompressobj(31)
+
+        with open(path, "rb") as compressed_file:
+            compressed_file.seek(offset)
+            if codec == CompressionCodec.NONE:
+                while chunk := compressed_file.read(chunk_size):
+                    yield chunk
+                return
+
+            errors = (zlib.error, zstandard.ZstdError) if zstandard is not None else zlib.error
+            decompressor = new_decompressor()
+            frame: list[bytes] = []
+            in_frame = False
+            while chunk := compressed_file.read(chunk_size):
+                while chunk:
+                    in_frame = True
+                    try:
+                        frame.append(decompressor.decompress(chunk))
+                    except errors as e:
+                        logger.error("Corrupt frame in %s: %s", path, e)
+                        return
+                    if not decompressor.eof:
+                        break
+                    yield b"".join(frame)
+                    frame = []
+                    in_frame = False
+                    chunk = decompressor.unused_data
+                    decompressor = new_decompressor()
+            if in_frame:
+                logger.warning("Incomplete last frame of %s left out", path)
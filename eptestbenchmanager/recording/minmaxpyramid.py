@@ -0,0 +1,199 @@
+from typing import Iterable, Union
+
+# A bucket is (time of min, min, time of max, max, sample count); a min or max of None means the
+# bucket holds no numeric value
+Bucket = tuple[float, Union[float, None], float, Union[float, None], int]
+
+
+class MinMaxPyramid:
+    """A multi-resolution min/max envelope of a time series, for display.
+
+    Level k splits the samples into buckets of 2**k consecutive samples and keeps the minimum and
+    maximum of each, with their times. Appending a sample closes at most one bucket per level and
+    each closed bucket is merged into the level above, so appending takes amortized constant time.
+    Once a level holds more than `capacity` buckets it is dropped, as every level above it also
+    covers the whole series with fewer buckets; the memory held stays at about 2 * `capacity`
+    buckets however long the series grows.
+
+    Drawing the minimum and maximum of each bucket keeps every spike visible, at any level. `points`
+    picks the finest level that fits a number of points.
+
+    Values that are None, NaN or not numeric are left out of the minimums and maximums.
+
+    Attributes:
+        capacity (int): The most buckets kept per level.
+        count (int): The number of samples appended.
+        _buckets (list[Union[list[Bucket], None]]): The closed buckets of each level, oldest
+        first, or None for dropped levels.
+        _open (list[Union[Bucket, None]]): The bucket each level is filling, if any.
+        _lowest (int): The finest level not dropped.
+    """
+
+    def __init__(self, capacity: int):
+        """Initializes the MinMaxPyramid.
+
+        Args:
+            capacity (int): The most buckets kept per level.
+        """
+        self.capacity = max(2, capacity)
+        self.count = 0
+        self._buckets: list[Union[list[Bucket], None]] = []
+        self._open: list[Union[Bucket, None]] = []
+        self._lowest = 0
+
+    @staticmethod
+    def _merge(first: Union[Bucket, None], second: Bucket) -> Bucket:
+        """Merges a bucket into the one before it, keeping the earlier of equal extremes."""
+        if first is None:
+            return second
+        t_min, v_min, t_max, v_max, count = first
+        if second[1] is not None and (v_min is None or second[1] < v_min):
+            t_min, v_min = second[0], second[1]
+        if second[3] is not None and (v_max is None or second[3] > v_max):
+            t_max, v_max = second[2], second[3]
+        return (t_min, v_min, t_max, v_max, count + second[4])
+
+    def append(self, timestamp: float, value: Union[float, None]) -> int:
+        """Appends a sample.
+
+        Args:
+            timestamp (float): The time of the sample.
+            value (Union[float, None]): The value of the sample.
+
+        Returns:
+            int: The coarsest level that closed a bucket, or -1 if none did.
+        """
+        if not isinstance(value, (int, float)) or value != value:  # NaN is not equal to itself
+            value = None
+        bucket: Bucket = (timestamp, value, timestamp, value, 1)
+        self.count += 1
+
+        closed = -1
+        level = self._lowest
+        while True:
+            if level == len(self._buckets):
+                self._buckets.append([])
+                self._open.append(None)
+            bucket = self._merge(self._open[level], bucket)
+            if bucket[4] < 2**level:
+                self._open[level] = bucket
+                break
+            self._open[level] = None
+            self._buckets[level].append(bucket)
+            closed = level
+            level += 1
+
+        if len(self._buckets[self._lowest]) > self.capacity:
+            # The level above covers the same samples in half the buckets; its open bucket
+            # absorbs the samples not yet in a closed one
+            lowest = self._lowest
+            if self._open[lowest] is not None:
+                self._open[lowest + 1] = self._merge(self._open[lowest + 1], self._open[lowest])
+            self._lowest = lowest + 1
+            self._buckets[lowest] = None
+            self._open[lowest] = None
+        return closed
+
+    def level_for(self, max_points: int) -> int:
+        """Returns the finest level that covers the whole series in at most `max_points` points.
+
+        Args:
+            max_points (int): The most points wanted.
+
+        Returns:
+            int: The level.
+        """
+        for level in range(self._lowest, len(self._buckets)):
+            buckets = self._buckets[level]
+            if buckets is not None and 2 * (len(buckets) + 1) <= max_points:
+                return level
+        return max(self._lowest, len(self._buckets) - 1)
+
+    @staticmethod
+    def bucket_points(bucket: Bucket) -> tuple[list[float], list[Union[float, None]]]:
+        """Returns the points that draw a bucket: its minimum and maximum, in time order.
+
+        Args:
+            bucket (Bucket): The bucket.
+
+        Returns:
+            tuple[list[float], list[Union[float, None]]]: The times and values of the points.
+        """
+        t_min, v_min, t_max, v_max, _ = bucket
+        if v_min is None or t_min == t_max:
+            return [t_min], [v_min]
+        if t_min < t_max:
+            return [t_min, t_max], [v_min, v_max]
+        return [t_max, t_min], [v_max, v_min]
+
+    def last_closed(self, level: int) -> Union[Bucket, None]:
+        """Returns the newest closed bucket of a level.
+
+        Args:
+            level (int): The level.
+
+        Returns:
+            Union[Bucket, None]: The bucket, or None if the level has none or was dropped.
+        """
+        buckets = self._buckets[level] if level < len(self._buckets) else None
+        return buckets[-1] if buckets else None
+
+    @classmethod
+    def decimate(
+        cls, samples: Iterable[tuple[float, Union[float, None]]], max_points: Union[int, None]
+    ) -> tuple[list[float], list[Union[float, None]]]:
+        """Collects a stream of samples, decimated to the envelope that fits `max_points`.
+
+        The samples are appended to a pyramid of about as many buckets as half the points, so
+        memory stays bounded however many samples are streamed.
+
+        Args:
+            samples (Iterable[tuple[float, Union[float, None]]]): The times and values.
+            max_points (Union[int, None]): The most points wanted, or None for every sample.
+
+        Returns:
+            tuple[list[float], list[Union[float, None]]]: The times and values of the points.
+        """
+        if max_points is None:
+            times: list[float] = []
+            values: list[Union[float, None]] = []
+            for sample_time, value in samples:
+                times.append(sample_time)
+                values.append(value)
+            return times, values
+        pyramid = cls(max(1, max_points // 2))
+        for sample_time, value in samples:
+            pyramid.append(sample_time, value)
+        return pyramid.points(max_points)
+
+    def points(self, max_points: int) -> tuple[list[float], list[Union[float, None]]]:
+        """Returns the envelope of the whole series at the finest level that fits `max_points`.
+
+        Args:
+            max_points (int): The most points wanted.
+
+        Returns:
+            tuple[list[float], list[Union[float, None]]]: The times and values of the points,
+            oldest first.
+        """
+        times: list[float] = []
+        values: list[Union[float, None]] = []
+        if self.count == 0:
+            return times, values
+        level = self.level_for(max_points)
+        for bucket in list(self._buckets[level] or ()):
+            bucket_times, bucket_values = self.bucket_points(bucket)
+            times += bucket_times
+            values += bucket_values
+
+        # The samples after the last closed bucket are in the open buckets of this level and the
+        # ones below it
+        tail = None
+        for open_bucket in self._open[level::-1]:
+            if open_bucket is not None:
+                tail = self._merge(tail, open_bucket)
+        if tail is not None:
+            tail_times, tail_values = self.bucket_points(tail)
+            times += tail_times
+            values += tail_values
+        return times, values
@@ -1,10 +1,19 @@
 import logging
 import time
-import csv
 import os
-import atexit
-from typing import TYPE_CHECKING
+from typing import Iterator, Union, TYPE_CHECKING
+import numpy as np
 from eptestbenchmanager.dashboard.elements import RecordingGraph
+from . import (
+    RingBuffer,
+    MinMaxPyramid,
+    CompressionCodec,
+    RecordingFormat,
+    CsvRecordingFile,
+    BinaryRecordingFile,
+    RunLog,
+    RunLogChannel,
+)
 
 if TYPE_CHECKING:
     from eptestbenchmanager.connections import VirtualInstrument
@@ -26,14 +35,14 @@ class Recording:
         _rolling: Whether the recording is rolling.
         t0: The start time for displaying.
         _start_time: The start time of the recording.
-        _samples: The list of recorded samples.
-        _times: The list of recorded times, in timestamp format
+        _first_time: The time of the first sample, for recordings that are not rolling.
+        _last_time: The time of the latest sample.
+        _pyramid: The min/max envelope of the samples of recordings that are not rolling, at
+        the resolutions graphs can ask for.
+        _display_level: The level of the pyramid whose buckets are streamed to the graph.
+        _buffer: The ring buffer holding the latest samples and times of rolling recordings.
         _display_times: The list of times, in human-readable format.
         _sample_count: The current count of recorded samples.
-        _sample_averaging_level: The current level of sample averaging.
-        _sample_average: The current average of samples.
-        _time_average: The current average of times.
-        _sample_average_count: The current count of sample averages.
         _recording: Whether the recording is active.
         _using_relative_time: Whether to use relative time in formatting times for display.
         record_id: The ID of the record.
@@ -42,7 +51,13 @@ class Recording:
         uid: The UID of the recording.
         name: The name of the recording.
         log_dir: The directory for logs.
-        _file_id: The full internal ID of the file.
+        record_format: The format the recording is written in.
+        _compressor: Compresses the record file as it is written, for the CSV format, if
+        configured.
+        _segment_uid_column: Whether rows are written with the segment UID; CSV files leave it
+        out unless configured, as the run's segment boundary log gives it from the time.
+        _file_id: The full internal path of the file (a directory for the binary format, and the
+        path of the run log channel for the multiplexed format).
         graph: The recording graph instance.
     """
 
@@ -58,6 +73,7 @@ class Recording:
         rolling=False,
         t0=None,
         file_id: str = None,
+        record_format: Union[RecordingFormat, None] = None,
     ):
         """
         Initializes a new instance of the Recording class.
@@ -68,13 +84,16 @@ class Recording:
             record_name: The name of the record.
             virtual_instrument: The virtual instrument instance.
             max_samples: The maximum number of samples to record.
-            stored_samples: The number of samples to store.
+            stored_samples: The number of samples to store for rolling recordings; recordings that
+            are not rolling are displayed with about twice as many points (a minimum and a
+            maximum per bucket of samples).
             max_time_s: The maximum time to record.
             rolling: Whether the recording is rolling.
             t0: The start time for displaying.
             file_id: The ID of the file.
-            _file: The actual file object.
-            _csv_writer: The CSV writer object.
+            record_format: The file format. Defaults to None, for the default format of the
+            recording writer.
+            _file: The recording file, written by the shared recording writer.
         """
         self.testbench_manager = testbench_manager
         self.virtual_instrument = virtual_instrument
@@ -85,14 +104,13 @@ class Recording:
         self._rolling = rolling
         self.t0 = t0
         self._start_time = None
-        self._samples = []
-        self._times = []
+        self._first_time = None
+        self._last_time = None
+        self._pyramid = None if rolling else MinMaxPyramid(stored_samples)
+        self._display_level = 0
+        self._buffer = RingBuffer(stored_samples) if rolling else None
         self._display_times = []
         self._sample_count = 0
-        self._sample_averaging_level = 1
-        self._sample_average = 0
-        self._time_average = 0
-        self._sample_average_count = 0
         self._start_time = None
         self._recording = False
         self._using_relative_time = self._rolling
@@ -105,14 +123,28 @@ class Recording:
             os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "logs"
         )
         os.makedirs(self.log_dir, exist_ok=True)
-        self._file_id = f"{self.log_dir}/{self.file_id}_{self.instrument_uid}_{time.strftime('%Y%m%d_%H%M%S')}.csv"  # pylint: disable=line-too-long
+        self._writer = self.testbench_manager.recording_writer
+        self.record_format = record_format or self._writer.default_format
+        compressor = self._writer.compressor
+        self._compressor = compressor if compressor.codec != CompressionCodec.NONE else None
+        # The other formats store a compact segment index rather than the UID
+        self._segment_uid_column = (
+            self.record_format != RecordingFormat.CSV or self._writer.segment_uid_column
+        )
+        match self.record_format:
+            case RecordingFormat.BINARY:
+                extension = BinaryRecordingFile.EXTENSION
+            case RecordingFormat.MULTIPLEXED:
+                extension = ""
+            case _:
+                extension = ".csv" + compressor.extension
+        self._file_id = f"{self.log_dir}/{self.file_id}_{self.instrument_uid}_{time.strftime('%Y%m%d_%H%M%S')}{extension}"  # pylint: disable=line-too-long
 
         self.graph = self.testbench_manager.dashboard.create_element(
             RecordingGraph, (self.uid, self)
         )
 
         self._file = None  # will be set in start_recording
-        self._csv_writer = None  # will be set in start_recording
 
     @property
     def active(self):
@@ -136,9 +168,12 @@ class Recording:
         Gets the recorded samples.
 
         Returns:
-            list: The list of recorded samples.
+            Union[list, np.ndarray]: The min/max envelope of the recorded samples, or for rolling
+            recordings a snapshot of the ring buffer.
         """
-        return self._samples
+        if self._rolling:
+            return self._buffer.snapshot()[1]
+        return self.snapshot()[1]
 
     @property
     def times(self):
@@ -146,9 +181,198 @@ class Recording:
         Gets the recorded times.
 
         Returns:
-            list: The list of recorded times.
+            Union[list, np.ndarray]: The times of the min/max envelope of the recorded samples, or
+            for rolling recordings a snapshot of the ring buffer.
+        """
+        if self._rolling:
+            return self._buffer.snapshot()[0]
+        return self.snapshot()[0]
+
+    @property
+    def stored_samples(self) -> int:
+        """
+        Gets the number of samples held for display, which graphs get about twice as many
+        points as for recordings that are not rolling.
+
+        Returns:
+            int: The number of samples.
+        """
+        return self._stored_samples
+
+    @property
+    def sample_count(self) -> int:
+        """
+        Gets the number of samples added, which is also the index of the next sample in the
+        record file.
+
+        Returns:
+            int: The number of samples.
+        """
+        return self._sample_count
+
+    @property
+    def file_path(self) -> str:
+        """
+        Gets the path of the record file.
+
+        Returns:
+            str: The path (a directory for the binary format, and the path of the run log
+            channel for the multiplexed format).
+        """
+        return self._file_id
+
+    @property
+    def first_time(self) -> Union[float, None]:
+        """
+        Gets the time of the oldest sample held.
+
+        Returns:
+            Union[float, None]: The time of the oldest sample, or None if there is none.
+        """
+        if self._rolling:
+            times, _ = self._buffer.snapshot()
+            return float(times[0]) if len(times) > 0 else None
+        return self._first_time
+
+    @property
+    def last_time(self) -> Union[float, None]:
+        """
+        Gets the time of the latest sample added.
+
+        Returns:
+            Union[float, None]: The time of the latest sample, or None if there is none.
+        """
+        return self._last_time
+
+    def snapshot(self, max_points: Union[int, None] = None) -> tuple[list, list]:
+        """
+        Gets a copy of the recorded times and samples, for serialization. For rolling recordings
+        the copy is consistent even while samples are being added.
+
+        Recordings that are not rolling return the minimum and maximum of buckets of samples, at
+        the finest resolution that fits `max_points`, so spikes are kept however long the
+        recording is.
+
+        Args:
+            max_points: The most points wanted, e.g. twice the pixel width of a graph. Defaults
+            to None, for twice the number of stored samples. Ignored for rolling recordings.
+
+        Returns:
+            tuple[list, list]: The recorded times and samples, with missing samples as None.
+        """
+        if self._rolling:
+            return self._buffer.to_lists()
+        return self._pyramid.points(max_points or 2 * self._stored_samples)
+
+    def history(
+        self, start: int = 0, stop: Union[int, None] = None
+    ) -> tuple[np.ndarray, Union[np.ndarray, list]]:
+        """
+        Gets a range of the full-resolution samples written to the record file, without loading
+        the rest of it. The numeric arrays are read-only memory maps of the file, so they may be
+        taken while the recording is being written; samples are included once they are flushed.
+
+        Args:
+            start: First sample, counted from the end if negative. Defaults to 0.
+            stop: Sample after the last one, counted from the end if negative. Defaults to None,
+            for the last sample flushed.
+
+        Returns:
+            tuple[np.ndarray, Union[np.ndarray, list]]: The times, in int64 nanoseconds since the
+            epoch, and the samples.
+
+        Raises:
+            ValueError: If the recording is not written in the binary format.
+        """
+        if self._rolling or self.record_format != RecordingFormat.BINARY:
+            raise ValueError(f"Recording {self.uid} has no binary record file")
+        times, values, _, _ = BinaryRecordingFile.map(self._file_id, start, stop)
+        return times, values
+
+    @property
+    def history_length(self) -> int:
+        """
+        Gets the number of samples flushed to the record file that `history` can return.
+
+        Returns:
+            int: The number of samples, or 0 if the recording is not written in the binary format.
+        """
+        if self._rolling or self.record_format != RecordingFormat.BINARY:
+            return 0
+        return BinaryRecordingFile.row_count(self._file_id)
+
+    def read_range(
+        self, start_time: float, end_time: float, max_points: Union[int, None] = None
+    ) -> tuple[list, list]:
+        """
+        Gets the samples of the recording within a time range, reading only the part of the
+        record file around the range: binary record files are searched by time, and CSV record
+        files are read from the entry of their sparse time index just before the range. Samples
+        are included once they are flushed. Rolling recordings are read from their ring buffer.
+
+        Args:
+            start_time: The start of the range, in seconds since the epoch.
+            end_time: The end of the range, included, in seconds since the epoch.
+            max_points: The most points wanted. Defaults to None, for every sample; otherwise
+            the samples are streamed through a min/max envelope and decimated to the minimum and
+            maximum of buckets of samples, so spikes are kept.
+
+        Returns:
+            tuple[list, list]: The times, in seconds since the epoch, and the samples, with
+            missing samples as None.
+        """
+        return MinMaxPyramid.decimate(self.iter_range(start_time, end_time), max_points)
+
+    def iter_range(
+        self, start_time: float, end_time: float
+    ) -> Iterator[tuple[float, Union[float, str, None]]]:
         """
-        return self._times
+        Streams the samples of the recording within a time range. See `read_range`.
+
+        Args:
+            start_time: The start of the range, in seconds since the epoch.
+            end_time: The end of the range, included, in seconds since the epoch.
+
+        Returns:
+            Iterator[tuple[float, Union[float, str, None]]]: The time and value of each sample.
+        """
+        samples = iter(())
+        if self._rolling:
+            times, values = self._buffer.to_lists()
+            samples = (
+                (sample_time, value)
+                for sample_time, value in zip(times, values)
+                if start_time <= sample_time <= end_time
+            )
+        else:
+            match self.record_format:
+                case RecordingFormat.BINARY:
+                    start, stop = BinaryRecordingFile.find_rows(self._file_id, start_time, end_time)
+                    times, values, _, _ = BinaryRecordingFile.map(self._file_id, start, stop)
+                    if isinstance(values, np.ndarray):
+                        values = values.tolist()
+                    # NaN is the only value not equal to itself
+                    values = [None if value != value else value for value in values]
+                    samples = zip((times / 1e9).tolist(), values)
+                case RecordingFormat.MULTIPLEXED:
+                    run_directory, channel = os.path.split(self._file_id)
+                    run_log_path = os.path.join(run_directory, RunLog.FILE_NAME)
+                    if os.path.exists(run_log_path):
+                        samples = (
+                            (sample_time, value)
+                            for sample_time, value, _ in RunLog.read_range(
+                                run_log_path, channel, start_time, end_time
+                            )
+                        )
+                case _:
+                    if os.path.exists(self._file_id):
+                        samples = (
+                            (sample_time, value)
+                            for sample_time, value, _ in CsvRecordingFile.read_range(
+                                self._file_id, start_time, end_time
+                            )
+                        )
+        return samples
 
     @property
     def display_times(self):
@@ -168,12 +392,28 @@ class Recording:
             self._start_time = time.monotonic()
         self._recording = True
         if not self._rolling:
-            os.makedirs(os.path.dirname(self._file_id), exist_ok=True)
-            self._file = open(self._file_id, mode="a", newline="", encoding="utf-8")
-            self._csv_writer = csv.writer(self._file, lineterminator="\n")
-            if self._file.tell() == 0:
-                self._csv_writer.writerow(["Time", "Value", "Segment UID"])
-            atexit.register(self.close_record_file)
+            metadata = {
+                "instrument_uid": self.instrument_uid,
+                "name": self.name,
+                "unit": self.virtual_instrument.unit,
+            }
+            match self.record_format:
+                case RecordingFormat.BINARY:
+                    self._file = self._writer.open(BinaryRecordingFile(self._file_id, metadata))
+                case RecordingFormat.MULTIPLEXED:
+                    # A channel of the run log of the run directory, which stays open until the
+                    # end of the run
+                    run_directory, channel = os.path.split(self._file_id)
+                    run_log = self._writer.run_log(os.path.join(run_directory, RunLog.FILE_NAME))
+                    self._file = self._writer.open(RunLogChannel(run_log, channel, metadata))
+                case _:
+                    # Compressed as configured when the file name was chosen
+                    header = ["Time", "Value"]
+                    if self._segment_uid_column:
+                        header.append("Segment UID")
+                    self._file = self._writer.open(
+                        CsvRecordingFile(self._file_id, header, self._compressor)
+                    )
 
     def stop_recording(self):
         """
@@ -182,7 +422,6 @@ class Recording:
         self._recording = False
         if not self._rolling:
             self.close_record_file()
-            atexit.unregister(self.close_record_file)
 
     def add_sample(self, sample, sample_time=None):
         """
@@ -193,69 +432,50 @@ class Recording:
             sample_time: The time of the sample.
         """
         timestamp = sample_time if sample_time is not None else time.time()
-        current_experiment = self.experiment_manager.get_experiment_current_segment_uid(
-            self.experiment_manager.get_current_experiment_uid()
-        )
         self._sample_count += 1
+        self._last_time = timestamp
 
         if not self._recording:
             logger.error("Add sample being called when recording is not active")
         if not self._rolling:
-            try:
-                self._csv_writer.writerow([timestamp, sample, current_experiment])
-                self._file.flush()
-            except ValueError:
+            if self._file is None:
                 logger.error("Error writing to file (File closed?)")
+            else:
+                row = [timestamp, sample]
+                if self._segment_uid_column:
+                    # Swapped as a whole at segment transitions, so no lock or runner call is
+                    # needed
+                    context = self.experiment_manager.run_context
+                    row.append(
+                        context.segment_uid
+                        if context.experiment_uid is not None
+                        else "No experiment"
+                    )
+                # Queued; the recording writer thread writes and flushes it
+                self._writer.write(self._file, row)
 
-        if self._sample_count <= self._stored_samples:
-            self._append_sample(sample, timestamp)
+        if self._rolling:
+            self._buffer.append(timestamp, sample)
+            self.graph.append_point(timestamp, sample)
         else:
-            if self._rolling:
-                self._samples.pop(0)
-                self._times.pop(0)
-                self._append_sample(sample, timestamp)
-            else:
-                self._sample_average = (
-                    self._sample_average * self._sample_average_count + sample
-                ) / (self._sample_average_count + 1)
-                self._time_average = (
-                    self._time_average * self._sample_average_count + timestamp
-                ) / (self._sample_average_count + 1)
-                self._sample_average_count += 1
-
-                self._samples[-1] = self._sample_average
-                self._times[-1] = self._time_average
-
-                if self._sample_average_count == self._sample_averaging_level:
-                    self._sample_average_count = 0
-                    self._append_sample(self._sample_average, self._time_average)
-                if len(self._samples) > 2 * self._stored_samples:
-                    for i in range(0, len(self._samples) - 1, 2):
-                        self._samples[i] = (self._samples[i] + self._samples[i + 1]) / 2
-                        self._times[i] = (self._times[i] + self._times[i + 1]) / 2
-                    self._samples = self._samples[::2]
-                    self._times = self._times[::2]
-                    self._sample_average_count = 0
-                    self._sample_averaging_level *= 2
-
-                    self._sample_average = sample
-                    self._time_average = timestamp
+            if self._first_time is None:
+                self._first_time = timestamp
+            closed_level = self._pyramid.append(timestamp, sample)
+            bucket = self._pyramid.last_closed(self._display_level)
+            if closed_level >= self._display_level and bucket is not None:
+                for point_time, point_value in zip(*self._pyramid.bucket_points(bucket)):
+                    self.graph.append_point(point_time, point_value)
+            display_level = self._pyramid.level_for(2 * self._stored_samples)
+            if display_level != self._display_level:
+                # The graph has too many points; redraw it at a coarser level
+                self._display_level = display_level
+                self.graph.update()
 
     def close_record_file(self):
         """
-        Closes the record file.
-        """
-        self._file.flush()
-        self._file.close()
-
-    def _append_sample(self, sample, timestamp):
-        """
-        Appends a sample to the recording.
-
-        Args:
-            sample: The sample to append.
-            timestamp: The time of the sample.
+        Closes the record file, waiting (up to a few seconds) for its queued rows to be written.
         """
-        self._samples.append(sample)
-        self._times.append(timestamp)
-        self.graph.append_point(timestamp, sample)
+        if self._file is not None:
+            if not self._writer.close(self._file).wait(5.0):
+                logger.warning("Record file %s is still being written", self._file_id)
+            self._file = None
@@ -0,0 +1,61 @@
+from abc import ABC, abstractmethod
+from time import monotonic
+from typing import Union
+
+
+class RecordingFile(ABC):
+    """A recording file, opened, written, flushed and closed by the recording writer thread.
+
+    Subclasses implement a file format. The writer keeps its flush bookkeeping on the file.
+
+    Attributes:
+        path (str): Path of the file.
+        pending_bytes (int): Bytes written since the last flush.
+        pending_since (Union[float, None]): When the oldest unflushed row was queued, in
+        `time.monotonic()` seconds.
+        last_fsync (float): When the file was last synced to disk, in `time.monotonic()` seconds.
+    """
+
+    def __init__(self, path: str):
+        """Initializes the RecordingFile.
+
+        Args:
+            path (str): Path of the file.
+        """
+        self.path = path
+        self.pending_bytes = 0
+        self.pending_since: Union[float, None] = None
+        self.last_fsync = monotonic()
+
+    @property
+    @abstractmethod
+    def is_open(self) -> bool:
+        """Whether the file is open."""
+
+    @abstractmethod
+    def open(self) -> None:
+        """Opens the file for appending."""
+
+    @abstractmethod
+    def write_row(self, row: list) -> int:
+        """Writes a row of (time in seconds, value, segment UID) to the file buffers. CSV files
+        may be written without the segment UID.
+
+        Args:
+            row (list): The row.
+
+        Returns:
+            int: The number of bytes written.
+        """
+
+    @abstractmethod
+    def flush(self) -> None:
+        """Flushes the file buffers to the operating system."""
+
+    @abstractmethod
+    def fsync(self) -> None:
+        """Syncs the flushed data to disk."""
+
+    @abstractmethod
+    def close(self) -> None:
+        """Closes the file."""
@@ -0,0 +1,17 @@
+from enum import Enum
+
+
+class RecordingFormat(Enum):
+    """
+    Enum for the file format recordings are written in.
+
+    CSV writes one text row per sample, with the time in seconds, the value and the segment UID.
+    BINARY writes a directory of append-only columns (int64 nanosecond timestamps, typed values
+    and a segment index), which is converted to CSV only when it is exported.
+    MULTIPLEXED writes the samples of every recording of a run to channels of one run log, which is
+    split into one CSV file per recording when it is exported.
+    """
+
+    CSV = "csv"
+    BINARY = "binary"
+    MULTIPLEXED = "multiplexed"
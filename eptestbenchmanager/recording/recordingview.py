@@ -0,0 +1,126 @@
+from typing import Union, TYPE_CHECKING
+import numpy as np
+from . import MinMaxPyramid
+
+if TYPE_CHECKING:
+    from . import Recording
+
+
+class RecordingView:
+    """A named recording that is a set of sample ranges of a shared store recording.
+
+    An instrument is recorded once per run, into its store; each record of a segment or of the
+    experiment only remembers which samples of the store were taken while it was active, so
+    overlapping and repeated records cost no extra memory, disk or graphs.
+
+    Attributes:
+        store (Recording): The recording the samples are in.
+        record_id (str): The ID of the record.
+        name (str): The name of the record.
+        ranges (list[list[Union[int, None]]]): The [start, stop) sample indices of the store
+        taken, in order; the stop of the last range is None while the view is active.
+        time_ranges (list[list[Union[float, None]]]): For each range, the time of the last sample
+        of the store before it (None if there was none) and of the last sample in it (None while
+        the view is active), so the range can be read by time.
+    """
+
+    def __init__(self, store: "Recording", record_id: str, record_name: str):
+        """Initializes the RecordingView.
+
+        Args:
+            store (Recording): The recording the samples are in.
+            record_id (str): The ID of the record.
+            record_name (str): The name of the record.
+        """
+        self.store = store
+        self.record_id = record_id
+        self.name = f"{store.virtual_instrument.name} {record_name}"
+        self.ranges: list[list[Union[int, None]]] = []
+        self.time_ranges: list[list[Union[float, None]]] = []
+
+    @property
+    def active(self) -> bool:
+        """Whether the view is taking the samples of the store."""
+        return bool(self.ranges) and self.ranges[-1][1] is None
+
+    def start(self) -> None:
+        """Starts taking the samples of the store from its next sample."""
+        if not self.active:
+            self.ranges.append([self.store.sample_count, None])
+            self.time_ranges.append([self.store.last_time, None])
+
+    def stop(self) -> tuple[int, int]:
+        """Stops taking the samples of the store.
+
+        Returns:
+            tuple[int, int]: The [start, stop) sample indices of the range that ended.
+        """
+        if self.active:
+            self.ranges[-1][1] = self.store.sample_count
+            self.time_ranges[-1][1] = self.store.last_time
+        return tuple(self.ranges[-1]) if self.ranges else (0, 0)
+
+    def index_ranges(self) -> list[tuple[int, int]]:
+        """Gets the sample ranges of the store taken so far.
+
+        Returns:
+            list[tuple[int, int]]: The [start, stop) sample indices.
+        """
+        count = self.store.sample_count
+        return [(start, count if stop is None else stop) for start, stop in self.ranges]
+
+    @property
+    def sample_count(self) -> int:
+        """The number of samples taken."""
+        return sum(stop - start for start, stop in self.index_ranges())
+
+    def history(self) -> tuple[np.ndarray, Union[np.ndarray, list]]:
+        """
+        Gets the full-resolution samples taken, from the record file of the store. See
+        `Recording.history`.
+
+        Returns:
+            tuple[np.ndarray, Union[np.ndarray, list]]: The times, in int64 nanoseconds since the
+            epoch, and the samples.
+
+        Raises:
+            ValueError: If the store is not written in the binary format.
+        """
+        parts = [self.store.history(start, stop) for start, stop in self.index_ranges()]
+        if not parts:
+            return self.store.history(0, 0)
+        times = np.concatenate([part_times for part_times, _ in parts])
+        if all(isinstance(values, np.ndarray) for _, values in parts):
+            return times, np.concatenate([values for _, values in parts])
+        return times, [value for _, values in parts for value in values]
+
+    def read_range(
+        self, start_time: float, end_time: float, max_points: Union[int, None] = None
+    ) -> tuple[list, list]:
+        """
+        Gets the samples taken within a time range, from the record file of the store. Samples
+        of the store from outside the ranges of the view, e.g. from other segments, are left
+        out. See `Recording.read_range`.
+
+        Args:
+            start_time (float): The start of the range, in seconds since the epoch.
+            end_time (float): The end of the range, included, in seconds since the epoch.
+            max_points (Union[int, None], optional): The most points wanted. Defaults to None,
+            for every sample.
+
+        Returns:
+            tuple[list, list]: The times, in seconds since the epoch, and the samples.
+        """
+
+        def samples():
+            for after, until in self.time_ranges:
+                last = end_time if until is None else min(end_time, until)
+                if last < start_time or (after is not None and after >= last):
+                    continue
+                first = start_time if after is None else max(start_time, after)
+                # The samples of the range are those after the last one before it
+                for sample_time, value in self.store.iter_range(first, last):
+                    if after is None or sample_time > after:
+                        yield sample_time, value
+
+        return MinMaxPyramid.decimate(samples(), max_points)
@@ -0,0 +1,318 @@
+import atexit
+import logging
+import os
+from queue import Queue, Empty
+from threading import Thread, Event, Lock
+from time import monotonic
+from typing import Union
+from . import RecordingFile, RecordingFormat, RunLog, CompressionCodec, FrameCompressor
+
+logger = logging.getLogger(__name__)
+
+
+class RecordingWriter:
+    """Writes the files of all recordings from one background thread.
+
+    Recordings only queue their rows; the writer thread takes them off the queue in batches,
+    writes them to buffered files and flushes each file once it holds `flush_bytes` of unflushed
+    rows or its oldest unflushed row is `flush_interval` seconds old. With an `fsync_interval`,
+    flushed files are also synced to disk at most that often, so a crash loses at most about that
+    much data. Opening and closing files is queued too, so rows are always written in order and a
+    file is closed only after all of its rows. The file format is up to the `RecordingFile`.
+
+    The writer also keeps the run logs of multiplexed recordings, one per run directory, open
+    until `close_run_log` is called.
+
+    The queue is bounded by `max_queue`; recording threads wait when it is full.
+
+    Attributes:
+        default_format (RecordingFormat): The format of recordings that do not choose one.
+        compressor (FrameCompressor): Compresses new CSV recordings as they are written.
+        segment_uid_column (bool): Whether new CSV recordings have a segment UID column. Without
+        it, the segment of a sample is found from its time in the `segment_boundaries.csv` log of
+        the run.
+        flush_interval (float): The longest time a row stays unflushed, in seconds.
+        flush_bytes (int): Unflushed bytes in a file that trigger a flush.
+        fsync_interval (Union[float, None]): The shortest time between syncs of a file to disk, in
+        seconds, or None to leave syncing to the operating system.
+        max_queue (int): The most queued operations before recording threads wait.
+        rows_written (int): Rows written so far.
+        bytes_written (int): Bytes written so far.
+        flushes (int): File flushes so far.
+        fsyncs (int): File syncs to disk so far.
+        latency (Union[float, None]): Time from queuing to flushing of the oldest row of the last
+        flush, in seconds.
+        max_latency (float): The longest such time seen, in seconds.
+        _queue (Queue): Queued operations.
+        _files (set[RecordingFile]): The open files.
+        _run_logs (dict[str, RunLog]): The run logs, by path.
+        _run_logs_lock (Lock): Guards the run logs.
+        _metrics_lock (Lock): Guards the metrics.
+        _thread (Thread): The writer thread.
+    """
+
+    BATCH_SIZE = 1000
+
+    def __init__(
+        self,
+        flush_interval: float = 1.0,
+        flush_bytes: int = 65536,
+        fsync_interval: Union[float, None] = None,
+        max_queue: int = 100000,
+    ):
+        """Initializes the RecordingWriter and starts its thread.
+
+        Args:
+            flush_interval (float, optional): The longest time a row stays unflushed, in seconds.
+            Defaults to 1.0.
+            flush_bytes (int, optional): Unflushed bytes in a file that trigger a flush. Defaults
+            to 65536.
+            fsync_interval (Union[float, None], optional): The shortest time between syncs of a
+            file to disk, in seconds. Defaults to None, to leave syncing to the operating system.
+            max_queue (int, optional): The most queued operations before recording threads wait.
+            Defaults to 100000.
+        """
+        self.default_format = RecordingFormat.CSV
+        self.compressor = FrameCompressor()
+        self.segment_uid_column = False
+        self.flush_interval = flush_interval
+        self.flush_bytes = flush_bytes
+        self.fsync_interval = fsync_interval
+        self.max_queue = max_queue
+        self.rows_written = 0
+        self.bytes_written = 0
+        self.flushes = 0
+        self.fsyncs = 0
+        self.latency: Union[float, None] = None
+        self.max_latency = 0.0
+        self._queue: Queue = Queue(max_queue)
+        self._files: set[RecordingFile] = set()
+        self._run_logs: dict[str, RunLog] = {}
+        self._run_logs_lock = Lock()
+        self._metrics_lock = Lock()
+        self._thread = Thread(target=self._write_loop, name="Recording Writer Thread", daemon=True)
+        self._thread.start()
+        atexit.register(self.shutdown)
+
+    def configure(self, config: dict) -> None:
+        """Sets the default format and the flush policy from the `recording_writer` section of
+        the apparatus config.
+
+        Args:
+            config (dict): Optional `format` ("csv", "binary" or "multiplexed"), `compression`
+            of CSV recordings ("none", "gzip" or "zstd") and its `compression_level`,
+            `segment_uid_column` to write the segment UID on every CSV row, `flush_interval` and
+            `fsync_interval` in seconds, and `flush_bytes`. Missing settings get their defaults.
+        """
+        try:
+            self.default_format = RecordingFormat(config.get("format", "csv"))
+        except ValueError:
+            logger.error("Unknown recording format %s, using CSV", config.get("format"))
+            self.default_format = RecordingFormat.CSV
+        try:
+            self.compressor = FrameCompressor(
+                CompressionCodec(config.get("compression", "none")),
+                config.get("compression_level", None),
+            )
+        except ValueError:
+            logger.error("Unknown recording compression %s, using none", config.get("compression"))
+            self.compressor = FrameCompressor()
+        self.segment_uid_column = bool(config.get("segment_uid_column", False))
+        self.flush_interval = config.get("flush_interval", 1.0)
+        self.flush_bytes = config.get("flush_bytes", 65536)
+        self.fsync_interval = config.get("fsync_interval", None)
+
+    def open(self, file: RecordingFile) -> RecordingFile:
+        """Queues the opening of a recording file, for appending.
+
+        Args:
+            file (RecordingFile): The file.
+
+        Returns:
+            RecordingFile: The file, to pass to `write` and `close`.
+        """
+        self._queue.put(("open", file, None, monotonic()))
+        return file
+
+    def run_log(self, path: str) -> RunLog:
+        """Returns the run log at a path, queuing its opening if it is not open yet.
+
+        Args:
+            path (str): Path of the run log.
+
+        Returns:
+            RunLog: The run log, for the channels of multiplexed recordings.
+        """
+        path = os.path.realpath(path)
+        with self._run_logs_lock:
+            if path not in self._run_logs:
+                self._run_logs[path] = self.open(RunLog(path))
+            return self._run_logs[path]
+
+    def close_run_log(self, path: str) -> Union[Event, None]:
+        """Queues the closing of a run log, after the rows of its channels already queued.
+
+        Args:
+            path (str): Path of the run log.
+
+        Returns:
+            Union[Event, None]: Set once the run log is closed, or None if it is not open.
+        """
+        with self._run_logs_lock:
+            run_log = self._run_logs.pop(os.path.realpath(path), None)
+        return self.close(run_log) if run_log is not None else None
+
+    def write(self, file: RecordingFile, row: list) -> None:
+        """Queues a row for a recording file.
+
+        Args:
+            file (RecordingFile): The file.
+            row (list): The row.
+        """
+        self._queue.put(("row", file, row, monotonic()))
+
+    def close(self, file: RecordingFile) -> Event:
+        """Queues the closing of a recording file, after its queued rows.
+
+        Args:
+            file (RecordingFile): The file.
+
+        Returns:
+            Event: Set once the file is closed.
+        """
+        closed = Event()
+        self._queue.put(("close", file, closed, monotonic()))
+        return closed
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Writes everything queued, closes all files and stops the writer thread.
+
+        Args:
+            timeout (float, optional): The longest time to wait, in seconds. Defaults to 5.0.
+        """
+        if self._thread.is_alive():
+            self._queue.put(("shutdown", None, None, monotonic()))
+            self._thread.join(timeout)
+
+    def metrics(self) -> dict:
+        """Returns the queue depth and write statistics of the writer.
+
+        Returns:
+            dict: `queue_depth`, `rows_written`, `bytes_written`, `flushes`, `fsyncs`, and the last
+            and longest `latency` from queuing a row to flushing it, in seconds.
+        """
+        with self._metrics_lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "rows_written": self.rows_written,
+                "bytes_written": self.bytes_written,
+                "flushes": self.flushes,
+                "fsyncs": self.fsyncs,
+                "latency": self.latency,
+                "max_latency": self.max_latency,
+            }
+
+    def _write_loop(self) -> None:
+        """Runs the queued operations in batches and flushes files as they become due."""
+        while True:
+            try:
+                batch = [self._queue.get(timeout=self._time_to_next_flush())]
+            except Empty:
+                batch = []
+            while len(batch) < self.BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except Empty:
+                    break
+
+            for operation, file, argument, queued in batch:
+                try:
+                    match operation:
+                        case "open":
+                            self._open(file)
+                        case "row":
+                            self._write_row(file, argument, queued)
+                        case "close":
+                            self._close(file)
+                            argument.set()
+                        case "shutdown":
+                            self._close_all()
+                            return
+                except (OSError, ValueError) as e:
+                    logger.error("Error writing recording file %s: %s", file.path, e)
+                    if operation == "close":
+                        argument.set()
+
+            now = monotonic()
+            for open_file in list(self._files):
+                if self._flush_due(open_file, now):
+                    self._flush(open_file, now)
+
+    def _time_to_next_flush(self) -> Union[float, None]:
+        """Returns how long until the next file is due for a flush, or None if none will be."""
+        pending = [file.pending_since for file in self._files if file.pending_since is not None]
+        if not pending:
+            return None
+        return max(0.0, min(pending) + self.flush_interval - monotonic())
+
+    def _flush_due(self, file: RecordingFile, now: float) -> bool:
+        """Returns whether a file must be flushed now."""
+        return file.pending_since is not None and (
+            file.pending_bytes >= self.flush_bytes
+            or now - file.pending_since >= self.flush_interval
+        )
+
+    def _open(self, file: RecordingFile) -> None:
+        """Opens a file for appending."""
+        file.open()
+        self._files.add(file)
+
+    def _write_row(self, file: RecordingFile, row: list, queued: float) -> None:
+        """Writes a row to the buffers of a file."""
+        if not file.is_open:
+            raise ValueError("file is not open")
+        written = file.write_row(row)
+        file.pending_bytes += written
+        if file.pending_since is None:
+            file.pending_since = queued
+        with self._metrics_lock:
+            self.rows_written += 1
+            self.bytes_written += written
+
+    def _flush(self, file: RecordingFile, now: float) -> None:
+        """Flushes a file, and syncs it to disk if the fsync interval has elapsed."""
+        file.flush()
+        latency = now - file.pending_since
+        synced = False
+        if self.fsync_interval is not None and now - file.last_fsync >= self.fsync_interval:
+            file.fsync()
+            file.last_fsync = now
+            synced = True
+        file.pending_bytes = 0
+        file.pending_since = None
+        with self._metrics_lock:
+            self.flushes += 1
+            self.fsyncs += synced
+            self.latency = latency
+            self.max_latency = max(self.max_latency, latency)
+
+    def _close_all(self) -> None:
+        """Closes every open file."""
+        for file in list(self._files):
+            try:
+                self._close(file)
+            except (OSError, ValueError) as e:
+                logger.error("Error closing recording file %s: %s", file.path, e)
+
+    def _close(self, file: RecordingFile) -> None:
+        """Flushes, syncs if enabled, and closes a file."""
+        if not file.is_open:
+            return
+        if file.pending_since is not None:
+            self._flush(file, monotonic())
+        if self.fsync_interval is not None:
+            file.fsync()
+            with self._metrics_lock:
+                self.fsyncs += 1
+        file.close()
+        self._files.discard(file)
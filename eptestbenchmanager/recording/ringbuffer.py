@@ -0,0 +1,104 @@
+from typing import Union
+import numpy as np
+
+
+class RingBuffer:
+    """A fixed-size, preallocated buffer of the latest timestamped samples.
+
+    Every sample is written twice, at its slot and at the same slot in a mirror half, so the
+    samples in chronological order are always one contiguous slice of the arrays. Appending is
+    O(1) and `view` returns ordered arrays without copying.
+
+    There is a single producer. Readers on other threads take `snapshot`s, which are made
+    consistent with a sequence lock: the sequence number is odd while a sample is being written,
+    and a copy is retried if the number changed while it was taken.
+
+    Values are stored as floats (None as NaN) until a non-numeric value is appended, after which
+    the buffer holds Python objects.
+
+    Attributes:
+        capacity (int): The number of samples kept.
+        _times (np.ndarray): The timestamps, twice over.
+        _values (np.ndarray): The values, twice over.
+        _count (int): The number of samples ever appended.
+        _sequence (int): The sequence lock; odd while a sample is being written.
+    """
+
+    def __init__(self, capacity: int):
+        """Initializes the RingBuffer.
+
+        Args:
+            capacity (int): The number of samples kept.
+        """
+        self.capacity = max(1, capacity)
+        self._times = np.full(2 * self.capacity, np.nan)
+        self._values = np.full(2 * self.capacity, np.nan)
+        self._count = 0
+        self._sequence = 0
+
+    def __len__(self) -> int:
+        return min(self._count, self.capacity)
+
+    def append(self, timestamp: float, value: Union[str, int, float, bool, None]) -> None:
+        """Appends a sample, replacing the oldest one once the buffer is full.
+
+        Args:
+            timestamp (float): The time of the sample.
+            value (Union[str, int, float, bool, None]): The value of the sample.
+        """
+        self._sequence += 1
+        if self._values.dtype != object:
+            if value is None:
+                value = np.nan
+            elif not isinstance(value, (int, float, np.number)):
+                self._values = self._values.astype(object)
+        index = self._count % self.capacity
+        self._times[index] = self._times[index + self.capacity] = timestamp
+        self._values[index] = self._values[index + self.capacity] = value
+        self._count += 1
+        self._sequence += 1
+
+    def view(self) -> tuple[np.ndarray, np.ndarray]:
+        """Returns the timestamps and values, oldest first, without copying.
+
+        The arrays are read-only views of the buffer; their contents change as samples are
+        appended. Use `snapshot` to keep them or to read from another thread.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The timestamps and the values.
+        """
+        count = self._count
+        length = min(count, self.capacity)
+        start = (count - length) % self.capacity
+        times = self._times[start : start + length]
+        values = self._values[start : start + length]
+        times.flags.writeable = False
+        values.flags.writeable = False
+        return times, values
+
+    def snapshot(self) -> tuple[np.ndarray, np.ndarray]:
+        """Returns a consistent copy of the timestamps and values, oldest first. Safe to call
+        while the producer is appending.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The timestamps and the values.
+        """
+        while True:
+            sequence = self._sequence
+            if sequence % 2 == 0:
+                times, values = self.view()
+                times, values = times.copy(), values.copy()
+                if self._sequence == sequence:
+                    return times, values
+
+    def to_lists(self) -> tuple[list, list]:
+        """Returns a consistent copy of the timestamps and values as lists, with missing values as
+        None, for serialization.
+
+        Returns:
+            tuple[list, list]: The timestamps and the values.
+        """
+        times, values = self.snapshot()
+        # NaN is the only value not equal to itself
+        values = [None if value != value else value for value in values.tolist()]
+        return times.tolist(), values
@@ -0,0 +1,315 @@
+import csv
+import io
+import json
+import logging
+import os
+import struct
+from typing import Iterator, Union
+from . import RecordingFile
+
+logger = logging.getLogger(__name__)
+
+
+class RunLog(RecordingFile):
+    """A single append-only file holding the samples of every recording of a run.
+
+    Recordings in the multiplexed format write to channels of the run log of their run directory
+    instead of opening files of their own, so a run keeps one file open however many recordings
+    its segments start and stop. The log is written only by the recording writer thread, and is
+    split into one CSV file per channel when it is exported.
+
+    The file starts with `MAGIC`, followed by records that each start with a one-byte tag:
+
+    - `C`: declares a channel: uint32 channel ID, uint16 length, and JSON metadata with the
+      channel `name` (the name of its export file) and the instrument UID, name and unit.
+    - `G`: declares a segment: int32 segment index, uint16 length, and the segment UID.
+    - `S`: a sample: uint32 channel ID, int64 nanoseconds since the epoch, int32 segment index (-1
+      for none) and a value tag: `f` followed by a float64, `n` for None, or `j` followed by a
+      uint32 length and a JSON value.
+
+    All numbers are little-endian. A crash leaves at most an incomplete last record, which
+    readers ignore and `open` truncates.
+
+    Attributes:
+        MAGIC (bytes): The start of every run log.
+        FILE_NAME (str): Name of the run log in a run directory.
+        channels (dict[str, int]): The ID of each channel, by name.
+        _segments (dict[Union[str, None], int]): The index of each segment UID declared.
+        _file (Union[io.BufferedWriter, None]): The open file.
+        _dirty (bool): Whether data was written since the last flush.
+    """
+
+    MAGIC = b"EPRUNLOG1\n"
+    FILE_NAME = "run.eplog"
+    _CHANNEL = struct.Struct("<IH")
+    _SEGMENT = struct.Struct("<iH")
+    _SAMPLE = struct.Struct("<Iqic")
+    _FLOAT = struct.Struct("<d")
+    _LENGTH = struct.Struct("<I")
+
+    def __init__(self, path: str):
+        """Initializes the RunLog.
+
+        Args:
+            path (str): Path of the run log.
+        """
+        super().__init__(path)
+        self.channels: dict[str, int] = {}
+        self._segments: dict[Union[str, None], int] = {None: -1}
+        self._file: Union[io.BufferedWriter, None] = None
+        self._dirty = False
+
+    @property
+    def is_open(self) -> bool:
+        return self._file is not None
+
+    def open(self) -> None:
+        """Opens the run log for appending, picking up the channels and segments of an existing
+        log and dropping an incomplete last record."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        end = 0
+        if os.path.exists(self.path):
+            for end, kind, fields in self.read_records(self.path):
+                if kind == "C":
+                    self.channels[fields[1]] = fields[0]
+                elif kind == "G":
+                    self._segments[fields[1]] = fields[0]
+        self._file = open(self.path, "ab")  # pylint: disable=consider-using-with
+        if end:
+            self._file.truncate(end)
+            self._file.seek(end)
+        else:
+            self._file.truncate(0)
+            self._file.write(self.MAGIC)
+
+    def declare_channel(self, name: str, metadata: dict) -> int:
+        """Returns the ID of a channel, declaring it if it is new.
+
+        Args:
+            name (str): Name of the channel, and of its file when the log is exported.
+            metadata (dict): Instrument UID, name and unit of the channel.
+
+        Returns:
+            int: The channel ID.
+        """
+        if name not in self.channels:
+            self.channels[name] = len(self.channels)
+            encoded = json.dumps({"name": name} | metadata).encode("utf-8")
+            self._file.write(b"C" + self._CHANNEL.pack(self.channels[name], len(encoded)) + encoded)
+            self._dirty = True
+        return self.channels[name]
+
+    def write_row(self, row: list) -> int:
+        """Writes a row of (channel ID, time in seconds, value, segment UID) to the file buffer.
+
+        Args:
+            row (list): The row.
+
+        Returns:
+            int: The number of bytes written.
+        """
+        channel_id, timestamp, value, segment = row
+        written = 0
+        if segment not in self._segments:
+            self._segments[segment] = len(self._segments) - 1
+            encoded = str(segment).encode("utf-8")
+            record = b"G" + self._SEGMENT.pack(self._segments[segment], len(encoded)) + encoded
+            self._file.write(record)
+            written += len(record)
+
+        if value is None:
+            value_tag, payload = b"n", b""
+        elif isinstance(value, (int, float)):
+            value_tag, payload = b"f", self._FLOAT.pack(value)
+        else:
+            encoded = json.dumps(value).encode("utf-8")
+            value_tag, payload = b"j", self._LENGTH.pack(len(encoded)) + encoded
+        record = (
+            b"S"
+            + self._SAMPLE.pack(
+                channel_id, round(timestamp * 1e9), self._segments[segment], value_tag
+            )
+            + payload
+        )
+        self._file.write(record)
+        self._dirty = True
+        return written + len(record)
+
+    def flush(self) -> None:
+        if self._dirty:
+            self._file.flush()
+            self._dirty = False
+
+    def fsync(self) -> None:
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        self._file.close()
+        self._file = None
+        self._dirty = False
+
+    @classmethod
+    def read_records(cls, path: str) -> Iterator[tuple[int, str, tuple]]:
+        """Reads the complete records of a run log, in order.
+
+        Args:
+            path (str): Path of the run log.
+
+        Yields:
+            tuple[int, str, tuple]: The offset of the end of the record, its tag, and its fields:
+            (channel ID, name, metadata) for `C`, (segment index, segment UID) for `G`, and
+            (channel ID, nanoseconds, segment index, value) for `S`.
+        """
+        with open(path, "rb") as log_file:
+            reader = io.BufferedReader(log_file, buffer_size=1 << 20)
+            if reader.read(len(cls.MAGIC)) != cls.MAGIC:
+                logger.error("%s is not a run log", path)
+                return
+            offset = len(cls.MAGIC)
+
+            def read(size: int) -> bytes:
+                data = reader.read(size)
+                if len(data) < size:
+                    raise EOFError
+                return data
+
+            while True:
+                try:
+                    tag = reader.read(1)
+                    if not tag:
+                        return
+                    match tag:
+                        case b"S":
+                            header = read(cls._SAMPLE.size)
+                            channel_id, time_ns, segment, value_tag = cls._SAMPLE.unpack(header)
+                            size = 1 + cls._SAMPLE.size
+                            match value_tag:
+                                case b"f":
+                                    value = cls._FLOAT.unpack(read(cls._FLOAT.size))[0]
+                                    size += cls._FLOAT.size
+                                case b"n":
+                                    value = None
+                                case _:
+                                    (length,) = cls._LENGTH.unpack(read(cls._LENGTH.size))
+                                    value = json.loads(read(length))
+                                    size += cls._LENGTH.size + length
+                            fields = (channel_id, time_ns, segment, value)
+                        case b"C":
+                            channel_id, length = cls._CHANNEL.unpack(read(cls._CHANNEL.size))
+                            metadata = json.loads(read(length))
+                            fields = (channel_id, metadata["name"], metadata)
+                            size = 1 + cls._CHANNEL.size + length
+                        case b"G":
+                            segment, length = cls._SEGMENT.unpack(read(cls._SEGMENT.size))
+                            fields = (segment, read(length).decode("utf-8"))
+                            size = 1 + cls._SEGMENT.size + length
+                        case _:
+                            logger.error("Corrupt record in %s at offset %d", path, offset)
+                            return
+                except EOFError:
+                    return
+                offset += size
+                yield offset, tag.decode(), fields
+
+    @classmethod
+    def split_csv(cls, path: str, directory: str) -> list[str]:
+        """Splits a run log into one CSV file per channel, in one pass.
+
+        The CSV files have the same columns as recordings written in CSV format.
+
+        Args:
+            path (str): Path of the run log.
+            directory (str): Directory to write `<channel name>.csv` files to.
+
+        Returns:
+            list[str]: The paths of the CSV files written.
+        """
+        files: dict[int, tuple] = {}
+        segments: dict[int, Union[str, None]] = {-1: None}
+        try:
+            for _, kind, fields in cls.read_records(path):
+                match kind:
+                    case "C":
+                        csv_path = os.path.join(directory, f"{fields[1]}.csv")
+                        os.makedirs(os.path.dirname(csv_path), exist_ok=True)
+                        csv_file = open(csv_path, "w", newline="", encoding="utf-8")  # pylint: disable=consider-using-with
+                        writer = csv.writer(csv_file, lineterminator="\n")
+                        writer.writerow(["Time", "Value", "Segment UID"])
+                        files[fields[0]] = (csv_path, csv_file, writer)
+                    case "G":
+                        segments[fields[0]] = fields[1]
+                    case "S":
+                        channel_id, time_ns, segment, value = fields
+                        files[channel_id][2].writerow([time_ns / 1e9, value, segments[segment]])
+        finally:
+            for _, csv_file, _ in files.values():
+                csv_file.close()
+        return [csv_path for csv_path, _, _ in files.values()]
+
+    @classmethod
+    def iter_csv(cls, path: str, channel: str, chunk_rows: int = 10000) -> Iterator[str]:
+        """Converts one channel of a run log to CSV, in chunks of text.
+
+        Args:
+            path (str): Path of the run log.
+            channel (str): Name of the channel.
+            chunk_rows (int, optional): Rows per chunk of text. Defaults to 10000.
+
+        Yields:
+            str: CSV text, starting with the header row.
+        """
+        yield "Time,Value,Segment UID\n"
+        channel_id = None
+        segments: dict[int, Union[str, None]] = {-1: None}
+        text = io.StringIO()
+        writer = csv.writer(text, lineterminator="\n")
+        rows = 0
+        for _, kind, fields in cls.read_records(path):
+            match kind:
+                case "C" if fields[1] == channel:
+                    channel_id = fields[0]
+                case "G":
+                    segments[fields[0]] = fields[1]
+                case "S" if fields[0] == channel_id:
+                    writer.writerow([fields[1] / 1e9, fields[3], segments[fields[2]]])
+                    rows += 1
+                    if rows == chunk_rows:
+                        yield text.getvalue()
+                        text.seek(0)
+                        text.truncate()
+                        rows = 0
+        yield text.getvalue()
+
+    @classmethod
+    def read_range(
+        cls, path: str, channel: str, start_time: float, end_time: float
+    ) -> Iterator[tuple[float, Union[float, str, None], Union[str, None]]]:
+        """Reads the samples of one channel of a run log within a time range.
+
+        The run log is not indexed, as its samples cannot be decoded without the channel and
+        segment declarations before them; it is read from its start, up to the first sample of
+        the channel after the range.
+
+        Args:
+            path (str): Path of the run log.
+            channel (str): Name of the channel.
+            start_time (float): The start of the range, in seconds.
+            end_time (float): The end of the range, included, in seconds.
+
+        Yields:
+            tuple[float, Union[float, str, None], Union[str, None]]: The time, value and segment
+            UID of each sample.
+        """
+        channel_id = None
+        segments: dict[int, Union[str, None]] = {-1: None}
+        start_ns, end_ns = round(start_time * 1e9), round(end_time * 1e9)
+        for _, kind, fields in cls.read_records(path):
+            match kind:
+                case "C" if fields[1] == channel:
+                    channel_id = fields[0]
+                case "G":
+                    segments[fields[0]] = fields[1]
+                case "S" if fields[0] == channel_id and fields[1] >= start_ns:
+                    if fields[1] > end_ns:
+                        return
+                    yield fields[1] / 1e9, fields[3], segments[fields[2]]
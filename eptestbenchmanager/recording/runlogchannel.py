@@ -0,0 +1,53 @@
+from typing import Union
+from . import RecordingFile, RunLog
+
+
+class RunLogChannel(RecordingFile):
+    """A recording file that is a channel of the run log of its run.
+
+    Opening and closing a channel only declares it in the run log; the run log itself stays open
+    until the recording writer is told to close it at the end of the run.
+
+    Attributes:
+        run_log (RunLog): The run log written to.
+        name (str): Name of the channel, and of its file when the run log is exported.
+        metadata (dict): Instrument UID, name and unit of the channel.
+        _channel_id (Union[int, None]): The ID of the channel while it is open.
+    """
+
+    def __init__(self, run_log: RunLog, name: str, metadata: dict):
+        """Initializes the RunLogChannel.
+
+        Args:
+            run_log (RunLog): The run log to write to.
+            name (str): Name of the channel, and of its file when the run log is exported.
+            metadata (dict): Instrument UID, name and unit of the channel.
+        """
+        super().__init__(f"{run_log.path}/{name}")
+        self.run_log = run_log
+        self.name = name
+        self.metadata = metadata
+        self._channel_id: Union[int, None] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._channel_id is not None and self.run_log.is_open
+
+    def open(self) -> None:
+        """Declares the channel in the run log, which the recording writer has opened."""
+        if not self.run_log.is_open:
+            raise ValueError(f"run log {self.run_log.path} is not open")
+        self._channel_id = self.run_log.declare_channel(self.name, self.metadata)
+
+    def write_row(self, row: list) -> int:
+        return self.run_log.write_row([self._channel_id, *row])
+
+    def flush(self) -> None:
+        self.run_log.flush()
+
+    def fsync(self) -> None:
+        self.run_log.fsync()
+
+    def close(self) -> None:
+        self.run_log.flush()
+        self._channel_id = None
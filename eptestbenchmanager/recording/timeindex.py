@@ -0,0 +1,110 @@
+import struct
+from typing import Union
+import numpy as np
+
+
+class TimeIndex:
+    """A sparse index of the rows of a record file by time, kept in a file next to it.
+
+    The writer of the record file adds the time and file offset of rows it may be read from,
+    e.g. the start of a compressed frame; an entry is kept only once the file has grown by
+    `interval` bytes since the last one, so the index stays a few bytes per `interval` of data.
+    Readers of a time range seek to the last entry before the range instead of reading the file
+    from its start. Times are assumed not to decrease along the file.
+
+    The index file is a sequence of entries of a float64 time in seconds and an int64 offset,
+    little-endian. It is appended when the record file is flushed, after the data it points to,
+    so a crash leaves at most an incomplete last entry, which readers ignore.
+
+    Attributes:
+        EXTENSION (str): Added to the path of the record file for the path of its index.
+        path (str): Path of the index file.
+        interval (int): Bytes of the record file between entries, at least.
+        _last_offset (Union[int, None]): The offset of the last entry, or None if there is none.
+        _pending (bytearray): Entries not yet written to the index file.
+        _file: The open index file.
+    """
+
+    EXTENSION = ".idx"
+    _ENTRY = struct.Struct("<dq")
+
+    def __init__(self, record_path: str, interval: int = 65536):
+        """Initializes the TimeIndex.
+
+        Args:
+            record_path (str): Path of the record file indexed.
+            interval (int, optional): Bytes of the record file between entries, at least.
+            Defaults to 65536.
+        """
+        self.path = record_path + self.EXTENSION
+        self.interval = interval
+        self._last_offset: Union[int, None] = None
+        self._pending = bytearray()
+        self._file = None
+
+    def open(self) -> None:
+        """Opens the index file for appending, continuing after its last complete entry."""
+        _, offsets = self.read(self.path)
+        self._last_offset = int(offsets[-1]) if len(offsets) > 0 else None
+        self._file = open(self.path, "ab")  # pylint: disable=consider-using-with
+        self._file.truncate(len(offsets) * self._ENTRY.size)
+
+    def add(self, timestamp: float, offset: int) -> None:
+        """Adds an entry, unless the last one is less than `interval` bytes before it.
+
+        Args:
+            timestamp (float): The time of the row at the offset, in seconds.
+            offset (int): The offset of the row in the record file.
+        """
+        if self._last_offset is None or offset - self._last_offset >= self.interval:
+            self._pending += self._ENTRY.pack(timestamp, offset)
+            self._last_offset = offset
+
+    def flush(self) -> None:
+        """Writes the pending entries to the index file."""
+        if self._pending:
+            self._file.write(self._pending)
+            self._pending.clear()
+            self._file.flush()
+
+    def close(self) -> None:
+        """Writes the pending entries and closes the index file."""
+        self.flush()
+        self._file.close()
+        self._file = None
+
+    @classmethod
+    def read(cls, path: str) -> tuple[np.ndarray, np.ndarray]:
+        """Reads the complete entries of an index file.
+
+        Args:
+            path (str): Path of the index file.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The times and offsets of the entries, empty if there
+            is no index file.
+        """
+        entry = np.dtype([("time", "<f8"), ("offset", "<i8")])
+        try:
+            with open(path, "rb") as index_file:
+                data = index_file.read()
+        except FileNotFoundError:
+            data = b""
+        entries = np.frombuffer(data, dtype=entry, count=len(data) // entry.itemsize)
+        return entries["time"], entries["offset"]
+
+    @classmethod
+    def seek_offset(cls, record_path: str, start_time: float) -> int:
+        """Returns the offset to read a record file from, to get its rows from a time on.
+
+        Args:
+            record_path (str): Path of the record file.
+            start_time (float): The time, in seconds.
+
+        Returns:
+            int: The offset of the last entry before the time, or 0 if there is none, e.g. for
+            files written without an index.
+        """
+        times, offsets = cls.read(record_path + cls.EXTENSION)
+        entry = int(np.searchsorted(times, start_time, side="left")) - 1
+        return int(offsets[entry]) if entry >= 0 else 0
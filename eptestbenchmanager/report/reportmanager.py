@@ -1,9 +1,17 @@
 import logging
 from pathlib import Path
 import os
+import tempfile
 import zipfile
 from typing import TYPE_CHECKING
 from eptestbenchmanager.dashboard.elements import ArchiveDownload
+from eptestbenchmanager.recording import (
+    BinaryRecordingFile,
+    RunLog,
+    CompressionCodec,
+    FrameCompressor,
+    TimeIndex,
+)
 
 if TYPE_CHECKING:
     from eptestbenchmanager.manager import TestbenchManager
@@ -99,6 +107,11 @@ class ReportManager:
     def create_archive(self, run_id, output_name_root) -> str:
         """Creates a zip archive of the log directory for a specific run.
 
+        Recordings in the binary format are converted to CSV files in the archive, and run logs of
+        multiplexed recordings are split into one CSV file per recording. Recordings compressed as
+        they were written are stored as they are, without compressing them again. The time indexes
+        of recordings are left out.
+
         Args:
             run_id (str): Identifier for the run.
             output_name_root (str): Root name for the output archive file.
@@ -112,11 +125,36 @@ class ReportManager:
         logger.debug("Compressing log file directory: %s", run_log_dir)
 
         with zipfile.ZipFile(output_archive_path, "w", zipfile.ZIP_DEFLATED) as zipf:
-            for root, _, files in os.walk(run_log_dir):
+            for root, dirs, files in os.walk(run_log_dir):
+                for directory in list(dirs):
+                    if directory.endswith(BinaryRecordingFile.EXTENSION):
+                        dirs.remove(directory)  # Don't archive the raw columns
+                        recording_path = os.path.join(root, directory)
+                        arcname = os.path.relpath(recording_path, run_log_dir)
+                        arcname = arcname.removesuffix(BinaryRecordingFile.EXTENSION) + ".csv"
+                        with zipf.open(arcname, "w") as archive_file:
+                            for text in BinaryRecordingFile.iter_csv(recording_path):
+                                archive_file.write(text.encode("utf-8"))
                 for file in files:
                     file_path = os.path.join(root, file)
                     arcname = os.path.relpath(file_path, run_log_dir)
-                    zipf.write(file_path, arcname)
+                    if file == RunLog.FILE_NAME:
+                        with tempfile.TemporaryDirectory() as split_dir:
+                            for csv_path in RunLog.split_csv(file_path, split_dir):
+                                zipf.write(
+                                    csv_path,
+                                    os.path.join(
+                                        os.path.dirname(arcname),
+                                        os.path.relpath(csv_path, split_dir),
+                                    ),
+                                )
+                        continue
+                    if file.endswith(TimeIndex.EXTENSION):
+                        continue  # Only for reading ranges of the recording in place
+                    if FrameCompressor.codec_of(file) != CompressionCodec.NONE:
+                        zipf.write(file_path, arcname, compress_type=zipfile.ZIP_STORED)
+                    else:
+                        zipf.write(file_path, arcname)
         logger.info("Directory %s compressed into %s", run_log_dir, output_archive_path)
         self.archives.append(output_name_root)
 